@@ -0,0 +1,150 @@
+"""
+Parser equivalence checks
+Parses synthetic tool output (see Utilities/Synthetic) with the current parsers and with the reference
+parsers in legacy_parsers.py and reports every output on which they disagree. Outputs cover several sizes
+and seeds, partial gene ends, CRLF line endings and streamed (RawOutput) input.
+
+Usage (from the repository root):
+    python benchmarks/equivalence.py
+    python benchmarks/equivalence.py --sizes 0 1 10 5000 --seeds 3
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from phagecommander import Gene
+from phagecommander.Utilities import Synthetic, Aragorn, Spool
+import legacy_parsers
+
+DEFAULT_SIZES = [0, 1, 2, 10, 1000]
+BASES_PER_GENE = 1000
+
+
+def _calls(size, seed):
+    return Synthetic.geneCalls(size, size * BASES_PER_GENE, seed=seed)
+
+
+def _trnaCalls(size, seed):
+    return Synthetic.trnaCalls(size, size * BASES_PER_GENE, seed=seed)
+
+
+def _referenceHmm(hmmData, identity):
+    # the reference hmm parser cut multi digit partial starts down ('<1234' -> '34') - outputs with partial
+    # starts are checked against the GeneMarkS reference parser, which reads the same format
+    if '<' in hmmData:
+        return legacy_parsers.GeneParse.parse_genemarkS(hmmData, identity)
+    return legacy_parsers.GeneParse.parse_genemarkHmm(hmmData, identity)
+
+
+# name: (current parser, reference parser, output generator(size, seed, partialEnds) - None if the tool
+# does not report partial ends)
+PARSERS = {'glimmer': (Gene.GeneParse.parse_glimmer, legacy_parsers.GeneParse.parse_glimmer,
+                       lambda n, seed, partial: None if partial else Synthetic.glimmer(_calls(n, seed))),
+           'genemark': (Gene.GeneParse.parse_genemark, legacy_parsers.GeneParse.parse_genemark,
+                        lambda n, seed, partial: Synthetic.genemark(_calls(n, seed), partialEnds=partial)),
+           'genemarkS': (Gene.GeneParse.parse_genemarkS, legacy_parsers.GeneParse.parse_genemarkS,
+                         lambda n, seed, partial: Synthetic.genemarkLst(_calls(n, seed), partialEnds=partial)),
+           'genemarkHmm': (Gene.GeneParse.parse_genemarkHmm, _referenceHmm,
+                           lambda n, seed, partial: Synthetic.genemarkLst(_calls(n, seed), partialEnds=partial)),
+           'genemarkHeuristic': (Gene.GeneParse.parse_genemarkHeuristic,
+                                 legacy_parsers.GeneParse.parse_genemarkHeuristic,
+                                 lambda n, seed, partial: Synthetic.genemarkLst(_calls(n, seed),
+                                                                                partialEnds=partial)),
+           'genemarkS2': (Gene.GeneParse.parse_genemarkS2, legacy_parsers.GeneParse.parse_genemarkS2,
+                          lambda n, seed, partial: None if partial else Synthetic.genemarkS2(_calls(n, seed))),
+           'prodigal': (Gene.GeneParse.parse_prodigal, legacy_parsers.GeneParse.parse_prodigal,
+                        lambda n, seed, partial: Synthetic.prodigal(_calls(n, seed), n * BASES_PER_GENE,
+                                                                    partialEnds=partial)),
+           'rast': (Gene.GeneParse.parse_rast, legacy_parsers.GeneParse.parse_rast,
+                    lambda n, seed, partial: None if partial else Synthetic.rast(_calls(n, seed))),
+           'aragorn': (Aragorn.aragorn_parse, legacy_parsers.aragorn_parse,
+                       lambda n, seed, partial: None if partial else Synthetic.aragorn(_trnaCalls(n, seed)))}
+
+# parsers which also take streamed input
+STREAMED = {'glimmer', 'genemark', 'genemarkS', 'genemarkHmm', 'genemarkHeuristic', 'genemarkS2', 'prodigal',
+            'rast'}
+
+
+def _describe(feature) -> tuple:
+    return (feature.start, feature.stop, feature.direction, feature.length, getattr(feature, 'identity', None),
+            getattr(feature, 'type', None))
+
+
+def _partialEnds(genes) -> list:
+    return [(gene.partialStart, gene.partialStop) for gene in genes]
+
+
+def compare(name: str, current: list, reference: list, partial: bool) -> list:
+    """
+    :return: list of differences between the parsed outputs
+    """
+    differences = []
+    if len(current) != len(reference):
+        differences.append('{} genes, reference parsed {}'.format(len(current), len(reference)))
+    for index, (gene, referenceGene) in enumerate(zip(current, reference)):
+        if _describe(gene) != _describe(referenceGene):
+            differences.append('gene {}: {} != {}'.format(index, _describe(gene), _describe(referenceGene)))
+
+    # the reference parsers did not record partial ends - compare against the generated marks
+    if name != 'aragorn':
+        expected = [(False, False)] * len(current)
+        if partial and current:
+            expected[0] = (True, expected[0][1])
+            expected[-1] = (expected[-1][0], True)
+        if _partialEnds(current) != expected:
+            differences.append('partial ends {} != {}'.format(_partialEnds(current), expected))
+    return differences
+
+
+def run(parserNames, sizes, seeds) -> list:
+    """
+    :return: list of failure descriptions
+    """
+    failures = []
+    for name in parserNames:
+        parser, reference, generator = PARSERS[name]
+        checked = 0
+        for size in sizes:
+            for seed in range(seeds):
+                for partial in (False, True):
+                    data = generator(size, seed, partial)
+                    if data is None:
+                        continue
+                    inputs = {'str': data, 'crlf': data.replace('\n', '\r\n')}
+                    if name in STREAMED:
+                        inputs['raw'] = Spool.RawOutput(data.encode('utf-8'))
+                    for inputName, inputData in inputs.items():
+                        # the reference parsers only read str
+                        expected = reference(inputData if isinstance(inputData, str) else data, 'ref')
+                        differences = compare(name, parser(inputData, 'ref'), expected, partial)
+                        checked += 1
+                        for difference in differences:
+                            failures.append('{} ({} genes, seed {}, {}{}): {}'.format(
+                                name, size, seed, inputName, ', partial ends' if partial else '', difference))
+        print('{:<18} {:>5} outputs checked'.format(name, checked))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the tool output parsers against the reference parsers')
+    parser.add_argument('--parsers', nargs='+', choices=list(PARSERS), default=list(PARSERS))
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES, help='genes per output')
+    parser.add_argument('--seeds', type=int, default=3, help='outputs generated per size')
+    args = parser.parse_args()
+
+    failures = run(args.parsers, args.sizes, args.seeds)
+    if failures:
+        print('\nDifferences:\n  ' + '\n  '.join(failures[:50]))
+        if len(failures) > 50:
+            print('  ... {} more'.format(len(failures) - 50))
+        return 1
+    print('\nAll parsers match the reference')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+Genbank export checks
+Writes synthetic genomes (see Utilities/Synthetic) with the streaming genbank writer and with the Biopython
+based reference writer in legacy_genbank.py, reports any output which is not byte identical, then times both
+writers and measures their peak memory.
+Cases cover empty / single record / multi record files, single base and zero length features, long tRNA
+notes which wrap, quotes in notes, long record names and upper case sequences.
+
+Usage (from the repository root):
+    python benchmarks/genbank.py
+    python benchmarks/genbank.py --sizes 100000 5000000 --skip-check
+"""
+
+import argparse
+import filecmp
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from phagecommander import Gene
+from phagecommander.Utilities import Synthetic
+import legacy_genbank
+
+DEFAULT_SIZES = [100000, 1000000, 5000000]
+# bases per gene of the synthetic genomes
+BASES_PER_GENE = 1000
+
+
+def _genes(length: int, seed: int) -> list:
+    count = max(length // BASES_PER_GENE, 1)
+    genes = [Gene.Gene(left, right, strand, 'synthetic') for left, right, strand in
+             Synthetic.geneCalls(count, length, seed)]
+    genes.extend(Gene.TRNA(left, right, strand, '{}({})'.format(aminoAcid, anticodon)) for
+                 left, right, strand, aminoAcid, anticodon in Synthetic.trnaCalls(count // 20, length, seed + 1))
+    return genes
+
+
+def cases() -> list:
+    """
+    :return: List[(case name, List[(record name, sequence, genes)])]
+    """
+    dna = Synthetic.sequence(2000, seed=1)
+    odd = [Gene.Gene(1, 1, '+'), Gene.Gene(5, 4, '-'), Gene.Gene(2001, 2000, '+'), Gene.Gene(7, 1993, '-'),
+           Gene.TRNA(10, 90, '+', 'tRNA-Pseudo "long" note (' + 'acgt ' * 20 + ')'),
+           Gene.TRNA(100, 180, '-', 'tRNA-' + 'x' * 100)]
+    return [('empty sequence', [('empty', '', [])]),
+            ('no genes', [('nogenes', dna, [])]),
+            ('single record', [('genome', dna, _genes(2000, 2))]),
+            ('upper case', [('upper', dna.upper(), _genes(2000, 3))]),
+            ('unnamed', [('', dna[:61], [])]),
+            ('edge features', [('edges', dna, odd)]),
+            ('long name', [('a' * 20, dna, _genes(2000, 4)), ('b' * 40, dna[:59], [])]),
+            ('multi record', [('contig{}'.format(ind), Synthetic.sequence(1000 + ind * 37, seed=ind),
+                               _genes(1000 + ind * 37, ind)) for ind in range(5)])]
+
+
+def check(directory: str) -> list:
+    """
+    :return: list of failure descriptions
+    """
+    failures = []
+    for name, records in cases():
+        current = os.path.join(directory, 'current.gb')
+        reference = os.path.join(directory, 'reference.gb')
+        if len(records) == 1:
+            # single record files are named after the file
+            current = os.path.join(directory, records[0][0] or '.gb')
+            reference = os.path.join(directory, 'ref', records[0][0] or '.gb')
+            os.makedirs(os.path.dirname(reference), exist_ok=True)
+            Gene.GeneUtils.genbankToFile(records[0][1], records[0][2], current)
+            legacy_genbank.genbankToFile(records[0][1], records[0][2], reference)
+        else:
+            Gene.GeneUtils.genbankContigsToFile(records, current)
+            legacy_genbank.genbankContigsToFile(records, reference)
+        identical = filecmp.cmp(current, reference, shallow=False)
+        print('{:<16} {}'.format(name, 'identical' if identical else 'DIFFERENT'))
+        if not identical:
+            failures.append(name)
+    return failures
+
+
+def measure(write, records, fileName: str) -> tuple:
+    """
+    :return: (seconds, peak memory in bytes) of writing the records
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    write(records, fileName)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def benchmark(sizes, directory: str):
+    writers = {'streaming': Gene.GeneUtils.genbankContigsToFile,
+               'reference': legacy_genbank.genbankContigsToFile}
+    print('\n{:>10} {:>10} {:>10} {:>12}'.format('bases', 'writer', 'seconds', 'peak MB'))
+    for size in sizes:
+        records = [('genome', Synthetic.sequence(size, seed=size), _genes(size, size))]
+        for writerName, write in writers.items():
+            elapsed, peak = measure(write, records, os.path.join(directory, writerName + '.gb'))
+            print('{:>10} {:>10} {:>10.3f} {:>12.1f}'.format(size, writerName, elapsed, peak / (1024 * 1024)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check and time the streaming genbank writer')
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES, help='genome lengths to time')
+    parser.add_argument('--skip-check', action='store_true', help='only time the writers')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        failures = [] if args.skip_check else check(directory)
+        benchmark(args.sizes, directory)
+    if failures:
+        print('\nOutput differs from the reference: ' + ', '.join(failures))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
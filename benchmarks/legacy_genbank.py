@@ -0,0 +1,62 @@
+"""
+Reference genbank writer
+GeneUtils' genbank export as it was before the streaming writer (Utilities/GenbankWriter) - builds Biopython
+SeqRecords and writes them with Bio.SeqIO. genbank.py checks the streaming writer against it.
+"""
+
+import os
+from typing import List, Tuple
+
+import Bio.Seq
+import Bio.SeqFeature
+import Bio.SeqRecord
+from Bio import SeqIO
+from Bio.Alphabet import IUPAC
+
+from phagecommander.Gene import Gene, GeneUtils, TRNA
+
+
+def genbankToFile(sequence: str, genes: List[Gene], fileName: str):
+    gbRecord = _genbankRecord(sequence, genes, os.path.split(fileName)[1].split('.')[0])
+    SeqIO.write([gbRecord], fileName, 'genbank')
+
+
+def genbankContigsToFile(contigs: List[Tuple[str, str, List[Gene]]], fileName: str):
+    gbRecords = [_genbankRecord(sequence, genes, name) for name, sequence, genes in contigs]
+    SeqIO.write(gbRecords, fileName, 'genbank')
+
+
+def _genbankRecord(sequence: str, genes: List[Gene], name: str) -> Bio.SeqRecord.SeqRecord:
+    # create sequence from sequence string
+    seq = Bio.Seq.Seq(sequence, IUPAC.unambiguous_dna)
+
+    # sort genes from smallest to largest starts
+    genes = GeneUtils.sortGenes(genes)
+
+    # build features
+    features = []
+    for ind, gene in enumerate(genes):
+        ind += 1
+        direction = 1 if gene.direction == '+' else -1
+        geneFeature = Bio.SeqFeature.SeqFeature(Bio.SeqFeature.FeatureLocation(gene.start - 1, gene.stop),
+                                                type='gene',
+                                                qualifiers={'gene': ind},
+                                                strand=direction)
+        if isinstance(gene, Gene):
+            cdsFeature = Bio.SeqFeature.SeqFeature(Bio.SeqFeature.FeatureLocation(gene.start - 1, gene.stop),
+                                                   type='CDS',
+                                                   qualifiers={'gene': ind},
+                                                   strand=direction)
+        elif isinstance(gene, TRNA):
+            product = gene.type.split('(')[0]
+            cdsFeature = Bio.SeqFeature.SeqFeature(Bio.SeqFeature.FeatureLocation(gene.start - 1, gene.stop),
+                                                   type='TRNA',
+                                                   qualifiers={'gene': ind,
+                                                               'note': gene.type,
+                                                               'product': product},
+                                                   strand=direction)
+        features.append(geneFeature)
+        features.append(cdsFeature)
+
+    # create genbank record from genes
+    return Bio.SeqRecord.SeqRecord(seq, features=features, name=name)
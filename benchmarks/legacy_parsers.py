@@ -0,0 +1,319 @@
+"""
+Reference parsers
+The tool output parsers as they were before being rewritten as single pass, precompiled patterns
+(GeneParse and Aragorn.aragorn_parse). equivalence.py checks the current parsers against them.
+"""
+
+import ast
+from typing import List
+
+from bs4 import BeautifulSoup
+from phagecommander.Gene import Gene, GeneError, TRNA
+
+
+class GeneParse:
+    """
+    Class for parsing tool output as GeneParse did before its parsers were compiled
+    All methods are static
+    """
+
+    @staticmethod
+    def parse_glimmer(glimmer_data, identity=''):
+        """
+        Parses the output of a glimmer query for gene predictions
+        :param glimmer_data: string representing glimmer query output
+        :param identity: optional identifier for each gene
+        :return: list of Genes in numerical order
+        """
+        # split text into lines - skipping first line
+        data = glimmer_data.splitlines()[1:]
+
+        # Get Gene data
+        genes = []
+        for line in data:
+            if 'html' not in line:
+                data = [x for x in line.split(' ') if x != '']
+                # get gene direction and create Gene
+                if '+' in data[3]:
+                    genes.append(Gene(data[1], data[2], '+', identity=identity))
+                else:
+                    genes.append(Gene(data[2], data[1], '-', identity=identity))
+
+        # return list of Genes
+        return genes
+
+    @staticmethod
+    def parse_genemark(gm_data, identity=''):
+        """
+        Parse GeneMark output file for Genes
+        :param gm_file: GeneMark output file
+        :param identity: optional identifier for each Gene
+        :return: list of Genes in file order
+        """
+        gm_data = gm_data.splitlines()
+
+        # skip until Region of Interests section
+        index = 0
+        for ind, line in enumerate(gm_data):
+            if '   Gene    Strand    LeftEnd    RightEnd       Gene     Class' in line:
+                index = ind
+                break
+
+        # invalid file format
+        if index == len(gm_data) - 1:
+            raise GeneError('Invalid Genemark file format')
+
+        # go to first gene
+        gm_data = gm_data[index + 2:]
+
+        # Get gene data
+        genes = []
+        for line in gm_data:
+            if line != '':
+                data = [x for x in line.strip().split(' ') if x != '']
+                start = data[2]
+                stop = data[3]
+                direction = data[1]
+                genes.append(Gene(start, stop, direction, identity=identity))
+            else:
+                break
+
+        return genes
+
+    @staticmethod
+    def parse_genemarkS(gms_data, identity=''):
+        """
+        Parse GeneMarkS file for Gene data
+        :param s_file: GeneMarkS file
+        :param identity: optional identifier for each Gene
+        :return: list of Genes in file order
+        """
+        gms_data = gms_data.splitlines()
+
+        # begin parse
+        current_line = gms_data[0]
+        # Check if proper GeneMark file
+        try:
+            if 'GeneMark.hmm' not in current_line:
+                raise GeneError("GMS: Not a valid GeneMark GMS file")
+        except GeneError:
+            raise
+
+        # skip through until gene data
+        index = 0
+        for ind, current_line in enumerate(gms_data[1:]):
+            if 'Gene    Strand    LeftEnd    RightEnd       Gene     Class' in current_line:
+                index = ind
+                break
+
+        gms_data = gms_data[index + 3:]
+
+        # array for gene objs
+        genes = []
+        # get gene data
+        for current_line in gms_data:
+            if current_line != '':
+                data = [x for x in current_line.strip().split(' ') if x != '']
+                genes.append(Gene(data[2], data[3], data[1], identity=identity))
+
+        return genes
+
+    @staticmethod
+    def parse_genemarkHmm(hmm_data, identity=''):
+        """
+        Parse GeneMark Hmm file for Gene data
+        :param hmm_file:
+        :param identity: optional identifier for each Gene
+        :return: list of Genes in file order
+        """
+        hmm_data = hmm_data.splitlines()
+
+        # begin parse
+        current_line = hmm_data[0]
+        # Check if proper GeneMark file
+        try:
+            if 'GeneMark.hmm' not in current_line:
+                raise GeneError("Hmm: Not a valid GeneMark Hmm file")
+        except GeneError:
+            raise
+
+        # skip through until gene data
+        # while ('Gene    Strand    LeftEnd    RightEnd       Gene     Class' not in current_line):
+        #     current_line = file.readline()
+        # current_line = file.readline()  # read blank line
+        index = 0
+        for ind, current_line in enumerate(hmm_data[1:]):
+            if 'Gene    Strand    LeftEnd    RightEnd       Gene     Class' in current_line:
+                index = ind
+                break
+        hmm_data = hmm_data[index + 3:]
+
+        # array for gene objs
+        genes = []
+        # get gene data
+        for current_line in hmm_data:
+            if current_line != '':
+                data = [x for x in current_line.strip().split(' ') if x != '']
+                # check for weird characters with gene sequence ends (Ex: start = '<2')
+                nonNumChars = False
+                for ind, char in enumerate(data[2]):
+                    if not char.isnumeric():
+                        nonNumChars = True
+                    elif char.isnumeric():
+                        if not nonNumChars:
+                            break
+                        else:
+                            data[2] = data[2][ind:]
+
+                genes.append(Gene(data[2], data[3], data[1], identity=identity))
+
+        return genes
+
+    @staticmethod
+    def parse_genemarkHeuristic(heuristic_data, identity=''):
+        """
+        Parse GeneMark Heuristic file for Gene data
+        :param heuristic_file: GeneMark Heuristic output file
+        :param identity: optional identifier for each Gene
+        :return: list of Genes in order
+        """
+        heuristic_data = heuristic_data.splitlines()
+        # begin parse
+        current_line = heuristic_data[0]
+        # Check if proper GeneMark file
+        try:
+            if 'GeneMark.hmm' not in current_line:
+                raise GeneError("Hmm: Not a valid GeneMark Hmm file")
+        except GeneError:
+            raise
+
+        # skip through until gene data
+        index = 0
+        for ind, current_line in enumerate(heuristic_data[1:]):
+            if 'Gene    Strand    LeftEnd    RightEnd       Gene     Class' in current_line:
+                index = ind
+                break
+
+        heuristic_data = heuristic_data[index + 3:]
+
+        # arary for gene objs
+        genes = []
+        # get gene data
+        for current_line in heuristic_data:
+            if current_line != '':
+                data = [x for x in current_line.strip().split(' ') if x != '']
+                genes.append(Gene(data[2], data[3], data[1], identity=identity))
+
+        return genes
+
+    @staticmethod
+    def parse_genemarkS2(gms2_data, identity=''):
+        """
+        Parse GeneMark S2 file for Gene data
+        :param s2_file: GeneMark S2 output file
+        :param identity: optional identifier for each Gene
+        :return: list of Genes in file order
+        """
+        gms2_data = gms2_data.splitlines()
+
+        # skip until gene data
+        # curr_line = file.readline()
+        # while ('SequenceID' not in curr_line):
+        #     curr_line = file.readline()
+
+        index = 0
+        for ind, line in enumerate(gms2_data):
+            if 'SequenceID' in line:
+                index = ind
+                break
+        gms2_data = gms2_data[index + 1:]
+
+        # Get gene data
+        genes = []
+        for curr_line in gms2_data:
+            if curr_line != '':
+                data = [x for x in curr_line.strip().split(' ') if x != '']
+                genes.append(Gene(data[2], data[3], data[1], identity=identity))
+            # stop at newline after genes
+            else:
+                break
+
+        return genes
+
+    @staticmethod
+    def parse_prodigal(prodigal_data, identity=''):
+        """
+        Parse prodigal output file for Gene information
+        :param prodigal_file: prodigal output file
+        :param identity: optional identifier for Gene
+        :return: list of Genes in file order
+        """
+        prodigal_data = prodigal_data.splitlines()
+
+        # gene info starts on third line
+        genes = []
+        for index, line in enumerate(prodigal_data):
+            if index >= 2:
+                if 'CDS' in line:
+                    gene_str = line.strip().split('CDS')[-1].strip()
+                    direction = '+'
+                    if 'complement' in gene_str:
+                        direction = '-'
+                        # remove 'complement'
+                        gene_str = gene_str[len('complement'):]
+                        # remove ()
+                        gene_str = gene_str[1:-1]
+                    start, end = gene_str.split('..')
+                    # start, end = [int(x) for x in gene_str.split('.') if x.isnumeric()]
+                    # create gene
+                    genes.append(Gene(start, end, direction, identity=identity))
+
+        return genes
+
+    @staticmethod
+    def parse_rast(rast_data, identity=''):
+        """
+        Parse the gff3 formatted data for genes
+        :param rast_data: gff3 formatted gene annotations
+        :param identity: optional identity for genes
+        :return: List[Gene]
+        """
+        # find non comment lines
+        genes = []
+        for line in rast_data.splitlines():
+            if 'CDS' in line:
+                data = line.split('\t')
+                start = data[3]
+                stop = data[4]
+                direction = data[6]
+                genes.append(Gene(start, stop, direction, identity))
+
+        return genes
+
+
+def aragorn_parse(aragorn_data: str, id=None):
+    soup = BeautifulSoup(aragorn_data, 'html.parser')
+    trnas = soup.find('pre')
+
+    genes: List[TRNA] = []
+    lines = trnas.text.split('\n')
+    # total found on third line
+    result_line = lines[2].split(' ')
+    if int(result_line[0]) != 0:
+        for line in lines[3:]:
+            if 'tRNA' in line:
+                line = line.split('\t')
+                seq_data = line[0].split()
+                rna = line[2]
+                seq_type = seq_data[1] + rna
+                # check if complement
+                if seq_data[2][0] == 'c':
+                    direction = '-'
+                    start, stop = ast.literal_eval(seq_data[2][1:])
+                else:
+                    direction = '+'
+                    start, stop = ast.literal_eval(seq_data[2])
+                gene = TRNA(start, stop, direction, seq_type, identity=id)
+                genes.append(gene)
+
+    return genes
@@ -0,0 +1,173 @@
+"""
+Parser micro-benchmarks
+Times every GeneParse method on synthetic tool output (see Utilities/Synthetic) from 100 to 1,000,000 genes
+and reports throughput and peak memory per parser. Results can be saved as a baseline and later runs
+compared against it - a parser which slowed down / grew past the tolerance is reported as a regression.
+
+Usage (from the repository root):
+    python benchmarks/parsers.py                         # run and compare against baselines.json
+    python benchmarks/parsers.py --save                  # run and store the results as the new baseline
+    python benchmarks/parsers.py --parsers glimmer rast --sizes 1000 100000
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from phagecommander import Gene
+from phagecommander.Utilities import Synthetic, MetagenePy, Aragorn
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+DEFAULT_SIZES = [100, 1000, 10000, 100000, 1000000]
+# bases per gene of the synthetic sequences
+BASES_PER_GENE = 1000
+# slowdown / memory growth (fraction) reported as a regression
+DEFAULT_TOLERANCE = 0.25
+
+
+def _calls(size):
+    return Synthetic.geneCalls(size, size * BASES_PER_GENE, seed=size)
+
+
+def _trnaCalls(size):
+    return Synthetic.trnaCalls(size, size * BASES_PER_GENE, seed=size)
+
+
+# name: (parse function, output generator, maximum size by default - None for no limit)
+# HTML parsers build a full BeautifulSoup tree, which takes several GB for a million genes
+PARSERS = {'glimmer': (Gene.GeneParse.parse_glimmer, lambda n: Synthetic.glimmer(_calls(n)), None),
+           'genemark': (Gene.GeneParse.parse_genemark, lambda n: Synthetic.genemark(_calls(n)), None),
+           'genemarkS': (Gene.GeneParse.parse_genemarkS, lambda n: Synthetic.genemarkLst(_calls(n)), None),
+           'genemarkHmm': (Gene.GeneParse.parse_genemarkHmm, lambda n: Synthetic.genemarkLst(_calls(n)), None),
+           'genemarkHeuristic': (Gene.GeneParse.parse_genemarkHeuristic,
+                                 lambda n: Synthetic.genemarkLst(_calls(n)), None),
+           'genemarkS2': (Gene.GeneParse.parse_genemarkS2, lambda n: Synthetic.genemarkS2(_calls(n)), None),
+           'prodigal': (Gene.GeneParse.parse_prodigal,
+                        lambda n: Synthetic.prodigal(_calls(n), n * BASES_PER_GENE), None),
+           'rast': (Gene.GeneParse.parse_rast, lambda n: Synthetic.rast(_calls(n)), None),
+           'metagene': (MetagenePy.Metagene.parse, lambda n: Synthetic.metagene(_calls(n)), 10000),
+           'aragorn': (Aragorn.aragorn_parse, lambda n: Synthetic.aragorn(_trnaCalls(n)), 100000)}
+
+
+def benchmark(parser, data: str, repeats: int) -> dict:
+    """
+    Times a parser and measures its peak memory
+    :param parser: parse function
+    :param data: tool output
+    :param repeats: timed runs - the fastest is reported
+    :return: {'genes', 'seconds', 'genes_per_sec', 'mb_per_sec', 'peak_mb'}
+    """
+    best = None
+    genes = 0
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        genes = len(parser(data))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    # separate run - tracing slows parsing down
+    gc.collect()
+    tracemalloc.start()
+    parser(data)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    size = len(data.encode('utf-8'))
+    return {'genes': genes,
+            'seconds': best,
+            'genes_per_sec': genes / best if best > 0 else 0.0,
+            'mb_per_sec': size / (1024 * 1024) / best if best > 0 else 0.0,
+            'peak_mb': peak / (1024 * 1024)}
+
+
+def run(parserNames, sizes, repeats, noLimit=False) -> dict:
+    """
+    :return: {parser: {size: results}} - sizes as strings (JSON keys)
+    """
+    results = dict()
+    for name in parserNames:
+        parser, generator, limit = PARSERS[name]
+        results[name] = dict()
+        for size in sizes:
+            if not noLimit and limit is not None and size > limit:
+                print('{:<18} {:>9}  skipped (above default limit {}, use --no-limit)'.format(name, size, limit))
+                continue
+            data = generator(size)
+            # fewer repeats for large outputs
+            result = benchmark(parser, data, repeats if size <= 100000 else 1)
+            del data
+            results[name][str(size)] = result
+            print('{:<18} {:>9}  {:>9.4f} s  {:>12,.0f} genes/s  {:>8.2f} MB/s  {:>9.2f} MB peak'.format(
+                name, size, result['seconds'], result['genes_per_sec'], result['mb_per_sec'], result['peak_mb']))
+    return results
+
+
+def compare(results: dict, baselines: dict, tolerance: float) -> list:
+    """
+    Compares results against baselines
+    :return: list of regression descriptions
+    """
+    regressions = []
+    print('\nComparison against baseline (ratio > 1 is slower / larger):')
+    for name, sizes in results.items():
+        for size, result in sizes.items():
+            baseline = baselines.get(name, dict()).get(size)
+            if baseline is None:
+                continue
+            timeRatio = result['seconds'] / baseline['seconds'] if baseline['seconds'] > 0 else 1.0
+            memoryRatio = result['peak_mb'] / baseline['peak_mb'] if baseline['peak_mb'] > 0 else 1.0
+            flags = []
+            if timeRatio > 1 + tolerance:
+                flags.append('SLOWER')
+            if memoryRatio > 1 + tolerance:
+                flags.append('MORE MEMORY')
+            print('{:<18} {:>9}  time x{:<6.2f} memory x{:<6.2f} {}'.format(name, size, timeRatio, memoryRatio,
+                                                                             ' '.join(flags)))
+            if flags:
+                regressions.append('{} ({} genes): {}'.format(name, size, ', '.join(flags)))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the tool output parsers')
+    parser.add_argument('--parsers', nargs='+', choices=list(PARSERS), default=list(PARSERS))
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES, help='genes per output')
+    parser.add_argument('--repeats', type=int, default=3, help='timed runs per size (fastest is kept)')
+    parser.add_argument('--no-limit', action='store_true', help='run HTML parsers at every size')
+    parser.add_argument('--baseline', default=BASELINE_FILE, help='baseline file')
+    parser.add_argument('--save', action='store_true', help='store the results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='slowdown / memory growth reported as a regression (fraction)')
+    args = parser.parse_args()
+
+    results = run(args.parsers, args.sizes, args.repeats, args.no_limit)
+
+    baselines = dict()
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as baselineFile:
+            baselines = json.load(baselineFile)
+
+    if args.save:
+        for name, sizes in results.items():
+            baselines.setdefault(name, dict()).update(sizes)
+        with open(args.baseline, 'w') as baselineFile:
+            json.dump(baselines, baselineFile, indent=2, sort_keys=True)
+        print('\nBaseline saved to {}'.format(args.baseline))
+        return 0
+
+    regressions = compare(results, baselines, args.tolerance)
+    if regressions:
+        print('\nRegressions:\n  ' + '\n  '.join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
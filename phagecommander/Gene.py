@@ -6,29 +6,15 @@ Author: Matthew Lazeroff
 import requests
 from bs4 import BeautifulSoup
 import json
-import time
 import os
-from typing import Callable, List
-from subprocess import Popen, PIPE
-import subprocess
+import re
+import sys
+from typing import Callable, Iterable, List, Tuple
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill, colors
-import Bio.Seq
-import Bio.SeqFeature
-import Bio.SeqRecord
 from Bio import SeqIO
-from Bio.Alphabet import IUPAC
 from PyQt5.QtCore import QSettings
-from phagecommander.Utilities import RastPy, MetagenePy, Aragorn
-
-# Genemark Domains
-FILE_DOMAIN = 'http://exon.gatech.edu/GeneMark/'
-GM_DOMAIN = 'http://18.220.233.194/genemark'  # Server DNA master uses
-GM_HMM_DOMAIN = 'http://exon.gatech.edu/GeneMark/gmhmmp.cgi'
-GMS_DOMAIN = 'http://exon.gatech.edu/GeneMark/genemarks.cgi'
-HEURISTIC_DOMAIN = 'http://exon.gatech.edu/GeneMark/heuristic_gmhmmp.cgi'
-GMS2_DOMAIN = 'http://exon.gatech.edu/GeneMark/genemarks2.cgi'
-GLIMMER_DOMAIN = 'http://18.220.233.194/glimmer'  # Server DNA master uses
+from phagecommander.Utilities import RastPy, MetagenePy, Aragorn, Fasta, Transport, Jobs, Poller, Endpoints, Spool
 
 # species
 species_file = os.path.join(os.path.dirname(__file__), 'species.txt')
@@ -59,24 +45,39 @@ class GeneFile:
         def __init__(self, message):
             self.message = message
 
-    def __init__(self, sequence_file, species, prodigalLocation=None):
+    def __init__(self, sequence_file, species, prodigalLocation=None, record=None, fasta=None):
         """
         Constructor
         Generates necessary parameters for post requests from DNA fasta file
         :param sequence_file:
+        :param record: name of a single record of the file to query
+            * None queries the file as a whole
+        :param fasta: open Fasta.FastaFile of sequence_file - read instead of opening the file again
+            * pass one FastaFile to the GeneFiles of every contig so the file is decompressed / indexed once
         """
-        # Load DNA Sequence into memory
-        input_file_data = b''
-        with open(sequence_file, 'rb') as input_file:
-            current_byte = input_file.read(1)
-            while (current_byte):
-                input_file_data += current_byte
-                current_byte = input_file.read(1)
+        # Load DNA Sequence into memory - gzip input is decompressed transparently
+        ownFasta = fasta is None
+        if ownFasta:
+            fasta = Fasta.FastaFile(sequence_file)
+        try:
+            # names of the records in the file
+            self.records = fasta.names
+            if record is None or len(self.records) == 1:
+                input_file_data = fasta.read()
+            else:
+                input_file_data = fasta.recordBytes(record)
+        finally:
+            if ownFasta:
+                fasta.close()
 
         # full path
         self.file_path = sequence_file
         # get base file name
         self.file_name = str(os.path.basename(sequence_file).split('.')[0])
+        # record being queried
+        self.record = record
+        if record is not None and len(self.records) > 1:
+            self.file_name = '{}_{}'.format(self.file_name, record)
 
         # File creation for post requests
         self.file_info = {'file': (self.file_name, input_file_data, 'application/octet-stream')}
@@ -93,6 +94,7 @@ class GeneFile:
         # store prodigal location
         self.prodigalLocation = prodigalLocation
 
+    @Jobs.job
     def glimmer_query(self):
         """
         Queries Glimmer for DNA sequence
@@ -107,7 +109,7 @@ class GeneFile:
         headers = {'User-Agent': 'GeneQuery'}
 
         # perform POST of file data
-        file_post = requests.post(GLIMMER_DOMAIN, data=payload, headers=headers)
+        file_post = Transport.post(Endpoints.url(Endpoints.GLIMMER), data=payload, headers=headers)
         file_post.raise_for_status()
         # check for job_key in response, if not raise error
         try:
@@ -120,22 +122,22 @@ class GeneFile:
         job_key = file_post.text.split('=')
         payload = [(job_key[0], job_key[1])]
 
-        # query server for output file
-        # if output file is not ready, wait 2 seconds and requery
-        try:
-            time.sleep(2)
-            return_post = requests.post(GLIMMER_DOMAIN, data=payload, headers=headers)
+        # poll server for output file until it is ready
+        def checkResult():
+            return_post = Transport.post(Endpoints.url(Endpoints.GLIMMER), data=payload, headers=headers)
             return_post.raise_for_status()
-            while return_post.status_code != 200:
-                time.sleep(2)
-                return_post = requests.post(GLIMMER_DOMAIN, data=payload, headers=headers)
-                return_post.raise_for_status()
+            # if job is not ready, HTTP response code 202 is returned
+            return return_post if return_post.status_code == 200 else None
+
+        try:
+            return_post = yield from Poller.poll('glimmer', checkResult)
         except requests.exceptions.HTTPError as e:
             raise GeneFile.GeneFileError(
                 'Glimmer Server Error: Check for DNA for proper format or check server status')
 
         self.query_data['glimmer'] = return_post.content.decode('utf-8')
 
+    @Jobs.job
     def genemark_query(self):
         """
         Query to GeneMark
@@ -149,7 +151,7 @@ class GeneFile:
         headers = {'User-Agent': 'GeneQuery'}
 
         # perform POST of file data
-        file_post = requests.post(GM_DOMAIN, data=payload, headers=headers)
+        file_post = Transport.post(Endpoints.url(Endpoints.GENEMARK), data=payload, headers=headers)
         file_post.raise_for_status()
         # check for job_key in response, if not raise error
         try:
@@ -162,17 +164,15 @@ class GeneFile:
         job_key = file_post.text.split('=')
         payload = [(job_key[0], job_key[1])]
 
-        # query server for output file
-        # if output file is not ready, wait 2 seconds and requery
-        try:
-            time.sleep(2)
-            return_post = requests.post(GM_DOMAIN, data=payload, headers=headers)
+        # poll server for output file until it is ready
+        def checkResult():
+            return_post = Transport.post(Endpoints.url(Endpoints.GENEMARK), data=payload, headers=headers)
             return_post.raise_for_status()
             # if job is not ready, HTTP response code 202 is returned
-            while return_post.status_code != 200:
-                time.sleep(2)
-                return_post = requests.post(GM_DOMAIN, data=payload, headers=headers)
-                return_post.raise_for_status()
+            return return_post if return_post.status_code == 200 else None
+
+        try:
+            return_post = yield from Poller.poll('gm', checkResult)
         except requests.exceptions.HTTPError as e:
             print(e)
             raise GeneFile.GeneFileError(
@@ -181,6 +181,7 @@ class GeneFile:
         self.query_data['gm'] = return_post.content.decode('utf-8')
         # End GeneMark Lookup -------------------------------------------------------
 
+    @Jobs.job
     def genemarkhmm_query(self):
         """
         Query GeneMark Hmm
@@ -192,7 +193,7 @@ class GeneFile:
                        'email': ''}
 
         # GeneMark hmm post - if unsuccessful, error thrown
-        hmm_post_request = requests.post(GM_HMM_DOMAIN, files=self.file_info, data=gm_hmm_data)
+        hmm_post_request = Transport.post(Endpoints.url(Endpoints.HMM), files=self.file_info, data=gm_hmm_data)
         hmm_post_request.raise_for_status()
         soup = BeautifulSoup(hmm_post_request.text, 'html.parser')
 
@@ -210,11 +211,12 @@ class GeneFile:
         except GeneFile.GeneFileError:
             raise
 
-        getHmmFile = requests.get(FILE_DOMAIN + file_location)
-        getHmmFile.raise_for_status()
-        self.query_data['hmm'] = getHmmFile.content.decode('utf-8')
+        yield
+        # output is spooled as it arrives - see Spool
+        self.query_data['hmm'] = Transport.download('GET', Endpoints.url(Endpoints.GENEMARK_FILES) + file_location)
         # End GeneMark Hmm Lookup --------------------------------------------------
 
+    @Jobs.job
     def genemarks_query(self):
         """
         Query GeneMarkS
@@ -224,7 +226,7 @@ class GeneFile:
                     'subject': 'GeneMarkS', 'gcode': 11}
 
         # GeneMarkS post - if unsuccessful, error thrown
-        gms_post_request = requests.post(GMS_DOMAIN, files=self.file_info, data=gms_data)
+        gms_post_request = Transport.post(Endpoints.url(Endpoints.GENEMARKS), files=self.file_info, data=gms_data)
         gms_post_request.raise_for_status()
         soup = BeautifulSoup(gms_post_request.text, 'html.parser')
 
@@ -242,11 +244,12 @@ class GeneFile:
         except GeneFile.GeneFileError:
             raise
 
-        getGmsFile = requests.get(FILE_DOMAIN + file_location)
-        getGmsFile.raise_for_status()
-        self.query_data['gms'] = getGmsFile.content.decode('utf-8')
+        yield
+        # output is spooled as it arrives - see Spool
+        self.query_data['gms'] = Transport.download('GET', Endpoints.url(Endpoints.GENEMARK_FILES) + file_location)
         # End GeneMarkS Lookup -----------------------------------------------------
 
+    @Jobs.job
     def genemark_heuristic_query(self):
         """
         Query GeneMark Heuristic
@@ -259,8 +262,8 @@ class GeneFile:
                           'mod_type': 1999}
 
         # GeneMark Heuristic post - if unsuccessful, error thrown
-        heuristic_post_request = requests.post(HEURISTIC_DOMAIN, files=self.file_info,
-                                               data=heuristic_data)
+        heuristic_post_request = Transport.post(Endpoints.url(Endpoints.HEURISTIC), files=self.file_info,
+                                                data=heuristic_data)
         heuristic_post_request.raise_for_status()
         soup = BeautifulSoup(heuristic_post_request.text, 'html.parser')
 
@@ -278,11 +281,13 @@ class GeneFile:
         except GeneFile.GeneFileError:
             raise
 
-        getHeuristicFile = requests.get(FILE_DOMAIN + file_location)
-        getHeuristicFile.raise_for_status()
-        self.query_data['heuristic'] = getHeuristicFile.content.decode('utf-8')
+        yield
+        # output is spooled as it arrives - see Spool
+        self.query_data['heuristic'] = Transport.download('GET',
+                                                          Endpoints.url(Endpoints.GENEMARK_FILES) + file_location)
         # End GeneMark Heuristic Lookup -------------------------------------------
 
+    @Jobs.job
     def genemarks2_query(self):
         """
         Query GeneMarkS2
@@ -292,7 +297,7 @@ class GeneFile:
                       'email': '', 'subject': 'GeneMarkS-2', 'gcode': 11}
 
         # GeneMarkS2 Post Request
-        gmms2_post_request = requests.post(GMS2_DOMAIN, files=self.file_info, data=gmms2_data)
+        gmms2_post_request = Transport.post(Endpoints.url(Endpoints.GENEMARKS2), files=self.file_info, data=gmms2_data)
         gmms2_post_request.raise_for_status()
         soup = BeautifulSoup(gmms2_post_request.text, 'html.parser')
 
@@ -310,11 +315,12 @@ class GeneFile:
         except GeneFile.GeneFileError:
             raise
 
-        getGMS2File = requests.get(FILE_DOMAIN + file_location)
-        getGMS2File.raise_for_status()
-        self.query_data['gms2'] = getGMS2File.content.decode('utf-8')
+        yield
+        # output is spooled as it arrives - see Spool
+        self.query_data['gms2'] = Transport.download('GET', Endpoints.url(Endpoints.GENEMARK_FILES) + file_location)
         # End GeneMarkS2 Lookup --------------------------------------------------
 
+    @Jobs.job
     def prodigal_query(self):
         """
         Calls prodigal to analyze file
@@ -322,23 +328,25 @@ class GeneFile:
         # # get path for prodigal exe
 
         # generate prodigal command and run
-        cmd = '\"{}\" -i \"{}\" -p meta'.format(self.prodigalLocation, self.file_path)
-        proc = Popen(cmd, stdout=PIPE, stderr=PIPE, shell=True, stdin=subprocess.DEVNULL)
-        stdout, stderr = proc.communicate()
+        # sequence is passed through stdin so compressed input files work as well
+        cmd = '\"{}\" -p meta'.format(self.prodigalLocation)
+        returncode, stdout, stderr = yield Jobs.Process(cmd, input=self.file_info['file'][1])
 
         # check for error, exit if so
-        if proc.returncode != 0:
+        if returncode != 0:
             print(stderr)
             raise GeneFile.GeneFileError("Prodigal")
 
         self.query_data['prodigal'] = stdout.decode('utf-8')
 
-    def rastQuery(self, username, password, jobId: int = None):
+    @Jobs.job
+    def rastQuery(self, username, password, jobId: int = None, deleteOnCancel: bool = False):
         """
         Submit the fasta file to RAST servers for submission
         :param username: RAST username
         :param password: RAST password
         :param jobId: RAST jobID
+        :param deleteOnCancel: delete the submitted job from the RAST servers if the query is cancelled
         :return:
         """
         # create RAST object
@@ -347,13 +355,21 @@ class GeneFile:
         # if a jobID was given, check if it is complete
         if jobId is None or not rastJob.checkIfComplete():
             # submit
-            rastJob.submit(self.file_path, self.file_name)
+            rastJob.submit(self.file_path, self.file_name, fastaContent=self.file_info['file'][1].decode('utf-8'))
 
             # check periodically for job completion
-            RAST_COMPLETION_CHECK_DELAY = 15
-            time.sleep(RAST_COMPLETION_CHECK_DELAY)
-            while not rastJob.checkIfComplete():
-                time.sleep(RAST_COMPLETION_CHECK_DELAY)
+            try:
+                yield from Poller.poll('rast', rastJob.checkIfComplete)
+            except (GeneratorExit, Jobs.Cancelled):
+                if deleteOnCancel:
+                    # the query's token is cancelled - delete outside of it
+                    with Jobs.activeToken(None):
+                        try:
+                            rastJob.deleteJob()
+                        except Exception:
+                            # failing to clean up must not mask the cancellation
+                            pass
+                raise
 
         # job is complete - retrieve gene annotation
         self.query_data['rast'] = rastJob.retrieveData()
@@ -362,11 +378,11 @@ class GeneFile:
         """
         Query Metagene servers for analysis
         """
-        metaGene = MetagenePy.Metagene(self.file_path, self.file_name)
+        metaGene = MetagenePy.Metagene(self.file_path, self.file_name, fileData=self.file_info['file'][1])
         self.query_data['metagene'] = metaGene.query()
 
     def aragornQuery(self):
-        self.query_data['aragorn'] = Aragorn.aragorn_query(self.file_path)
+        self.query_data['aragorn'] = Aragorn.aragorn_query(self.file_path, file_data=self.file_info['file'][1])
 
 
 class GeneError(Error):
@@ -374,70 +390,128 @@ class GeneError(Error):
         self.message = message
 
 
+def _intern(value):
+    """
+    Interns identity / contig strings - features of one tool (contig) share a single string
+    """
+    return sys.intern(value) if type(value) is str else value
+
+
 class GeneFeature:
+    """
+    Class for the location of a feature on a sequence
+    * Slot based - a consensus table holds millions of features, so they carry no per instance __dict__
+    """
     DIRECTIONS = {'+', '-'}
+    # every feature shares the same direction strings
+    _DIRECTION_STRINGS = {'+': '+', '-': '-'}
 
-    def __init__(self, start: int, stop: int, direction: str):
+    # contig - name of the contig the feature is located on
+    __slots__ = ('start', 'stop', 'direction', 'contig')
+    # attributes stored when pickling
+    _FIELDS = ('start', 'stop', 'direction', 'contig')
+    # values of attributes missing from older pickles (ex: features pickled before contigs were supported)
+    _DEFAULTS = {'contig': ''}
+
+    def __init__(self, start: int, stop: int, direction: str, contig: str = ''):
         self.start = start
         self.stop = stop
 
-        if direction not in GeneFeature.DIRECTIONS:
+        try:
+            self.direction = GeneFeature._DIRECTION_STRINGS[direction]
+        except (KeyError, TypeError):
             raise TypeError(f'Invalid direction {direction}')
-        self.direction = direction
 
-        self.length = stop - start + 1
+        self.contig = _intern(contig)
 
-    def __eq__(self, other):
+    @property
+    def length(self) -> int:
+        return self.stop - self.start + 1
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self._FIELDS}
 
+    def __setstate__(self, state):
+        """
+        Restores a pickled feature
+        Features pickled before they were slot based stored a __dict__ (including their length)
+        :param state: {attribute: value} or (__dict__, {slot: value})
+        """
+        if isinstance(state, tuple):
+            dictState, slotState = state
+            state = dict(dictState or ())
+            state.update(slotState or ())
+        for name in self._FIELDS:
+            setattr(self, name, state.get(name, self._DEFAULTS.get(name)))
+        self.direction = GeneFeature._DIRECTION_STRINGS.get(self.direction, self.direction)
+        self.contig = _intern(self.contig)
+
+    @property
+    def key(self) -> Tuple[str, str, int]:
+        """
+        Identifies the gene the feature is a call of - calls of the same gene share their contig, direction and
+        stop (+) / start (-)
+        :return: (contig, direction, stop / start)
+        """
+        return self.contig, self.direction, self.stop if self.direction == '+' else self.start
+
+    def __eq__(self, other):
+        """
+        Checks if features can possibly represent the same gene (see key)
+        """
         if not isinstance(other, GeneFeature):
-            raise TypeError(f'== cannot be used with type: {type(other)}')
-        else:
-            if self.direction == other.direction:
-                if self.direction == '+':
-                    if self.stop == other.stop:
-                        return True
-                else:  # - direction
-                    if self.start == other.start:
-                        return True
+            return NotImplemented
+        return self.key == other.key
 
-        return False
+    def __hash__(self):
+        return hash(self.key)
 
 
 class Gene(GeneFeature):
     """
     Class for representing a potential gene encoding
     """
+    # partialStart / partialStop - the gene runs past its start / stop coordinate
+    __slots__ = ('identity', 'partialStart', 'partialStop')
+    _FIELDS = GeneFeature._FIELDS + __slots__
+    _DEFAULTS = dict(GeneFeature._DEFAULTS, identity='', partialStart=False, partialStop=False)
 
-    def __init__(self, start: str, stop: str, direction: str, identity=''):
+    def __init__(self, start: str, stop: str, direction: str, identity='', contig='', partialStart: bool = False,
+                 partialStop: bool = False):
         """
         Constructor
-        :param start:  start codon (str)
-        :param stop:   end codon (str)
+        :param start:  start codon (str) - int if already parsed
+        :param stop:   end codon (str) - int if already parsed
         :param direction: +/-
         :param identity: optional identifier
+        :param contig: name of the contig the gene is located on
+        :param partialStart: the gene runs past the start coordinate (ex: start = '<3')
+        :param partialStop: the gene runs past the stop coordinate (ex: stop = '>1200')
         """
         # check for "<3" or ">3" style starts, stops
-        if '<' in start:
-            start = start.split('<')[-1]
-            start = int(start)
-        elif '&lt;' in start:
-            start = start.split('&lt;')[-1]
-            start = int(start)
-        else:
+        if isinstance(start, str):
+            if '<' in start:
+                start = start.split('<')[-1]
+                partialStart = True
+            elif '&lt;' in start:
+                start = start.split('&lt;')[-1]
+                partialStart = True
             start = int(start)
 
-        if '>' in stop:
-            stop = stop.split('>')[-1]
-            stop = int(stop)
-        elif '&gt;' in stop:
-            stop = stop.split('&gt;')[-1]
-            stop = int(stop)
-        else:
+        if isinstance(stop, str):
+            if '>' in stop:
+                stop = stop.split('>')[-1]
+                partialStop = True
+            elif '&gt;' in stop:
+                stop = stop.split('&gt;')[-1]
+                partialStop = True
             stop = int(stop)
 
-        self.identity = identity
+        self.identity = _intern(identity)
+        self.partialStart = partialStart
+        self.partialStop = partialStop
 
-        super(Gene, self).__init__(start, stop, direction)
+        super(Gene, self).__init__(start, stop, direction, contig)
 
     def jsonDump(self):
 
@@ -445,7 +519,8 @@ class Gene(GeneFeature):
                 'stop': self.stop,
                 'direction': self.direction,
                 'length': self.length,
-                'identity': self.identity}
+                'identity': self.identity,
+                'contig': self.contig}
 
         return data
 
@@ -488,12 +563,15 @@ class Gene(GeneFeature):
 
 
 class TRNA(GeneFeature):
+    __slots__ = ('type', 'identity')
+    _FIELDS = GeneFeature._FIELDS + __slots__
+    _DEFAULTS = dict(GeneFeature._DEFAULTS, type='', identity=None)
 
-    def __init__(self, start, stop, direction, trna_type, identity=None):
-        super(TRNA, self).__init__(start, stop, direction)
+    def __init__(self, start, stop, direction, trna_type, identity=None, contig=''):
+        super(TRNA, self).__init__(start, stop, direction, contig)
 
-        self.type = trna_type
-        self.identity = identity
+        self.type = _intern(trna_type)
+        self.identity = _intern(identity)
 
     def __repr__(self):
         return f'TRNA(start={self.start}, stop={self.stop}, direction={self.direction}, type={self.type}'
@@ -541,35 +619,11 @@ class GeneUtils:
             * Ex: lambda x: x <= 10
         :return: List[List[Gene]] in order of stop/starts
         """
-        filteredGenes = []
-        sortedGenes = GeneUtils.sortGenes(genes)
-
-        # group the genes according to their stops/starts
-        # discard groups with less than <limit> items
-        currentGroup = [sortedGenes[0]]
-        previousGene = sortedGenes[0]
-        for gene in sortedGenes[1:]:
-            # if the current gene is the same as the previous, add to the same group
-            if gene == previousGene:
-                currentGroup.append(gene)
-
-            # different genes, create a new group
-            else:
-                # if comparison is satisfactory, add to genes to be returned
-                # else, they're dropped
-                if comparisonFunc(len(currentGroup)):
-                    filteredGenes.append(currentGroup)
+        # imported here - Consensus builds on the parsers of this module
+        from phagecommander.Utilities.Consensus import Consensus
 
-                # new group of genes
-                currentGroup = [gene]
-
-            previousGene = gene
-
-        # add last group if sufficient
-        if comparisonFunc(len(currentGroup)):
-            filteredGenes.append(currentGroup)
-
-        return filteredGenes
+        consensus = Consensus.fromGenes(genes)
+        return consensus.groups(consensus.select(comparisonFunc))
 
     @staticmethod
     def genbankToFile(sequence: str, genes: List[Gene], fileName: str):
@@ -579,41 +633,20 @@ class GeneUtils:
         :param genes: list of Genes
         :param fileName: name of the file to write to
         """
-        # create sequence from sequence string
-        seq = Bio.Seq.Seq(sequence, IUPAC.unambiguous_dna)
-
-        # sort genes from smallest to largest starts
-        genes = GeneUtils.sortGenes(genes)
-
-        # build features
-        features = []
-        for ind, gene in enumerate(genes):
-            ind += 1
-            direction = 1 if gene.direction == '+' else -1
-            geneFeature = Bio.SeqFeature.SeqFeature(Bio.SeqFeature.FeatureLocation(gene.start - 1, gene.stop),
-                                                    type='gene',
-                                                    qualifiers={'gene': ind},
-                                                    strand=direction)
-            if isinstance(gene, Gene):
-                cdsFeature = Bio.SeqFeature.SeqFeature(Bio.SeqFeature.FeatureLocation(gene.start - 1, gene.stop),
-                                                       type='CDS',
-                                                       qualifiers={'gene': ind},
-                                                       strand=direction)
-            elif isinstance(gene, TRNA):
-                product = gene.type.split('(')[0]
-                cdsFeature = Bio.SeqFeature.SeqFeature(Bio.SeqFeature.FeatureLocation(gene.start - 1, gene.stop),
-                                                       type='TRNA',
-                                                       qualifiers={'gene': ind,
-                                                                   'note': gene.type,
-                                                                   'product': product},
-                                                       strand=direction)
-            features.append(geneFeature)
-            features.append(cdsFeature)
-
-        # create genbank file from genes and write to file
-        gbRecord = Bio.SeqRecord.SeqRecord(seq, features=features,
-                                           name=os.path.split(fileName)[1].split('.')[0])
-        SeqIO.write([gbRecord], fileName, 'genbank')
+        GeneUtils.genbankContigsToFile([(os.path.split(fileName)[1].split('.')[0], sequence, genes)], fileName)
+
+    @staticmethod
+    def genbankContigsToFile(contigs: Iterable[Tuple[str, str, List[Gene]]], fileName: str):
+        """
+        Writes one genbank record per contig to a single file
+        :param contigs: (contig name, DNA sequence, List[Gene]) in file order - each record is written as it is
+            read, so a generator keeps a single contig's genes in memory
+        :param fileName: name of the file to write to
+        """
+        # imported here - the writer builds on the Gene classes of this module
+        from phagecommander.Utilities.GenbankWriter import writeGenbank
+
+        writeGenbank(fileName, contigs)
 
     @staticmethod
     def findMostGeneOccurrences(genes: List[Gene]) -> Gene:
@@ -627,37 +660,27 @@ class GeneUtils:
                 - Error is thrown if all the Genes are not the same
         :return: Gene
         """
-        # dictionary: repr(Gene): [<Gene>, occurrences]
-        geneOccurrences = dict()
-        # calculate frequencies of each gene
-        currGene = genes[0]
-        for gene in genes:
-            # check if not the same gene, if so, throw error
-            if gene != currGene:
-                raise ValueError('{} does not match {}'.format(repr(gene), repr(currGene)))
-            currGene = gene
-
-            geneStr = repr(gene)
-            if geneStr in geneOccurrences:
-                geneOccurrences[geneStr][1] += 1
-            else:
-                geneOccurrences[geneStr] = [gene, 1]
+        from phagecommander.Utilities.Consensus import Consensus
+
+        consensus = Consensus.fromGenes(genes)
+        # check if not the same gene, if so, throw error
+        if len(consensus) > 1:
+            mismatch = consensus.groupFeatures(1)[0]
+            raise ValueError('{} does not match {}'.format(repr(mismatch), repr(consensus.groupFeatures(0)[0])))
+
+        return consensus.representatives()[0]
 
-        # sort genes according to frequency
-        # maxGenes = List of [<Gene>, frequency]
-        maxGenes = sorted(geneOccurrences.values(), key=lambda x: x[1], reverse=True)
 
-        maxFrequencyGene = maxGenes[0]
-        if len(maxGenes) > 1:
-            # check if more than one gene share the same max frequency
-            for gene in maxGenes[1:]:
-                # if the gene has the same frequency as the maximum, pick the longest one
-                if gene[1] == maxFrequencyGene[1]:
-                    # see if current gene is longer than the current max
-                    if gene[0].length > maxFrequencyGene[0].length:
-                        maxFrequencyGene = gene
+# tool output patterns - each matches one gene line and captures its coordinates, strand and partial ends
+# partial ends are marked by a prefix on the coordinate (ex: '<3', '>1200', '&lt;3' in HTML output)
+# GLIMMER: orf00001      104      487  +2     9.61
+_GLIMMER_ROW = re.compile(r'\s*\S+\s+(\d+)\s+(\d+)\s+([+-])')
+# GeneMark (DNA Master, LST and S2): 1   +   <3   1055   1053   1
+_GENEMARK_ROW = re.compile(r'\s*\d+\s+([+-])\s+([^\d\s]*)(\d+)\s+([^\d\s]*)(\d+)')
+# Prodigal: CDS   complement(<1..>200)
+_PRODIGAL_CDS = re.compile(r'\s*CDS\s+(complement\()?(<?)(\d+)\.\.(>?)(\d+)')
 
-        return maxFrequencyGene[0]
+_GENEMARK_HEADER = 'Gene    Strand    LeftEnd    RightEnd       Gene     Class'
 
 
 class GeneParse:
@@ -674,22 +697,34 @@ class GeneParse:
         :param identity: optional identifier for each gene
         :return: list of Genes in numerical order
         """
-        # split text into lines - skipping first line
-        data = glimmer_data.splitlines()[1:]
-
-        # Get Gene data
-        genes = []
-        for line in data:
-            if 'html' not in line:
-                data = [x for x in line.split(' ') if x != '']
-                # get gene direction and create Gene
-                if '+' in data[3]:
-                    genes.append(Gene(data[1], data[2], '+', identity=identity))
-                else:
-                    genes.append(Gene(data[2], data[1], '-', identity=identity))
+        return list(GeneParse.iter_glimmer(glimmer_data, identity))
 
-        # return list of Genes
-        return genes
+    @staticmethod
+    def iter_glimmer(glimmer_data, identity='', factory=None):
+        """
+        Parses glimmer output as it is read
+        :param glimmer_data: glimmer output - str, RawOutput, file object or iterable of lines
+        :param identity: optional identifier for each gene
+        :param factory: called with (start, stop, direction, identity, contig, partialStart, partialStop) to
+            build each gene - Gene by default
+        :return: generator of Genes in numerical order
+        """
+        lines = Spool.iterLines(glimmer_data)
+        # skip first line
+        next(lines, None)
+
+        # Get Gene data - lines which are not genes (HTML tags) do not match
+        factory = factory or Gene
+        match = _GLIMMER_ROW.match
+        for line in lines:
+            row = match(line)
+            if row is not None:
+                first, second, direction = row.groups()
+                # glimmer lists genes from their start codon - the right end comes first for - strand genes
+                if direction == '+':
+                    yield factory(int(first), int(second), '+', identity, '', False, False)
+                else:
+                    yield factory(int(second), int(first), '-', identity, '', False, False)
 
     @staticmethod
     def parse_genemark(gm_data, identity=''):
@@ -699,35 +734,29 @@ class GeneParse:
         :param identity: optional identifier for each Gene
         :return: list of Genes in file order
         """
-        gm_data = gm_data.splitlines()
+        return list(GeneParse.iter_genemark(gm_data, identity))
 
-        # skip until Region of Interests section
-        index = 0
-        for ind, line in enumerate(gm_data):
-            if '   Gene    Strand    LeftEnd    RightEnd       Gene     Class' in line:
-                index = ind
-                break
+    @staticmethod
+    def iter_genemark(gm_data, identity='', factory=None):
+        """
+        Parses GeneMark output as it is read
+        :param gm_data: GeneMark output - str, RawOutput, file object or iterable of lines
+        :param identity: optional identifier for each Gene
+        :param factory: called with (start, stop, direction, identity, contig, partialStart, partialStop) to
+            build each gene - Gene by default
+        :return: generator of Genes in file order
+        """
+        lines = Spool.iterLines(gm_data)
 
-        # invalid file format
-        if index == len(gm_data) - 1:
+        # skip until Region of Interests section
+        if not GeneParse._skipToHeader(lines, '   ' + _GENEMARK_HEADER):
+            raise GeneError('Invalid Genemark file format')
+        # skip line after header
+        if next(lines, None) is None:
             raise GeneError('Invalid Genemark file format')
 
-        # go to first gene
-        gm_data = gm_data[index + 2:]
-
-        # Get gene data
-        genes = []
-        for line in gm_data:
-            if line != '':
-                data = [x for x in line.strip().split(' ') if x != '']
-                start = data[2]
-                stop = data[3]
-                direction = data[1]
-                genes.append(Gene(start, stop, direction, identity=identity))
-            else:
-                break
-
-        return genes
+        # Get gene data - genes end at the first empty line
+        yield from GeneParse._iterGenemarkRows(lines, identity, factory, stopAtEmpty=True)
 
     @staticmethod
     def parse_genemarkS(gms_data, identity=''):
@@ -737,35 +766,30 @@ class GeneParse:
         :param identity: optional identifier for each Gene
         :return: list of Genes in file order
         """
-        gms_data = gms_data.splitlines()
+        return list(GeneParse.iter_genemarkS(gms_data, identity))
+
+    @staticmethod
+    def iter_genemarkS(gms_data, identity='', factory=None):
+        """
+        Parses GeneMarkS output as it is read
+        :param gms_data: GeneMarkS output - str, RawOutput, file object or iterable of lines
+        :param identity: optional identifier for each Gene
+        :param factory: called with (start, stop, direction, identity, contig, partialStart, partialStop) to
+            build each gene - Gene by default
+        :return: generator of Genes in file order
+        """
+        lines = Spool.iterLines(gms_data)
 
-        # begin parse
-        current_line = gms_data[0]
         # Check if proper GeneMark file
-        try:
-            if 'GeneMark.hmm' not in current_line:
-                raise GeneError("GMS: Not a valid GeneMark GMS file")
-        except GeneError:
-            raise
+        if 'GeneMark.hmm' not in next(lines, ''):
+            raise GeneError("GMS: Not a valid GeneMark GMS file")
 
         # skip through until gene data
-        index = 0
-        for ind, current_line in enumerate(gms_data[1:]):
-            if 'Gene    Strand    LeftEnd    RightEnd       Gene     Class' in current_line:
-                index = ind
-                break
+        if GeneParse._skipToHeader(lines, _GENEMARK_HEADER):
+            next(lines, None)
 
-        gms_data = gms_data[index + 3:]
-
-        # array for gene objs
-        genes = []
         # get gene data
-        for current_line in gms_data:
-            if current_line != '':
-                data = [x for x in current_line.strip().split(' ') if x != '']
-                genes.append(Gene(data[2], data[3], data[1], identity=identity))
-
-        return genes
+        yield from GeneParse._iterGenemarkRows(lines, identity, factory)
 
     @staticmethod
     def parse_genemarkHmm(hmm_data, identity=''):
@@ -775,48 +799,30 @@ class GeneParse:
         :param identity: optional identifier for each Gene
         :return: list of Genes in file order
         """
-        hmm_data = hmm_data.splitlines()
+        return list(GeneParse.iter_genemarkHmm(hmm_data, identity))
+
+    @staticmethod
+    def iter_genemarkHmm(hmm_data, identity='', factory=None):
+        """
+        Parses GeneMark Hmm output as it is read
+        :param hmm_data: GeneMark Hmm output - str, RawOutput, file object or iterable of lines
+        :param identity: optional identifier for each Gene
+        :param factory: called with (start, stop, direction, identity, contig, partialStart, partialStop) to
+            build each gene - Gene by default
+        :return: generator of Genes in file order
+        """
+        lines = Spool.iterLines(hmm_data)
 
-        # begin parse
-        current_line = hmm_data[0]
         # Check if proper GeneMark file
-        try:
-            if 'GeneMark.hmm' not in current_line:
-                raise GeneError("Hmm: Not a valid GeneMark Hmm file")
-        except GeneError:
-            raise
+        if 'GeneMark.hmm' not in next(lines, ''):
+            raise GeneError("Hmm: Not a valid GeneMark Hmm file")
 
         # skip through until gene data
-        # while ('Gene    Strand    LeftEnd    RightEnd       Gene     Class' not in current_line):
-        #     current_line = file.readline()
-        # current_line = file.readline()  # read blank line
-        index = 0
-        for ind, current_line in enumerate(hmm_data[1:]):
-            if 'Gene    Strand    LeftEnd    RightEnd       Gene     Class' in current_line:
-                index = ind
-                break
-        hmm_data = hmm_data[index + 3:]
+        if GeneParse._skipToHeader(lines, _GENEMARK_HEADER):
+            next(lines, None)
 
-        # array for gene objs
-        genes = []
         # get gene data
-        for current_line in hmm_data:
-            if current_line != '':
-                data = [x for x in current_line.strip().split(' ') if x != '']
-                # check for weird characters with gene sequence ends (Ex: start = '<2')
-                nonNumChars = False
-                for ind, char in enumerate(data[2]):
-                    if not char.isnumeric():
-                        nonNumChars = True
-                    elif char.isnumeric():
-                        if not nonNumChars:
-                            break
-                        else:
-                            data[2] = data[2][ind:]
-
-                genes.append(Gene(data[2], data[3], data[1], identity=identity))
-
-        return genes
+        yield from GeneParse._iterGenemarkRows(lines, identity, factory)
 
     @staticmethod
     def parse_genemarkHeuristic(heuristic_data, identity=''):
@@ -826,34 +832,30 @@ class GeneParse:
         :param identity: optional identifier for each Gene
         :return: list of Genes in order
         """
-        heuristic_data = heuristic_data.splitlines()
-        # begin parse
-        current_line = heuristic_data[0]
+        return list(GeneParse.iter_genemarkHeuristic(heuristic_data, identity))
+
+    @staticmethod
+    def iter_genemarkHeuristic(heuristic_data, identity='', factory=None):
+        """
+        Parses GeneMark Heuristic output as it is read
+        :param heuristic_data: GeneMark Heuristic output - str, RawOutput, file object or iterable of lines
+        :param identity: optional identifier for each Gene
+        :param factory: called with (start, stop, direction, identity, contig, partialStart, partialStop) to
+            build each gene - Gene by default
+        :return: generator of Genes in order
+        """
+        lines = Spool.iterLines(heuristic_data)
+
         # Check if proper GeneMark file
-        try:
-            if 'GeneMark.hmm' not in current_line:
-                raise GeneError("Hmm: Not a valid GeneMark Hmm file")
-        except GeneError:
-            raise
+        if 'GeneMark.hmm' not in next(lines, ''):
+            raise GeneError("Hmm: Not a valid GeneMark Hmm file")
 
         # skip through until gene data
-        index = 0
-        for ind, current_line in enumerate(heuristic_data[1:]):
-            if 'Gene    Strand    LeftEnd    RightEnd       Gene     Class' in current_line:
-                index = ind
-                break
+        if GeneParse._skipToHeader(lines, _GENEMARK_HEADER):
+            next(lines, None)
 
-        heuristic_data = heuristic_data[index + 3:]
-
-        # arary for gene objs
-        genes = []
         # get gene data
-        for current_line in heuristic_data:
-            if current_line != '':
-                data = [x for x in current_line.strip().split(' ') if x != '']
-                genes.append(Gene(data[2], data[3], data[1], identity=identity))
-
-        return genes
+        yield from GeneParse._iterGenemarkRows(lines, identity, factory)
 
     @staticmethod
     def parse_genemarkS2(gms2_data, identity=''):
@@ -863,31 +865,25 @@ class GeneParse:
         :param identity: optional identifier for each Gene
         :return: list of Genes in file order
         """
-        gms2_data = gms2_data.splitlines()
+        return list(GeneParse.iter_genemarkS2(gms2_data, identity))
+
+    @staticmethod
+    def iter_genemarkS2(gms2_data, identity='', factory=None):
+        """
+        Parses GeneMark S2 output as it is read
+        :param gms2_data: GeneMark S2 output - str, RawOutput, file object or iterable of lines
+        :param identity: optional identifier for each Gene
+        :param factory: called with (start, stop, direction, identity, contig, partialStart, partialStop) to
+            build each gene - Gene by default
+        :return: generator of Genes in file order
+        """
+        lines = Spool.iterLines(gms2_data)
 
         # skip until gene data
-        # curr_line = file.readline()
-        # while ('SequenceID' not in curr_line):
-        #     curr_line = file.readline()
-
-        index = 0
-        for ind, line in enumerate(gms2_data):
-            if 'SequenceID' in line:
-                index = ind
-                break
-        gms2_data = gms2_data[index + 1:]
-
-        # Get gene data
-        genes = []
-        for curr_line in gms2_data:
-            if curr_line != '':
-                data = [x for x in curr_line.strip().split(' ') if x != '']
-                genes.append(Gene(data[2], data[3], data[1], identity=identity))
-            # stop at newline after genes
-            else:
-                break
+        GeneParse._skipToHeader(lines, 'SequenceID')
 
-        return genes
+        # Get gene data - stop at newline after genes
+        yield from GeneParse._iterGenemarkRows(lines, identity, factory, stopAtEmpty=True)
 
     @staticmethod
     def parse_prodigal(prodigal_data, identity=''):
@@ -897,27 +893,33 @@ class GeneParse:
         :param identity: optional identifier for Gene
         :return: list of Genes in file order
         """
-        prodigal_data = prodigal_data.splitlines()
+        return list(GeneParse.iter_prodigal(prodigal_data, identity))
 
+    @staticmethod
+    def iter_prodigal(prodigal_data, identity='', factory=None):
+        """
+        Parses prodigal output as it is read
+        :param prodigal_data: prodigal output - str, RawOutput, file object or iterable of lines
+        :param identity: optional identifier for Gene
+        :param factory: called with (start, stop, direction, identity, contig, partialStart, partialStop) to
+            build each gene - Gene by default
+        :return: generator of Genes in file order
+        """
+        lines = Spool.iterLines(prodigal_data)
         # gene info starts on third line
-        genes = []
-        for index, line in enumerate(prodigal_data):
-            if index >= 2:
-                if 'CDS' in line:
-                    gene_str = line.strip().split('CDS')[-1].strip()
-                    direction = '+'
-                    if 'complement' in gene_str:
-                        direction = '-'
-                        # remove 'complement'
-                        gene_str = gene_str[len('complement'):]
-                        # remove ()
-                        gene_str = gene_str[1:-1]
-                    start, end = gene_str.split('..')
-                    # start, end = [int(x) for x in gene_str.split('.') if x.isnumeric()]
-                    # create gene
-                    genes.append(Gene(start, end, direction, identity=identity))
-
-        return genes
+        next(lines, None)
+        next(lines, None)
+
+        factory = factory or Gene
+        match = _PRODIGAL_CDS.match
+        for line in lines:
+            # most lines are qualifiers - only match feature lines
+            if 'CDS' in line:
+                cds = match(line)
+                if cds is not None:
+                    complement, partialStart, start, partialStop, stop = cds.groups()
+                    yield factory(int(start), int(stop), '-' if complement else '+', identity, '',
+                                  bool(partialStart), bool(partialStop))
 
     @staticmethod
     def parse_rast(rast_data, identity=''):
@@ -927,17 +929,59 @@ class GeneParse:
         :param identity: optional identity for genes
         :return: List[Gene]
         """
+        return list(GeneParse.iter_rast(rast_data, identity))
+
+    @staticmethod
+    def iter_rast(rast_data, identity='', factory=None):
+        """
+        Parses gff3 formatted data as it is read
+        :param rast_data: gff3 formatted gene annotations - str, RawOutput, file object or iterable of lines
+        :param identity: optional identity for genes
+        :param factory: called with (start, stop, direction, identity, contig, partialStart, partialStop) to
+            build each gene - Gene by default
+        :return: generator of Genes
+        """
+        factory = factory or Gene
         # find non comment lines
-        genes = []
-        for line in rast_data.splitlines():
+        for line in Spool.iterLines(rast_data):
             if 'CDS' in line:
                 data = line.split('\t')
                 start = data[3]
                 stop = data[4]
                 direction = data[6]
-                genes.append(Gene(start, stop, direction, identity))
+                yield factory(int(start), int(stop), direction, identity, '', False, False)
 
-        return genes
+    @staticmethod
+    def _iterGenemarkRows(lines, identity: str, factory=None, stopAtEmpty: bool = False):
+        """
+        Parses the gene table of GeneMark output - lines which are not gene rows are skipped
+        :param lines: iterator of lines positioned after the table header
+        :param factory: builds each gene (see iter_genemark)
+        :param stopAtEmpty: stop at the first empty line
+        :return: generator of Genes
+        """
+        factory = factory or Gene
+        match = _GENEMARK_ROW.match
+        for line in lines:
+            if not line:
+                if stopAtEmpty:
+                    return
+                continue
+            row = match(line)
+            if row is not None:
+                direction, startPrefix, start, stopPrefix, stop = row.groups()
+                yield factory(int(start), int(stop), direction, identity, '', bool(startPrefix), bool(stopPrefix))
+
+    @staticmethod
+    def _skipToHeader(lines, header: str) -> bool:
+        """
+        Advances the line iterator past the first line containing the header
+        :return: True if the header was found
+        """
+        for line in lines:
+            if header in line:
+                return True
+        return False
 
     @staticmethod
     def parse_metagene(metagene_data: str, identity: str = ''):
@@ -947,7 +991,7 @@ class GeneParse:
         :param identity: optional identity for gene
         :return: List[Gene]
         """
-        return MetagenePy.Metagene.parse(metagene_data, identity)
+        return MetagenePy.Metagene.parse(Spool.text(metagene_data), identity)
 
     @staticmethod
     def parse_aragorn(aragorn_data: str, identity: str = ''):
@@ -957,7 +1001,7 @@ class GeneParse:
         :param identity:
         :return: List[TRNA]
         """
-        return Aragorn.aragorn_parse(aragorn_data, id=identity)
+        return Aragorn.aragorn_parse(Spool.text(aragorn_data), id=identity)
 
 
 def write_gene(gene, row, ws, indexes):
@@ -0,0 +1,144 @@
+from typing import Dict, List, Sequence, Tuple
+from PyQt5.QtGui import *
+from PyQt5.QtCore import *
+from phagecommander.Utilities.Palette import TablePalette
+from phagecommander.Utilities.TableLayout import TableLayout
+
+
+def paletteBrushes(palette: TablePalette) -> List[Tuple[QBrush, QBrush]]:
+    """
+    :return: (cell brush, text brush) of each call count of the palette
+    """
+    return [(QBrush(QColor(*cellColor)), QBrush(QColor(*textColor)))
+            for cellColor, textColor in zip(palette.cellColors, palette.textColors)]
+
+
+class GeneTableModel(QAbstractTableModel):
+    """
+    Class for displaying consensus genes in a QTableView - one row per gene
+    Cell text and colors are computed in data(), so only the rows the view draws are ever built
+
+    Rows come from a Consensus or IncrementalConsensus (len(), count(row) and groupFeatures(row))
+    Columns are laid out by a TableLayout
+    """
+
+    def __init__(self, parent=None):
+        super(GeneTableModel, self).__init__(parent)
+
+        # VARIABLES -----------------------------------------------------------------
+        self.layout = TableLayout()
+        self.tools = self.layout.tools
+        self.headers = self.layout.headers
+        self.consensus = None
+        # (cell, text) brush of each call count - index 0 is one call, shared with other tables
+        self.brushes = []
+        # cell text of the rows built so far
+        self._rowCache: Dict[int, List[str]] = dict()
+        self._rowCount = 0
+
+    def reset(self, tools: Sequence[str], multiContig: bool, consensus=None,
+              brushes: Sequence[Tuple[QBrush, QBrush]] = ()):
+        """
+        Displays new genes
+        :param tools: tools shown in the table
+        :param multiContig: whether the contig column is shown
+        :param consensus: Consensus / IncrementalConsensus - None for an empty table
+        :param brushes: (cell brush, text brush) of each call count (see paletteBrushes)
+        """
+        self.beginResetModel()
+        self.layout = TableLayout(tools, multiContig)
+        self.tools = self.layout.tools
+        self.headers = self.layout.headers
+        self.consensus = consensus
+        self.brushes = brushes
+
+        self._rowCache = dict()
+        self._rowCount = len(consensus) if consensus is not None else 0
+        self.endResetModel()
+
+    def setBrushes(self, brushes: Sequence[Tuple[QBrush, QBrush]]):
+        """
+        Restyles every row - the genes and cell text are untouched, views redraw their visible rows
+        :param brushes: (cell brush, text brush) of each call count (see paletteBrushes)
+        """
+        self.brushes = brushes
+        if self._rowCount != 0 and len(self.headers) != 0:
+            self.dataChanged.emit(self.index(0, 0), self.index(self._rowCount - 1, len(self.headers) - 1),
+                                  [Qt.BackgroundRole, Qt.ForegroundRole])
+
+    def merge(self, features: list):
+        """
+        Adds calls to the IncrementalConsensus of the table - rows of new genes are inserted and rows of genes
+        which gained calls are redrawn, the rest of the table is untouched
+        :param features: Genes of the table's tools
+        """
+        inserted, changed = self.consensus.merge(features)
+        # cached rows below an inserted row have moved
+        if inserted:
+            self._rowCache = dict()
+        else:
+            for row in changed:
+                self._rowCache.pop(row, None)
+
+        # inserted rows are at their final positions - insert runs of consecutive rows in order
+        runStart = 0
+        for position in range(1, len(inserted) + 1):
+            if position == len(inserted) or inserted[position] != inserted[position - 1] + 1:
+                self.beginInsertRows(QModelIndex(), inserted[runStart], inserted[position - 1])
+                self._rowCount += position - runStart
+                self.endInsertRows()
+                runStart = position
+
+        lastColumn = len(self.headers) - 1
+        for row in changed:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, lastColumn))
+
+    # ROWS ----
+    def rowCells(self, row: int) -> List[str]:
+        """
+        :return: text of each cell of the row
+        """
+        cells = self._rowCache.get(row)
+        if cells is None:
+            cells = self.layout.rowCells(self.consensus.groupFeatures(row), self.consensus.count(row))
+            self._rowCache[row] = cells
+        return cells
+
+    def callCount(self, row: int) -> int:
+        """
+        :return: amount of calls of the row's gene
+        """
+        return self.consensus.count(row)
+
+    def rowColors(self, row: int) -> Tuple[QBrush, QBrush]:
+        """
+        :return: (cell, text) brush of the row
+        """
+        return self.brushes[self.consensus.count(row) - 1]
+
+    # MODEL METHODS ----
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._rowCount
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return self.rowCells(index.row())[index.column()]
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        if role == Qt.BackgroundRole:
+            return self.rowColors(index.row())[0]
+        if role == Qt.ForegroundRole:
+            return self.rowColors(index.row())[1]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.headers[section] if section < len(self.headers) else None
+        return section + 1
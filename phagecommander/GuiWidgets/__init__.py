@@ -1,3 +1,4 @@
 from phagecommander.GuiWidgets.exportDialogue import exportDialog
 from phagecommander.GuiWidgets.ProdigalDialogue import ProdigalDownloadDialog
 from phagecommander.GuiWidgets.RastJobDialogue import RastJobDialog
+from phagecommander.GuiWidgets.GeneTableModel import GeneTableModel, paletteBrushes
@@ -1,20 +1,25 @@
-import ast
+import html
+import re
 from pathlib import Path
 from typing import List
 
-from bs4 import BeautifulSoup
 from phagecommander import Gene
-import requests
-
-URL = 'http://130.235.244.92/bcgi/aragorn.cgi'
+from phagecommander.Utilities import Fasta, Transport, Endpoints
 
 TYPES = {'tRNA', 'tmRNA', 'both'}
 SEQ_TOPOS = {'linear', 'circular'}
 STRAND_TYPE = {'single', 'both'}
 
+# results section of the output page
+_PRE = re.compile(r'<pre[^>]*>(.*?)</pre>', re.DOTALL | re.IGNORECASE)
+_TAG = re.compile(r'<[^>]+>')
+# tab-delimited result row: 1 tRNA-Met c[1234,1310]<tab>35<tab>(cat)
+_TRNA_ROW = re.compile(r'^[^\S\n]*\S+[^\S\n]+(\S*tRNA\S*)[^\S\n]+(c?)\[\s*(-?\d+)\s*,\s*(-?\d+)\s*\][^\t\n]*'
+                       r'\t[^\t\n]*\t([^\t\n]*)', re.MULTILINE)
+
 
 def aragorn_query(file_path: str, rna_type: str = 'tRNA', use_introns: bool = False, seq_topology: str = 'linear',
-                  strand: str = 'both') -> List['Gene.TRNA']:
+                  strand: str = 'both', file_data: bytes = None) -> List['Gene.TRNA']:
     """
     Calls Aragorn to analyze TRNA sequences in the DNA sequence
     :param file_path: fasta file path
@@ -22,6 +27,7 @@ def aragorn_query(file_path: str, rna_type: str = 'tRNA', use_introns: bool = Fa
     :param use_introns:
     :param seq_topology: {'linear', 'circular'}
     :param strand: {'single', 'both'}
+    :param file_data: content of the fasta file if already loaded
     :return: List[TRNA]
     """
     # check for valid parameters
@@ -37,8 +43,9 @@ def aragorn_query(file_path: str, rna_type: str = 'tRNA', use_introns: bool = Fa
         raise TypeError(f'{seq_topology} is not a valid sequence topology {SEQ_TOPOS}')
 
     file_path = Path(file_path)
-    with open(file_path, 'r') as file:
-        file_data = file.read()
+    if file_data is None:
+        with Fasta.FastaFile(file_path) as fasta:
+            file_data = fasta.read()
 
     file_info = {'upload': (file_path.stem, file_data, 'application/octet-stream')}
 
@@ -52,35 +59,27 @@ def aragorn_query(file_path: str, rna_type: str = 'tRNA', use_introns: bool = Fa
         'submit': 'Submit'
     }
 
-    file_post = requests.post(URL, data=form_data, files=file_info)
+    file_post = Transport.post(Endpoints.url(Endpoints.ARAGORN), data=form_data, files=file_info)
     file_post.raise_for_status()
 
     return file_post.content
 
 
 def aragorn_parse(aragorn_data: str, id=None):
-    soup = BeautifulSoup(aragorn_data, 'html.parser')
-    trnas = soup.find('pre')
+    match = _PRE.search(aragorn_data)
+    if match is None:
+        raise Gene.GeneError('Invalid Aragorn output - no results section')
+    # text of the results section (as displayed)
+    trnas = html.unescape(_TAG.sub('', match.group(1)))
 
     genes: List['Gene.TRNA'] = []
-    lines = trnas.text.split('\n')
+    lines = trnas.split('\n', 3)
     # total found on third line
     result_line = lines[2].split(' ')
-    if int(result_line[0]) != 0:
-        for line in lines[3:]:
-            if 'tRNA' in line:
-                line = line.split('\t')
-                seq_data = line[0].split()
-                rna = line[2]
-                seq_type = seq_data[1] + rna
-                # check if complement
-                if seq_data[2][0] == 'c':
-                    direction = '-'
-                    start, stop = ast.literal_eval(seq_data[2][1:])
-                else:
-                    direction = '+'
-                    start, stop = ast.literal_eval(seq_data[2])
-                gene = Gene.TRNA(start, stop, direction, seq_type, identity=id)
-                genes.append(gene)
+    if int(result_line[0]) != 0 and len(lines) > 3:
+        for row in _TRNA_ROW.finditer(lines[3]):
+            seq_type, complement, start, stop, rna = row.groups()
+            gene = Gene.TRNA(int(start), int(stop), '-' if complement else '+', seq_type + rna, identity=id)
+            genes.append(gene)
 
     return genes
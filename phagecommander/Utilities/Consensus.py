@@ -0,0 +1,281 @@
+"""
+Consensus of gene calls
+Groups the calls of every tool into genes and picks each gene's most called start with a few vectorized
+passes over the coordinate arrays of a GeneTable (replacing GeneUtils' pairwise walks over Gene lists).
+* Calls are the same gene if they share contig, strand and their stop (+) / start (-) - see GeneFeature.__eq__
+* Genes are ordered by contig, then by their stop (+) / start (-) - + strand first if a + and a - strand gene
+  share the coordinate, so calls of the two never interleave
+* IncrementalConsensus keeps the same grouping and order while calls arrive one tool / contig at a time
+"""
+
+import bisect
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from phagecommander import Gene
+from phagecommander.Utilities.GeneIndex import GeneIndex, GeneKey
+from phagecommander.Utilities.GeneTable import GeneTable
+
+
+class Consensus:
+    """
+    Class for grouping gene calls into genes
+    * Groups are numbered 0 .. len(consensus) - 1 in table order
+    """
+
+    def __init__(self, table: GeneTable, features: Sequence[Gene.GeneFeature] = None):
+        """
+        :param table: calls of every tool
+        :param features: Genes the table was built from (same order) - returned by groupFeatures /
+            representatives instead of new Genes built from the table
+        """
+        self.table = table
+        self.features = features
+
+        keys = table.comparisonKeys()
+        # sorted position: row of the table - ties keep their table order
+        self.order = np.lexsort((-table.strand, keys, table.contig))
+        sortedKeys = keys[self.order]
+        sortedStrand = table.strand[self.order]
+        sortedContig = table.contig[self.order]
+
+        size = len(self.order)
+        newGroup = np.ones(size, dtype=bool)
+        newGroup[1:] = ((sortedKeys[1:] != sortedKeys[:-1]) | (sortedStrand[1:] != sortedStrand[:-1])
+                        | (sortedContig[1:] != sortedContig[:-1]))
+        # sorted position of each group's first call
+        self.groupStarts = np.flatnonzero(newGroup)
+        # group of each sorted position
+        self.groupIds = np.cumsum(newGroup) - 1
+        # calls per group
+        self.counts = np.diff(np.append(self.groupStarts, size))
+        firstRows = self.order[self.groupStarts]
+        self.groupContig = table.contig[firstRows]
+        self.groupStrand = table.strand[firstRows]
+        self.groupKey = keys[firstRows]
+
+        self._representatives = None
+
+    @classmethod
+    def fromGenes(cls, features: Iterable[Gene.GeneFeature], contigs: Sequence[str] = ()) -> 'Consensus':
+        """
+        :param features: Genes / TRNAs of any tools
+        :param contigs: contig names in file order - contigs of other features follow in order of appearance
+        """
+        features = list(features)
+        return cls(GeneTable.fromGenes(features, contigs=contigs), features)
+
+    @classmethod
+    def fromToolData(cls, toolData: Dict[str, list], toolList: Iterable[str] = None,
+                     contigs: Sequence[str] = ()) -> 'Consensus':
+        """
+        :param toolData: {tool: List[Gene]} (QueryData.toolData) - tools which returned errors are skipped
+        :param toolList: tools to include - every tool if None
+        :param contigs: contig names in file order
+        """
+        features = []
+        for tool, genes in toolData.items():
+            if (toolList is None or tool in toolList) and isinstance(genes, list):
+                features.extend(genes)
+        return cls.fromGenes(features, contigs)
+
+    def __len__(self):
+        return len(self.groupStarts)
+
+    # GROUPS ----
+    def members(self, group: int) -> np.ndarray:
+        """
+        :return: table rows of the group's calls in sorted order
+        """
+        start = self.groupStarts[group]
+        end = self.groupStarts[group + 1] if group + 1 < len(self.groupStarts) else len(self.order)
+        return self.order[start:end]
+
+    def count(self, group: int) -> int:
+        """
+        :return: amount of calls of the group
+        """
+        return int(self.counts[group])
+
+    def groupFeatures(self, group: int) -> List[Gene.GeneFeature]:
+        """
+        :return: Genes of the group in sorted order
+        """
+        return [self._feature(row) for row in self.members(group)]
+
+    def groups(self, groups: Iterable[int] = None) -> List[List[Gene.GeneFeature]]:
+        """
+        :param groups: groups to return - every group if None
+        :return: List[List[Gene]] (as GeneUtils.filterGenes)
+        """
+        if groups is None:
+            groups = range(len(self))
+        return [self.groupFeatures(group) for group in groups]
+
+    def select(self, comparisonFunc: Callable) -> np.ndarray:
+        """
+        Selects the groups whose call count satisfies the comparison
+        :param comparisonFunc: function of a call count returning a bool (ex: lambda x: x > 3) - applied to the
+            whole count array at once when it supports arrays
+        :return: selected groups in order
+        """
+        selected = comparisonFunc(self.counts)
+        if np.ndim(selected) == 0:
+            # comparison of single values only
+            selected = np.fromiter((comparisonFunc(int(count)) for count in self.counts), dtype=bool,
+                                   count=len(self.counts))
+        return np.flatnonzero(np.asarray(selected, dtype=bool))
+
+    def contigGroups(self, contig: str, groups: np.ndarray = None) -> np.ndarray:
+        """
+        :param contig: contig name
+        :param groups: groups to choose from - every group if None
+        :return: groups located on the contig in order
+        """
+        if groups is None:
+            groups = np.arange(len(self))
+        if contig not in self.table.contigs:
+            return groups[:0]
+        return groups[self.groupContig[groups] == self.table.contigs.index(contig)]
+
+    # REPRESENTATIVES ----
+    def representativeRows(self, groups: np.ndarray = None) -> np.ndarray:
+        """
+        Picks the call representing each group - the most called start / stop, then the longest call
+        (then the first call) as GeneUtils.findMostGeneOccurrences
+        :param groups: groups to pick for - every group if None
+        :return: table row of each group's representative
+        """
+        if self._representatives is None:
+            sortedStart = self.table.start[self.order]
+            sortedStop = self.table.stop[self.order]
+
+            # distinct calls (start, stop) of every group - positions of equal calls stay in order
+            variantOrder = np.lexsort((sortedStop, sortedStart, self.groupIds))
+            size = len(variantOrder)
+            newVariant = np.ones(size, dtype=bool)
+            if size > 1:
+                previous, current = variantOrder[:-1], variantOrder[1:]
+                newVariant[1:] = ((self.groupIds[current] != self.groupIds[previous])
+                                  | (sortedStart[current] != sortedStart[previous])
+                                  | (sortedStop[current] != sortedStop[previous]))
+            variantStarts = np.flatnonzero(newVariant)
+            # first sorted position of each distinct call
+            variantFirst = variantOrder[variantStarts]
+            variantCount = np.diff(np.append(variantStarts, size))
+            variantGroup = self.groupIds[variantFirst]
+            variantLength = sortedStop[variantFirst] - sortedStart[variantFirst] + 1
+
+            # per group: most calls, then longest, then first
+            best = np.lexsort((variantFirst, -variantLength, -variantCount, variantGroup))
+            firstOfGroup = np.ones(len(best), dtype=bool)
+            firstOfGroup[1:] = variantGroup[best[1:]] != variantGroup[best[:-1]]
+            self._representatives = self.order[variantFirst[best[firstOfGroup]]]
+
+        if groups is None:
+            return self._representatives
+        return self._representatives[groups]
+
+    def representatives(self, groups: np.ndarray = None) -> List[Gene.GeneFeature]:
+        """
+        :param groups: groups to pick for - every group if None
+        :return: Gene representing each group (see representativeRows)
+        """
+        return [self._feature(row) for row in self.representativeRows(groups)]
+
+    def _feature(self, row) -> Gene.GeneFeature:
+        if self.features is not None:
+            return self.features[row]
+        return self.table[int(row)]
+
+
+class IncrementalConsensus:
+    """
+    Class for building a consensus from batches of calls (ex: each finished query)
+    * Rows are the genes in Consensus order - merge() reports the rows it inserted and the rows whose calls
+      changed, so a view only redraws those rows
+    """
+
+    def __init__(self, contigs: Sequence[str] = (), tools: Sequence[str] = ()):
+        """
+        :param contigs: contig names in file order - contigs of other calls follow in order of appearance
+        :param tools: tool order of each gene's calls (as the tool order of QueryData.toolData) - other tools
+            follow in order of appearance
+        """
+        self.contigs = list(contigs)
+        self.tools = list(tools)
+        self.index = GeneIndex()
+        # sort key (contig, stop (+) / start (-), strand) of each row
+        self._rows: List[Tuple[int, int, int]] = []
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _sortKey(self, key: GeneKey) -> Tuple[int, int, int]:
+        contig, direction, coordinate = key
+        if contig not in self.contigs:
+            self.contigs.append(contig)
+        # + strand first, as Consensus
+        return self.contigs.index(contig), coordinate, 0 if direction == '+' else 1
+
+    def _key(self, row: int) -> GeneKey:
+        contig, coordinate, strand = self._rows[row]
+        return self.contigs[contig], '+' if strand == 0 else '-', coordinate
+
+    def merge(self, features: Iterable[Gene.GeneFeature]) -> Tuple[List[int], List[int]]:
+        """
+        Adds calls to the consensus
+        :param features: Genes / TRNAs
+        :return: (inserted rows, rows of existing genes which gained calls) - rows after the merge, in order
+        """
+        newKeys = set()
+        changedKeys = set()
+        for feature in features:
+            key = feature.key
+            if key not in newKeys:
+                if key in self.index:
+                    changedKeys.add(key)
+                else:
+                    newKeys.add(key)
+            if feature.identity not in self.tools:
+                self.tools.append(feature.identity)
+            self.index.add(feature)
+
+        if newKeys:
+            # both runs are sorted - merged in linear time
+            self._rows = sorted(self._rows + sorted(self._sortKey(key) for key in newKeys))
+        inserted = sorted(self.row(key) for key in newKeys)
+        changed = sorted(self.row(key) for key in changedKeys)
+        return inserted, changed
+
+    # ROWS ----
+    def row(self, gene) -> int:
+        """
+        :param gene: a call of the gene or its key
+        :return: row of the gene
+        :raises KeyError: if no call of the gene was merged
+        """
+        key = gene.key if isinstance(gene, Gene.GeneFeature) else tuple(gene)
+        if key not in self.index:
+            raise KeyError(repr(key))
+        return bisect.bisect_left(self._rows, self._sortKey(key))
+
+    def count(self, row: int) -> int:
+        """
+        :return: amount of calls of the row's gene
+        """
+        return self.index.count(self._key(row))
+
+    def groupFeatures(self, row: int) -> List[Gene.GeneFeature]:
+        """
+        :return: Genes of the row - by tool, then in order of arrival
+        """
+        calls = self.index.calls(self._key(row))
+        return [feature for tool in self.tools for feature in calls.get(tool, ())]
+
+    def groups(self) -> List[List[Gene.GeneFeature]]:
+        """
+        :return: List[List[Gene]] of every row (as Consensus.groups)
+        """
+        return [self.groupFeatures(row) for row in range(len(self))]
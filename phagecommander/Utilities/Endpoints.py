@@ -0,0 +1,84 @@
+"""
+URLs of the remote prediction servers
+Every remote query looks its URL up here, so the servers can be swapped for a local stand-in
+(see MockServer) - either per endpoint or by redirecting every endpoint to one base URL.
+The PHAGECOMMANDER_ENDPOINT_BASE environment variable sets the base URL at startup.
+"""
+
+import os
+import threading
+from typing import Dict
+from urllib.parse import urlsplit
+from phagecommander.Utilities.Tools import *
+
+# endpoint names - tools use their tool name
+GENEMARK_FILES = 'genemark_files'
+RAST_LOGIN = 'rast_login'
+
+DEFAULTS = {GENEMARK_FILES: 'http://exon.gatech.edu/GeneMark/',
+            GENEMARK: 'http://18.220.233.194/genemark',  # Server DNA master uses
+            HMM: 'http://exon.gatech.edu/GeneMark/gmhmmp.cgi',
+            GENEMARKS: 'http://exon.gatech.edu/GeneMark/genemarks.cgi',
+            HEURISTIC: 'http://exon.gatech.edu/GeneMark/heuristic_gmhmmp.cgi',
+            GENEMARKS2: 'http://exon.gatech.edu/GeneMark/genemarks2.cgi',
+            GLIMMER: 'http://18.220.233.194/glimmer',  # Server DNA master uses
+            METAGENE: 'http://metagene.nig.ac.jp/cgi-bin/mga.cgi',
+            ARAGORN: 'http://130.235.244.92/bcgi/aragorn.cgi',
+            RAST: 'https://pubseed.theseed.org/rast/server.cgi',
+            RAST_LOGIN: 'https://rast.nmpdr.org/rast.cgi'}
+
+BASE_ENVIRONMENT_VARIABLE = 'PHAGECOMMANDER_ENDPOINT_BASE'
+
+_endpoints = dict(DEFAULTS)
+_lock = threading.Lock()
+
+
+def url(name: str) -> str:
+    """
+    :param name: endpoint name (tool name, GENEMARK_FILES or RAST_LOGIN)
+    :return: current URL of the endpoint
+    """
+    with _lock:
+        return _endpoints[name]
+
+
+def endpoints() -> Dict[str, str]:
+    """
+    :return: {endpoint name: current URL}
+    """
+    with _lock:
+        return dict(_endpoints)
+
+
+def configure(base: str = None, overrides: Dict[str, str] = None):
+    """
+    Changes the endpoint URLs - endpoints not given keep their default URL
+    :param base: scheme and host (ex: http://127.0.0.1:8080) every endpoint is redirected to - the path of
+        each default URL is kept. None / '' to use the live servers
+    :param overrides: {endpoint name: URL} - applied after base
+    """
+    endpointUrls = dict(DEFAULTS)
+    if base:
+        base = base.rstrip('/')
+        for name, defaultUrl in DEFAULTS.items():
+            endpointUrls[name] = base + urlsplit(defaultUrl).path
+    if overrides:
+        unknown = set(overrides) - set(DEFAULTS)
+        if unknown:
+            raise KeyError('Unknown endpoints: {}'.format(', '.join(sorted(unknown))))
+        endpointUrls.update(overrides)
+
+    with _lock:
+        _endpoints.clear()
+        _endpoints.update(endpointUrls)
+
+
+def reset():
+    """
+    Restores every endpoint to its live server
+    """
+    configure()
+
+
+if os.environ.get(BASE_ENVIRONMENT_VARIABLE):
+    configure(base=os.environ[BASE_ENVIRONMENT_VARIABLE])
@@ -0,0 +1,119 @@
+"""
+Excel export of the gene and conflict tables
+Rows are written straight from the consensus with openpyxl's write-only mode - each row is streamed to a
+temporary file as it is added, so a large genome (or a workbook of many genomes) never holds a whole sheet
+in memory, and no GUI is needed.
+* Columns match the GUI tables (see TableLayout)
+* Every cell uses one of a few named styles - the headers and one style per call count (see TablePalette)
+"""
+
+from typing import Sequence
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, NamedStyle, PatternFill
+
+from phagecommander.Utilities.IntervalIndex import DEFAULT_MIN_GENE_OVERLAP
+from phagecommander.Utilities.Palette import TablePalette
+from phagecommander.Utilities.TableLayout import ConflictLayout, TableLayout
+from phagecommander.Utilities.Tools import GENE_TOOLS, TRNA_TOOLS
+
+HEADER_STYLE = 'Gene Table Header'
+CALLS_STYLE = 'Gene Table Calls {}'
+GENE_SHEET_LABEL = 'Genes'
+TRNA_SHEET_LABEL = 'TRNA'
+CONFLICT_SHEET_LABEL = 'Conflicts'
+# longest sheet title Excel accepts
+_MAX_TITLE_LENGTH = 31
+
+
+class ExcelExporter:
+    """
+    Class for writing gene tables to an Excel workbook - one sheet per table
+    """
+
+    def __init__(self, palette: TablePalette):
+        """
+        :param palette: colors of the rows by call count
+        """
+        self.palette = palette
+        self.workbook = Workbook(write_only=True)
+
+        # STYLES ----
+        self.workbook.add_named_style(NamedStyle(name=HEADER_STYLE, font=Font(bold=True),
+                                                 alignment=Alignment(horizontal='center')))
+        for count in range(1, len(palette) + 1):
+            self.workbook.add_named_style(
+                NamedStyle(name=CALLS_STYLE.format(count), font=Font(color=palette.textHex[count - 1]),
+                           fill=PatternFill(fgColor=palette.cellHex[count - 1], fill_type='solid'),
+                           alignment=Alignment(horizontal='center')))
+
+    def addTable(self, label: str, consensus, tools: Sequence[str], multiContig: bool = False):
+        """
+        Adds a gene table as a new sheet
+        :param label: name of the sheet
+        :param consensus: Consensus / IncrementalConsensus of the table's genes
+        :param tools: tools shown in the table
+        :param multiContig: whether the contig column is shown
+        """
+        ws = self.workbook.create_sheet(label[:_MAX_TITLE_LENGTH])
+        layout = TableLayout(tools, multiContig)
+
+        # add headers
+        ws.append([self._cell(ws, header, HEADER_STYLE) for header in layout.headers])
+
+        # add content
+        for row in range(len(consensus)):
+            count = consensus.count(row)
+            style = CALLS_STYLE.format(count)
+            # convert an integer string to an integer for spreadsheet functionality
+            ws.append([self._cell(ws, int(value) if value.isdecimal() else value, style)
+                       for value in layout.rowCells(consensus.groupFeatures(row), count)])
+
+    def addConflicts(self, label: str, conflicts, multiContig: bool = False):
+        """
+        Adds a conflict table as a new sheet
+        :param label: name of the sheet
+        :param conflicts: List[Conflict] (see QueryData.conflicts)
+        :param multiContig: whether the contig column is shown
+        """
+        ws = self.workbook.create_sheet(label[:_MAX_TITLE_LENGTH])
+        layout = ConflictLayout(multiContig)
+        ws.append([self._cell(ws, header, HEADER_STYLE) for header in layout.headers])
+        for conflict in conflicts:
+            ws.append([int(value) if value.isdecimal() else value for value in layout.rowCells(conflict)])
+
+    def addQueryData(self, queryData, prefix: str = '', minGeneOverlap: int = DEFAULT_MIN_GENE_OVERLAP):
+        """
+        Adds the gene, tRNA and conflict tables of a query (as shown in the GUI) - tables of tools which were not
+        queried (or failed) are skipped
+        :param queryData: QueryData
+        :param prefix: prepended to the sheet names (ex: the genome name of a multi genome workbook)
+        :param minGeneOverlap: minimum shared bases of two genes listed as a conflict
+        """
+        multiContig = len(queryData.contigs) > 1
+        for toolList, label in ((GENE_TOOLS, GENE_SHEET_LABEL), (TRNA_TOOLS, TRNA_SHEET_LABEL)):
+            tools = queryData.usedTools(toolList)
+            if tools:
+                self.addTable(self._title(prefix, label), queryData.consensus(tools), tools, multiContig)
+        if queryData.usedTools(GENE_TOOLS):
+            self.addConflicts(self._title(prefix, CONFLICT_SHEET_LABEL), queryData.conflicts(minGeneOverlap),
+                              multiContig)
+
+    def save(self, fileName: str):
+        """
+        Writes the workbook - the exporter can not be used afterwards
+        :param fileName: path of the .xlsx file
+        """
+        self.workbook.save(fileName)
+
+    @staticmethod
+    def _title(prefix: str, label: str) -> str:
+        # long prefixes are cut - the table label is kept
+        return '{} {}'.format(prefix[:_MAX_TITLE_LENGTH - len(label) - 1], label) if prefix else label
+
+    @staticmethod
+    def _cell(ws, value, style: str) -> WriteOnlyCell:
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        return cell
@@ -0,0 +1,313 @@
+"""
+FASTA ingestion with indexed random access
+Uncompressed files are memory-mapped, gzip files are decompressed once in bulk.
+A .fai style index (NAME LENGTH OFFSET LINEBASES LINEWIDTH) is built once per file and
+stored next to it so that any record or sub-range can be read without a full parse.
+"""
+
+import gzip
+import mmap
+import os
+from typing import Dict, Iterator, List, Tuple
+
+INDEX_EXTENSION = '.fai'
+_GZIP_MAGIC = b'\x1f\x8b'
+_NEWLINE = ord('\n')
+
+
+class FastaError(Exception):
+    """
+    Raised for malformed FASTA input
+    """
+    pass
+
+
+class FastaRecord:
+    """
+    Class for representing a single entry of a FASTA index
+    """
+
+    def __init__(self, name: str, length: int, offset: int, lineBases: int, lineWidth: int):
+        """
+        :param name: record name (first word of the header line)
+        :param length: number of bases in the record
+        :param offset: byte offset of the first base
+        :param lineBases: bases per full sequence line
+            * 0 if the record has irregular line lengths
+        :param lineWidth: bytes per full sequence line, including the line terminator
+        """
+        self.name = name
+        self.length = length
+        self.offset = offset
+        self.lineBases = lineBases
+        self.lineWidth = lineWidth
+
+    @property
+    def regular(self) -> bool:
+        """
+        :return: True if every sequence line (except the last) has the same length
+        """
+        return self.lineBases > 0 or self.length == 0
+
+    def byteOffset(self, position: int) -> int:
+        """
+        :param position: 0-based base position within the record
+        :return: byte offset of the base within the file
+        """
+        return self.offset + (position // self.lineBases) * self.lineWidth + position % self.lineBases
+
+    def toLine(self) -> str:
+        return '\t'.join(str(x) for x in [self.name, self.length, self.offset, self.lineBases, self.lineWidth])
+
+    def __repr__(self):
+        return 'FastaRecord(name={}, length={}, offset={})'.format(self.name, self.length, self.offset)
+
+
+class FastaFile:
+    """
+    Class for reading FASTA files (optionally gzip compressed) through a record index
+    """
+
+    def __init__(self, path: str, writeIndex: bool = True):
+        """
+        Opens the FASTA file and loads or builds its index
+        :param path: path of the FASTA file
+        :param writeIndex: store a newly built index next to the file if possible
+        """
+        if not os.path.isfile(path):
+            raise FileNotFoundError('\"{}\" does not exist'.format(path))
+
+        self.path = str(path)
+        self.compressed = False
+        self._mmap = None
+        self._data = b''
+
+        with open(self.path, 'rb') as file:
+            self.compressed = file.read(2) == _GZIP_MAGIC
+
+        if self.compressed:
+            with gzip.open(self.path, 'rb') as file:
+                self._data = file.read()
+        elif os.path.getsize(self.path) > 0:
+            with open(self.path, 'rb') as file:
+                self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._data = self._mmap
+
+        # ordered records and name lookup
+        self.records: List[FastaRecord] = []
+        self._index: Dict[str, FastaRecord] = dict()
+
+        indexPath = self.path + INDEX_EXTENSION
+        if not self.compressed and self._isIndexCurrent(indexPath):
+            try:
+                self._loadIndex(indexPath)
+            except (ValueError, IndexError):
+                self._buildIndex()
+        else:
+            self._buildIndex()
+            # compressed offsets refer to the decompressed stream - keep those in memory
+            # records with irregular line lengths cannot be expressed in a .fai file
+            if writeIndex and not self.compressed and all(record.regular for record in self.records):
+                self._writeIndex(indexPath)
+
+    # CONTEXT MANAGEMENT ---------------------------------------------------------------------------
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """
+        Releases the memory map / decompressed buffer
+        """
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._data = b''
+
+    # RECORD ACCESS --------------------------------------------------------------------------------
+    @property
+    def names(self) -> List[str]:
+        return [record.name for record in self.records]
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __getitem__(self, name) -> FastaRecord:
+        try:
+            return self._index[name]
+        except KeyError:
+            raise KeyError('\"{}\" is not a record of {}'.format(name, self.path)) from None
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        """
+        Iterates over the records in file order
+        :return: (name, sequence) tuples
+        """
+        for record in self.records:
+            yield record.name, self.sequence(record.name)
+
+    def read(self) -> bytes:
+        """
+        :return: the full (decompressed) content of the file
+        """
+        return bytes(self._data)
+
+    def description(self, name: str) -> str:
+        """
+        :param name: record name
+        :return: header line of the record without the leading '>'
+        """
+        record = self[name]
+        headerStart = self._headerStart(record)
+        return bytes(self._data[headerStart + 1:record.offset]).decode('utf-8').strip()
+
+    def fetch(self, name: str, start: int = 1, stop: int = None) -> str:
+        """
+        Reads a sub-range of a record
+        :param name: record name
+        :param start: first base (1-based, inclusive)
+        :param stop: last base (1-based, inclusive) - defaults to the end of the record
+        :return: sequence string
+        """
+        record = self[name]
+        if stop is None or stop > record.length:
+            stop = record.length
+        if start < 1:
+            start = 1
+        if start > stop:
+            return ''
+
+        if not record.regular:
+            return self._recordSequence(record)[start - 1:stop]
+
+        startByte = record.byteOffset(start - 1)
+        stopByte = record.byteOffset(stop - 1) + 1
+        region = bytes(self._data[startByte:stopByte])
+        # remove line terminators
+        if record.lineWidth != record.lineBases:
+            region = b''.join(region.split())
+        return region.decode('ascii')
+
+    def sequence(self, name: str) -> str:
+        """
+        :param name: record name
+        :return: the full sequence of the record
+        """
+        return self.fetch(name)
+
+    def recordBytes(self, name: str) -> bytes:
+        """
+        :param name: record name
+        :return: the record in FASTA format, exactly as stored in the file
+        """
+        record = self[name]
+        return bytes(self._data[self._headerStart(record):self._recordEnd(record)])
+
+    # INDEXING -------------------------------------------------------------------------------------
+    def _headerStart(self, record: FastaRecord) -> int:
+        """
+        :return: byte offset of the '>' starting the header line of the record
+        """
+        # the header line ends with the newline directly before the sequence block
+        return self._data.rfind(b'\n', 0, record.offset - 1) + 1
+
+    def _recordEnd(self, record: FastaRecord) -> int:
+        """
+        :return: byte offset directly after the last sequence byte of the record
+        """
+        end = self._data.find(b'\n>', record.offset - 1)
+        return len(self._data) if end == -1 else end + 1
+
+    def _recordSequence(self, record: FastaRecord) -> str:
+        region = bytes(self._data[record.offset:self._recordEnd(record)])
+        return b''.join(region.split()).decode('ascii')
+
+    def _buildIndex(self):
+        """
+        Scans the file once and records the layout of every record
+        """
+        data = self._data
+        size = len(data)
+        headerStart = 0 if size > 0 and data[0] == ord('>') else data.find(b'\n>')
+        if headerStart == -1 or size == 0:
+            raise FastaError('\"{}\" does not contain any FASTA records'.format(self.path))
+        if data[headerStart] != ord('>'):
+            headerStart += 1
+
+        while headerStart != -1:
+            headerEnd = data.find(b'\n', headerStart)
+            if headerEnd == -1:
+                headerEnd = size
+            header = bytes(data[headerStart + 1:headerEnd]).decode('utf-8').strip()
+            if header == '':
+                raise FastaError('Empty FASTA header at byte {}'.format(headerStart))
+            name = header.split()[0]
+            if name in self._index:
+                raise FastaError('Duplicate FASTA record name: {}'.format(name))
+
+            offset = min(headerEnd + 1, size)
+            nextHeader = data.find(b'\n>', offset - 1)
+            end = size if nextHeader == -1 else nextHeader + 1
+            record = self._layoutRecord(name, offset, end)
+            self.records.append(record)
+            self._index[name] = record
+
+            headerStart = -1 if nextHeader == -1 else nextHeader + 1
+
+    def _layoutRecord(self, name: str, offset: int, end: int) -> FastaRecord:
+        """
+        Determines the length and line layout of a record's sequence block
+        :param offset: first byte of the sequence block
+        :param end: byte after the sequence block
+        """
+        region = bytes(self._data[offset:end]).rstrip()
+        if len(region) == 0:
+            return FastaRecord(name, 0, offset, 0, 0)
+
+        firstLineEnd = region.find(b'\n')
+        # single line sequence
+        if firstLineEnd == -1:
+            length = len(region.rstrip(b'\r'))
+            return FastaRecord(name, length, offset, length, length + 1)
+
+        lineWidth = firstLineEnd + 1
+        lineBases = len(region[:firstLineEnd].rstrip(b'\r'))
+        newlines = region.count(b'\n')
+        # regular layout - every full line ends at a multiple of lineWidth and the last line is not longer
+        terminators = region[lineWidth - 1::lineWidth]
+        lastLine = len(region) - newlines * lineWidth
+        if terminators.count(_NEWLINE) == newlines and len(terminators) == newlines and 0 < lastLine <= lineBases:
+            length = newlines * lineBases + lastLine
+            return FastaRecord(name, length, offset, lineBases, lineWidth)
+
+        length = len(b''.join(region.split()))
+        return FastaRecord(name, length, offset, 0, 0)
+
+    def _isIndexCurrent(self, indexPath: str) -> bool:
+        return os.path.isfile(indexPath) and os.path.getmtime(indexPath) >= os.path.getmtime(self.path)
+
+    def _loadIndex(self, indexPath: str):
+        with open(indexPath, 'r') as indexFile:
+            for line in indexFile:
+                if line.strip() == '':
+                    continue
+                name, length, offset, lineBases, lineWidth = line.rstrip('\n').split('\t')[:5]
+                record = FastaRecord(name, int(length), int(offset), int(lineBases), int(lineWidth))
+                if record.offset > len(self._data):
+                    raise ValueError('Stale index: {}'.format(indexPath))
+                self.records.append(record)
+                self._index[name] = record
+
+    def _writeIndex(self, indexPath: str):
+        try:
+            with open(indexPath, 'w') as indexFile:
+                for record in self.records:
+                    indexFile.write(record.toLine() + '\n')
+        except OSError:
+            # read-only location - the in-memory index is still used
+            pass
@@ -0,0 +1,189 @@
+"""
+Streaming genbank writer
+Writes genbank records of genes straight to a file - the features as the genes are read and the ORIGIN block in
+chunks of the sequence, without building Biopython Seq / SeqFeature / SeqRecord objects first.
+Output matches Bio.SeqIO's genbank writer (Biopython 1.77) for records of a name, a DNA sequence and features:
+* gene + CDS feature per Gene, gene + TRNA feature per TRNA, numbered in order of their stop (+) / start (-)
+* no annotations - DEFINITION, KEYWORDS, SOURCE and ORGANISM are '.', ACCESSION and VERSION '<unknown id>'
+"""
+
+from typing import Iterable, List, Sequence, TextIO, Tuple
+
+from phagecommander import Gene
+
+# sequence letters formatted at once - a multiple of LETTERS_PER_LINE
+DEFAULT_CHUNK_SIZE = 60 * 4096
+
+MAX_WIDTH = 80
+HEADER_WIDTH = 12
+QUALIFIER_INDENT = 21
+QUALIFIER_INDENT_STR = ' ' * QUALIFIER_INDENT
+LETTERS_PER_LINE = 60
+SEQUENCE_INDENT = 9
+_DEFAULT_DATE = '01-JAN-1980'
+
+# header of a record without annotations
+_HEADER = ('DEFINITION  .\n'
+           'ACCESSION   <unknown id>\n'
+           'VERSION     <unknown id>\n'
+           'KEYWORDS    .\n'
+           'SOURCE      .\n'
+           '  ORGANISM  .\n'
+           '            .\n'
+           'FEATURES             Location/Qualifiers\n')
+
+
+def locusLine(name: str, length: int) -> str:
+    """
+    :param name: record name - '.' if empty
+    :param length: sequence length
+    :return: LOCUS line of a linear DNA record
+    :raises ValueError: if the name contains whitespace
+    """
+    locus = name if name else '.'
+    if len(locus.split()) > 1:
+        raise ValueError('Invalid whitespace in {!r} for LOCUS line'.format(locus))
+
+    # long names push the length right - otherwise the name overwrites the padding of the length
+    if len(locus) > 16 and len(str(length)) > (11 - (len(locus) - 16)):
+        nameLength = '{} {}'.format(locus, length)
+    else:
+        nameLength = str(length).rjust(28)
+        nameLength = locus + nameLength[len(locus):]
+    return 'LOCUS       {} bp    {} {} UNK {}\n'.format(nameLength, 'DNA'.ljust(7), ' ' * 8, _DEFAULT_DATE)
+
+
+def locationString(start: int, stop: int, direction: str, recordLength: int) -> str:
+    """
+    :param start: first base (1 based)
+    :param stop: last base
+    :param direction: '+' / '-'
+    :param recordLength: sequence length
+    :return: feature location (ex: complement(100..180))
+    :raises ValueError: if the stop is before the start
+    """
+    if stop < start - 1:
+        raise ValueError('End location ({}) must be greater than or equal to start location ({})'.format(
+            stop, start - 1))
+    if start - 1 == stop:
+        # zero length - the point between two bases
+        location = '{}^1'.format(recordLength) if stop == recordLength else '{}^{}'.format(stop, stop + 1)
+    elif start == stop:
+        location = str(stop)
+    else:
+        location = '{}..{}'.format(start, stop)
+    return location if direction == '+' else 'complement({})'.format(location)
+
+
+def qualifierLines(key: str, value) -> List[str]:
+    """
+    :param key: qualifier name
+    :param value: int (unquoted) or str (quoted)
+    :return: lines of the qualifier - wrapped at spaces (or at the line width) past MAX_WIDTH
+    """
+    if isinstance(value, str):
+        line = '{}/{}="{}"'.format(QUALIFIER_INDENT_STR, key, value.replace('"', '""'))
+    else:
+        line = '{}/{}={}'.format(QUALIFIER_INDENT_STR, key, value)
+    lines = []
+    while line.lstrip():
+        if len(line) <= MAX_WIDTH:
+            lines.append(line)
+            break
+        # break at the last space which fits - the line width if there is none
+        index = MAX_WIDTH
+        for position in range(min(len(line) - 1, MAX_WIDTH), QUALIFIER_INDENT + 1, -1):
+            if line[position] == ' ':
+                index = position
+                break
+        lines.append(line[:index])
+        line = QUALIFIER_INDENT_STR + line[index:].lstrip()
+    return lines
+
+
+def _featureLines(featureType: str, location: str, qualifiers: Sequence[Tuple[str, object]]) -> List[str]:
+    lines = ['     {:<16}{}'.format(featureType, location)]
+    for key, value in qualifiers:
+        lines.extend(qualifierLines(key, value))
+    return lines
+
+
+class GenbankWriter:
+    """
+    Class for writing genbank records to an open text file one at a time
+    """
+
+    def __init__(self, handle: TextIO, chunkSize: int = DEFAULT_CHUNK_SIZE):
+        """
+        :param handle: file opened for writing (text)
+        :param chunkSize: sequence letters formatted at once - rounded to whole lines
+        """
+        self.handle = handle
+        self.chunkSize = max(LETTERS_PER_LINE, chunkSize - chunkSize % LETTERS_PER_LINE)
+
+    def write(self, name: str, sequence: str, genes: Iterable[Gene.GeneFeature]):
+        """
+        Writes a record
+        :param name: record name (LOCUS)
+        :param sequence: DNA sequence - written in lower case
+        :param genes: Genes / TRNAs of the record in any order
+        """
+        recordLength = len(sequence)
+        self.handle.write(locusLine(name, recordLength))
+        self.handle.write(_HEADER)
+        self.writeFeatures(Gene.GeneUtils.sortGenes(genes), recordLength)
+        self.writeOrigin(sequence)
+        self.handle.write('//\n')
+
+    def writeFeatures(self, genes: Iterable[Gene.GeneFeature], recordLength: int):
+        """
+        Writes the gene feature and the CDS / TRNA feature of each gene - numbered in the given order
+        :param genes: Genes / TRNAs
+        :param recordLength: sequence length
+        """
+        lines = []
+        for ind, gene in enumerate(genes, 1):
+            location = locationString(gene.start, gene.stop, gene.direction, recordLength)
+            lines.extend(_featureLines('gene', location, [('gene', ind)]))
+            if isinstance(gene, Gene.Gene):
+                lines.extend(_featureLines('CDS', location, [('gene', ind)]))
+            elif isinstance(gene, Gene.TRNA):
+                lines.extend(_featureLines('TRNA', location, [('gene', ind), ('note', gene.type),
+                                                              ('product', gene.type.split('(')[0])]))
+            if len(lines) >= 4096:
+                lines.append('')
+                self.handle.write('\n'.join(lines))
+                lines = []
+        if lines:
+            lines.append('')
+            self.handle.write('\n'.join(lines))
+
+    def writeOrigin(self, sequence: str):
+        """
+        Writes the ORIGIN block - 60 bases per line in blocks of 10, a chunk of the sequence at a time
+        :param sequence: DNA sequence
+        """
+        self.handle.write('ORIGIN\n')
+        for chunkStart in range(0, len(sequence), self.chunkSize):
+            chunk = sequence[chunkStart:chunkStart + self.chunkSize].lower()
+            lines = []
+            for lineStart in range(0, len(chunk), LETTERS_PER_LINE):
+                line = chunk[lineStart:lineStart + LETTERS_PER_LINE]
+                lines.append('{:>{}} {}\n'.format(chunkStart + lineStart + 1, SEQUENCE_INDENT,
+                                                  ' '.join(line[block:block + 10]
+                                                           for block in range(0, len(line), 10))))
+            self.handle.write(''.join(lines))
+
+
+def writeGenbank(fileName: str, records: Iterable[Tuple[str, str, Iterable[Gene.GeneFeature]]],
+                 chunkSize: int = DEFAULT_CHUNK_SIZE):
+    """
+    Writes genbank records to a file - records are written as they are read, so they can be generated lazily
+    :param fileName: name of the file to write to
+    :param records: (name, DNA sequence, Genes) of each record in file order
+    :param chunkSize: sequence letters formatted at once
+    """
+    with open(fileName, 'w') as handle:
+        writer = GenbankWriter(handle, chunkSize)
+        for name, sequence, genes in records:
+            writer.write(name, sequence, genes)
@@ -0,0 +1,100 @@
+"""
+Index of gene calls by gene
+Maps each gene key (contig, direction, stop (+) / start (-) - see GeneFeature.key) to the calls of every tool,
+so "which tools called this gene" is a dictionary lookup instead of a sort and scan over every tool's calls.
+"""
+
+from typing import Dict, Iterable, List, Tuple, Union
+
+from phagecommander import Gene
+
+GeneKey = Tuple[str, str, int]
+
+
+class GeneIndex:
+    """
+    Class for looking up the calls of a gene across tools
+    """
+
+    def __init__(self, features: Iterable[Gene.GeneFeature] = ()):
+        """
+        :param features: Genes / TRNAs to index
+        """
+        # gene key: {tool: List[GeneFeature]} - tools and calls in order of insertion
+        self._calls: Dict[GeneKey, Dict[str, List[Gene.GeneFeature]]] = dict()
+        self.update(features)
+
+    @classmethod
+    def fromToolData(cls, toolData: Dict[str, list], toolList: Iterable[str] = None) -> 'GeneIndex':
+        """
+        :param toolData: {tool: List[Gene]} (QueryData.toolData) - tools which returned errors are skipped
+        :param toolList: tools to include - every tool if None
+        """
+        index = cls()
+        for tool, genes in toolData.items():
+            if (toolList is None or tool in toolList) and isinstance(genes, list):
+                index.update(genes)
+        return index
+
+    def add(self, feature: Gene.GeneFeature):
+        self._calls.setdefault(feature.key, dict()).setdefault(feature.identity, []).append(feature)
+
+    def update(self, features: Iterable[Gene.GeneFeature]):
+        for feature in features:
+            self.add(feature)
+
+    def remove(self, feature: Gene.GeneFeature):
+        """
+        Removes a single call
+        :raises KeyError: if the call is not indexed
+        """
+        tools = self._calls[feature.key]
+        calls = tools[feature.identity]
+        # remove the call itself - not an equal call of the same gene
+        for position, call in enumerate(calls):
+            if call is feature:
+                del calls[position]
+                break
+        else:
+            raise KeyError(repr(feature))
+        if len(calls) == 0:
+            del tools[feature.identity]
+        if len(tools) == 0:
+            del self._calls[feature.key]
+
+    # LOOKUPS ----
+    @staticmethod
+    def _key(gene: Union[Gene.GeneFeature, GeneKey]) -> GeneKey:
+        return gene.key if isinstance(gene, Gene.GeneFeature) else tuple(gene)
+
+    def calls(self, gene: Union[Gene.GeneFeature, GeneKey]) -> Dict[str, List[Gene.GeneFeature]]:
+        """
+        :param gene: a call of the gene or its key
+        :return: {tool: calls of the gene} - empty if no tool called the gene
+        """
+        return {tool: list(calls) for tool, calls in self._calls.get(self._key(gene), dict()).items()}
+
+    def tools(self, gene: Union[Gene.GeneFeature, GeneKey]) -> List[str]:
+        """
+        :param gene: a call of the gene or its key
+        :return: tools which called the gene
+        """
+        return list(self._calls.get(self._key(gene), ()))
+
+    def count(self, gene: Union[Gene.GeneFeature, GeneKey]) -> int:
+        """
+        :return: amount of calls of the gene (every tool)
+        """
+        return sum(len(calls) for calls in self._calls.get(self._key(gene), dict()).values())
+
+    def keys(self) -> List[GeneKey]:
+        return list(self._calls)
+
+    def __contains__(self, gene):
+        return self._key(gene) in self._calls
+
+    def __len__(self):
+        return len(self._calls)
+
+    def __iter__(self):
+        return iter(self._calls)
@@ -0,0 +1,318 @@
+"""
+Columnar gene calls
+A GeneTable holds gene calls as typed NumPy columns (start, stop, strand, tool, contig, partial ends and an
+optional score) instead of one Gene object per call, so sorting, grouping, filtering and exporting millions
+of calls run as array operations. Tables convert to / from Genes and build straight from the tool parsers.
+"""
+
+from typing import Dict, Iterable, List, Sequence, Union
+
+import numpy as np
+
+from phagecommander import Gene
+from phagecommander.Utilities.Tools import *
+
+# strand column values
+PLUS = 1
+MINUS = -1
+_STRANDS = {'+': PLUS, '-': MINUS}
+_DIRECTIONS = {PLUS: '+', MINUS: '-'}
+
+# partial column bits
+PARTIAL_START = 1
+PARTIAL_STOP = 2
+
+# format version of saved tables
+FORMAT_VERSION = 1
+
+# dtype of the rows built by the parsers
+_ROW_DTYPE = np.dtype([('start', np.int64), ('stop', np.int64), ('strand', np.int8), ('partial', np.int8)])
+
+# tool: line parser taking a factory (see GeneParse.iter_glimmer)
+LINE_PARSERS = {GENEMARK: Gene.GeneParse.iter_genemark,
+                HMM: Gene.GeneParse.iter_genemarkHmm,
+                HEURISTIC: Gene.GeneParse.iter_genemarkHeuristic,
+                GENEMARKS: Gene.GeneParse.iter_genemarkS,
+                GENEMARKS2: Gene.GeneParse.iter_genemarkS2,
+                GLIMMER: Gene.GeneParse.iter_glimmer,
+                PRODIGAL: Gene.GeneParse.iter_prodigal,
+                RAST: Gene.GeneParse.iter_rast}
+# tool: parser returning a list of features
+LIST_PARSERS = {METAGENE: Gene.GeneParse.parse_metagene,
+                ARAGORN: Gene.GeneParse.parse_aragorn}
+
+
+def _row(start, stop, direction, identity, contig, partialStart, partialStop):
+    """
+    Row factory of the line parsers
+    """
+    return start, stop, _STRANDS[direction], partialStart | partialStop << 1
+
+
+class GeneTable:
+    """
+    Class for holding gene calls as columns
+    * tool / contig columns hold indexes into the tools / contigs name lists
+    * tRNA calls keep their type in the optional types column
+    """
+
+    def __init__(self, start=(), stop=(), strand=(), tool=(), contig=(), partial=None, score=None, types=None,
+                 tools: Sequence[str] = (), contigs: Sequence[str] = ()):
+        """
+        :param start: left coordinates (1 based, inclusive)
+        :param stop: right coordinates
+        :param strand: PLUS / MINUS
+        :param tool: index of each call's tool in tools
+        :param contig: index of each call's contig in contigs
+        :param partial: PARTIAL_START / PARTIAL_STOP bits - None if no call is partial
+        :param score: tool score of each call - None if the tools report no scores
+        :param types: tRNA type of each call ('' for genes) - None if there are no tRNAs
+        :param tools: tool names
+        :param contigs: contig names
+        """
+        self.start = np.asarray(start, dtype=np.int64)
+        self.stop = np.asarray(stop, dtype=np.int64)
+        self.strand = np.asarray(strand, dtype=np.int8)
+        self.tool = np.asarray(tool, dtype=np.int16)
+        self.contig = np.asarray(contig, dtype=np.int32)
+        size = len(self.start)
+        self.partial = (np.zeros(size, dtype=np.int8) if partial is None
+                        else np.asarray(partial, dtype=np.int8))
+        self.score = None if score is None else np.asarray(score, dtype=np.float32)
+        self.types = None if types is None else np.asarray(types, dtype=object)
+        self.tools = list(tools)
+        self.contigs = list(contigs)
+
+        for name in ('stop', 'strand', 'tool', 'contig', 'partial', 'score', 'types'):
+            column = getattr(self, name)
+            if column is not None and len(column) != size:
+                raise ValueError('Column {} has {} rows, expected {}'.format(name, len(column), size))
+
+    # CONSTRUCTORS ----
+    @classmethod
+    def fromGenes(cls, features: Iterable[Gene.GeneFeature], tools: Sequence[str] = (),
+                  contigs: Sequence[str] = ()) -> 'GeneTable':
+        """
+        :param features: Genes / TRNAs
+        :param tools: tool names to index first - tools of other features are appended
+        :param contigs: contig names to index first - contigs of other features are appended
+        :return: GeneTable of the features in the given order
+        """
+        features = list(features)
+        toolIndexes = {name: index for index, name in enumerate(tools)}
+        contigIndexes = {name: index for index, name in enumerate(contigs)}
+        hasTypes = any(isinstance(feature, Gene.TRNA) for feature in features)
+
+        size = len(features)
+        start = np.fromiter((feature.start for feature in features), dtype=np.int64, count=size)
+        stop = np.fromiter((feature.stop for feature in features), dtype=np.int64, count=size)
+        strand = np.fromiter((_STRANDS[feature.direction] for feature in features), dtype=np.int8, count=size)
+        tool = np.fromiter((toolIndexes.setdefault(feature.identity, len(toolIndexes)) for feature in features),
+                           dtype=np.int16, count=size)
+        contig = np.fromiter((contigIndexes.setdefault(feature.contig, len(contigIndexes)) for feature in features),
+                             dtype=np.int32, count=size)
+        partial = np.fromiter((getattr(feature, 'partialStart', False) | getattr(feature, 'partialStop', False) << 1
+                               for feature in features), dtype=np.int8, count=size)
+        types = None
+        if hasTypes:
+            types = np.array([getattr(feature, 'type', '') or '' for feature in features], dtype=object)
+
+        return cls(start, stop, strand, tool, contig, partial, types=types,
+                   tools=sorted(toolIndexes, key=toolIndexes.get), contigs=sorted(contigIndexes, key=contigIndexes.get))
+
+    @classmethod
+    def fromToolData(cls, toolData: Dict[str, list], toolList: Iterable[str] = None) -> 'GeneTable':
+        """
+        :param toolData: {tool: List[Gene]} (QueryData.toolData) - tools which returned errors are skipped
+        :param toolList: tools to include - every tool if None
+        :return: GeneTable of the calls, tool by tool
+        """
+        tools = [tool for tool in toolData if toolList is None or tool in toolList]
+        tables = [cls.fromGenes(toolData[tool], tools=[tool]) for tool in tools if isinstance(toolData[tool], list)]
+        return cls.concatenate(tables, tools=tools)
+
+    @classmethod
+    def fromParser(cls, tool: str, data, contig: str = '') -> 'GeneTable':
+        """
+        Parses tool output straight into a table
+        :param tool: tool name (see Tools)
+        :param data: tool output - str, bytes, RawOutput or iterable of lines
+        :param contig: contig the output was predicted on
+        :return: GeneTable of the tool's calls in output order
+        """
+        if tool in LINE_PARSERS:
+            rows = list(LINE_PARSERS[tool](data, tool, factory=_row))
+            rows = np.array(rows, dtype=_ROW_DTYPE) if rows else np.zeros(0, dtype=_ROW_DTYPE)
+            size = len(rows)
+            return cls(rows['start'], rows['stop'], rows['strand'], np.zeros(size, dtype=np.int16),
+                       np.zeros(size, dtype=np.int32), rows['partial'], tools=[tool], contigs=[contig])
+        if tool in LIST_PARSERS:
+            # parsed features have no contig yet
+            table = cls.fromGenes(LIST_PARSERS[tool](data, tool), tools=[tool], contigs=[''])
+            table.contigs = [contig]
+            return table
+        raise KeyError('No parser for tool {}'.format(tool))
+
+    @classmethod
+    def concatenate(cls, tables: Sequence['GeneTable'], tools: Sequence[str] = (),
+                    contigs: Sequence[str] = ()) -> 'GeneTable':
+        """
+        Joins tables - tool / contig indexes are remapped onto the joined name lists
+        :param tables: GeneTables
+        :param tools: tool names to index first
+        :param contigs: contig names to index first
+        :return: GeneTable of every row in table order
+        """
+        toolIndexes = {name: index for index, name in enumerate(tools)}
+        contigIndexes = {name: index for index, name in enumerate(contigs)}
+        toolColumns, contigColumns = [], []
+        for table in tables:
+            toolMap = np.array([toolIndexes.setdefault(name, len(toolIndexes)) for name in table.tools] or [0],
+                               dtype=np.int16)
+            contigMap = np.array([contigIndexes.setdefault(name, len(contigIndexes)) for name in table.contigs]
+                                 or [0], dtype=np.int32)
+            toolColumns.append(toolMap[table.tool])
+            contigColumns.append(contigMap[table.contig])
+
+        def join(name, dtype):
+            return np.concatenate([getattr(table, name) for table in tables]) if tables else np.zeros(0, dtype)
+
+        score = None
+        if any(table.score is not None for table in tables):
+            score = np.concatenate([table.score if table.score is not None
+                                    else np.full(len(table), np.nan, dtype=np.float32) for table in tables])
+        types = None
+        if any(table.types is not None for table in tables):
+            types = np.concatenate([table.types if table.types is not None
+                                    else np.full(len(table), '', dtype=object) for table in tables])
+
+        return cls(join('start', np.int64), join('stop', np.int64), join('strand', np.int8),
+                   np.concatenate(toolColumns) if tables else (), np.concatenate(contigColumns) if tables else (),
+                   join('partial', np.int8), score, types,
+                   tools=sorted(toolIndexes, key=toolIndexes.get), contigs=sorted(contigIndexes, key=contigIndexes.get))
+
+    # ACCESS ----
+    def __len__(self):
+        return len(self.start)
+
+    def __getitem__(self, index) -> Union['GeneTable', Gene.GeneFeature]:
+        """
+        :param index: int for a single call, slice / index array / bool mask for a table of the selected rows
+        :return: GeneFeature or GeneTable
+        """
+        if isinstance(index, (int, np.integer)):
+            return self._feature(int(index))
+        return GeneTable(self.start[index], self.stop[index], self.strand[index], self.tool[index],
+                         self.contig[index], self.partial[index],
+                         None if self.score is None else self.score[index],
+                         None if self.types is None else self.types[index],
+                         tools=self.tools, contigs=self.contigs)
+
+    def _feature(self, index: int) -> Gene.GeneFeature:
+        direction = _DIRECTIONS[int(self.strand[index])]
+        tool = self.tools[self.tool[index]] if len(self.tools) != 0 else ''
+        contig = self.contigs[self.contig[index]] if len(self.contigs) != 0 else ''
+        if self.types is not None and self.types[index]:
+            return Gene.TRNA(int(self.start[index]), int(self.stop[index]), direction, self.types[index],
+                             identity=tool, contig=contig)
+        partial = int(self.partial[index])
+        return Gene.Gene(int(self.start[index]), int(self.stop[index]), direction, tool, contig,
+                         bool(partial & PARTIAL_START), bool(partial & PARTIAL_STOP))
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self._feature(index)
+
+    def toGenes(self) -> List[Gene.GeneFeature]:
+        """
+        :return: Genes / TRNAs of every row
+        """
+        # columns converted to Python values at once - not per row as _feature
+        tools = self.tools or ['']
+        contigs = self.contigs or ['']
+        rows = zip(self.start.tolist(), self.stop.tolist(), self.strand.tolist(), self.tool.tolist(),
+                   self.contig.tolist(), self.partial.tolist(),
+                   self.types.tolist() if self.types is not None else [''] * len(self))
+        features = []
+        for start, stop, strand, tool, contig, partial, trnaType in rows:
+            if trnaType:
+                features.append(Gene.TRNA(start, stop, _DIRECTIONS[strand], trnaType, identity=tools[tool],
+                                          contig=contigs[contig]))
+            else:
+                features.append(Gene.Gene(start, stop, _DIRECTIONS[strand], tools[tool], contigs[contig],
+                                          bool(partial & PARTIAL_START), bool(partial & PARTIAL_STOP)))
+        return features
+
+    def __repr__(self):
+        return 'GeneTable(calls={}, tools={}, contigs={})'.format(len(self), self.tools, len(self.contigs))
+
+    @property
+    def length(self) -> np.ndarray:
+        return self.stop - self.start + 1
+
+    def comparisonKeys(self) -> np.ndarray:
+        """
+        :return: coordinate identifying each call's gene - stop for + strand calls, start for - strand calls
+            (see GeneUtils.getGeneComparison)
+        """
+        return np.where(self.strand == PLUS, self.stop, self.start)
+
+    def toolIndex(self, tool: str) -> int:
+        """
+        :return: index of the tool in the tool column - -1 if the table has no calls of the tool
+        """
+        return self.tools.index(tool) if tool in self.tools else -1
+
+    def select(self, tools: Iterable[str] = None, contigs: Iterable[str] = None) -> 'GeneTable':
+        """
+        :param tools: tools to keep - every tool if None
+        :param contigs: contigs to keep - every contig if None
+        :return: GeneTable of the calls of the given tools / contigs
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if tools is not None:
+            mask &= np.isin(self.tool, [self.toolIndex(tool) for tool in tools])
+        if contigs is not None:
+            mask &= np.isin(self.contig, [self.contigs.index(name) for name in contigs if name in self.contigs])
+        return self[mask]
+
+    def sortOrder(self) -> np.ndarray:
+        """
+        :return: indexes sorting the calls by contig (in contig order), then stop (+) / start (-)
+            - ties keep their table order (as GeneUtils.sortGenes)
+        """
+        return np.lexsort((self.comparisonKeys(), self.contig))
+
+    def sorted(self) -> 'GeneTable':
+        return self[self.sortOrder()]
+
+    # SAVE / LOAD ----
+    def save(self, file):
+        """
+        Saves the table in NumPy's compressed .npz format
+        :param file: path or binary file object
+        """
+        columns = {'version': np.array(FORMAT_VERSION),
+                   'start': self.start, 'stop': self.stop, 'strand': self.strand, 'tool': self.tool,
+                   'contig': self.contig, 'partial': self.partial,
+                   'tools': np.array(self.tools, dtype=str), 'contigs': np.array(self.contigs, dtype=str)}
+        if self.score is not None:
+            columns['score'] = self.score
+        if self.types is not None:
+            columns['types'] = np.array(self.types, dtype=str)
+        np.savez_compressed(file, **columns)
+
+    @classmethod
+    def load(cls, file) -> 'GeneTable':
+        """
+        :param file: path or binary file object of a saved table
+        :return: GeneTable
+        """
+        with np.load(file, allow_pickle=False) as data:
+            if int(data['version']) > FORMAT_VERSION:
+                raise ValueError('Gene table format {} is newer than supported ({})'.format(int(data['version']),
+                                                                                          FORMAT_VERSION))
+            return cls(data['start'], data['stop'], data['strand'], data['tool'], data['contig'], data['partial'],
+                       data['score'] if 'score' in data else None,
+                       data['types'].astype(object) if 'types' in data else None,
+                       tools=data['tools'].tolist(), contigs=data['contigs'].tolist())
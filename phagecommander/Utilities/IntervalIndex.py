@@ -0,0 +1,206 @@
+"""
+Interval index over gene / tRNA calls
+Answers which calls overlap a position or region, and overlap joins between two sets of calls (ex: genes
+colliding with Aragorn tRNAs), with binary searches over calls sorted by their left coordinate.
+* A call overlapping a region starts at most (longest call - 1) bases before it, so each query only scans the
+  calls starting inside that window
+* Coordinates are 1 based and inclusive - calls overlap if they share a base
+"""
+
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from phagecommander import Gene
+from phagecommander.Utilities.GeneTable import GeneTable
+
+# contigs are laid end to end on one axis - position = contig * _CONTIG_SPAN + coordinate
+_CONTIG_SPAN = 1 << 40
+
+
+class Conflict(NamedTuple):
+    """
+    Two overlapping calls
+    """
+    kind: str
+    first: Gene.GeneFeature
+    second: Gene.GeneFeature
+    overlap: int
+
+
+# conflict kinds
+GENE_TRNA = 'gene-trna'
+GENE_GENE = 'gene-gene'
+
+# neighbouring phage genes commonly share 1 - 4 bases (ex: ATGA / TGATG stop-start overlaps) - not conflicts
+DEFAULT_MIN_GENE_OVERLAP = 5
+
+
+class IntervalIndex:
+    """
+    Class for querying the calls overlapping a region
+    * Queries return table rows - features() converts them to Genes
+    """
+
+    def __init__(self, table: GeneTable, features: Sequence[Gene.GeneFeature] = None):
+        """
+        :param table: calls to index
+        :param features: Genes the table was built from (same order) - returned by features()
+        """
+        self.table = table
+        self._features = features
+
+        # rows sorted by their left end
+        self.order = np.lexsort((table.start, table.contig))
+        self._contig = table.contig[self.order].astype(np.int64)
+        self._left = self._contig * _CONTIG_SPAN + table.start[self.order]
+        self._right = self._contig * _CONTIG_SPAN + table.stop[self.order]
+        self.maxLength = int(table.length.max()) if len(table) != 0 else 0
+
+    @classmethod
+    def fromGenes(cls, features: Iterable[Gene.GeneFeature], contigs: Sequence[str] = ()) -> 'IntervalIndex':
+        """
+        :param features: Genes / TRNAs
+        :param contigs: contig names in file order
+        """
+        features = list(features)
+        return cls(GeneTable.fromGenes(features, contigs=contigs), features)
+
+    @classmethod
+    def fromToolData(cls, toolData: Dict[str, list], toolList: Iterable[str] = None,
+                     contigs: Sequence[str] = ()) -> 'IntervalIndex':
+        """
+        :param toolData: {tool: List[Gene]} (QueryData.toolData) - tools which returned errors are skipped
+        :param toolList: tools to include - every tool if None
+        :param contigs: contig names in file order
+        """
+        features = []
+        for tool, genes in toolData.items():
+            if (toolList is None or tool in toolList) and isinstance(genes, list):
+                features.extend(genes)
+        return cls.fromGenes(features, contigs)
+
+    def __len__(self):
+        return len(self.order)
+
+    def _contigIndex(self, contig: str) -> int:
+        return self.table.contigs.index(contig) if contig in self.table.contigs else -1
+
+    def _queryContig(self, contig: Optional[str]) -> int:
+        if contig is not None:
+            return self._contigIndex(contig)
+        if len(self.table.contigs) > 1:
+            raise ValueError('contig is required - the index holds {} contigs'.format(len(self.table.contigs)))
+        return 0
+
+    # QUERIES ----
+    def overlapping(self, start: int, stop: int, contig: str = None) -> np.ndarray:
+        """
+        :param start: left end of the region
+        :param stop: right end of the region
+        :param contig: contig of the region - None for the only contig of the index
+        :return: table rows of the calls overlapping the region - by left end
+        :raises ValueError: if contig is None and the index holds several contigs
+        """
+        contigIndex = self._queryContig(contig)
+        if contigIndex == -1 or len(self) == 0:
+            return self.order[:0]
+        offset = contigIndex * _CONTIG_SPAN
+        low = np.searchsorted(self._left, offset + start - self.maxLength + 1, 'left')
+        high = np.searchsorted(self._left, offset + stop, 'right')
+        window = slice(low, high)
+        hits = (self._right[window] >= offset + start) & (self._contig[window] == contigIndex)
+        return self.order[window][hits]
+
+    def at(self, position: int, contig: str = None) -> np.ndarray:
+        """
+        :param contig: see overlapping
+        :return: table rows of the calls containing the position
+        """
+        return self.overlapping(position, position, contig)
+
+    def within(self, start: int, stop: int, contig: str = None) -> np.ndarray:
+        """
+        :param contig: see overlapping
+        :return: table rows of the calls lying completely inside the region
+        """
+        rows = self.overlapping(start, stop, contig)
+        return rows[(self.table.start[rows] >= start) & (self.table.stop[rows] <= stop)]
+
+    def join(self, other: 'IntervalIndex', minOverlap: int = 1) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Finds every pair of overlapping calls between two indexes (contigs are matched by name)
+        :param other: IntervalIndex
+        :param minOverlap: minimum shared bases of a pair
+        :return: (rows of this index, rows of the other index, shared bases) of each pair
+        """
+        empty = np.zeros(0, dtype=np.int64)
+        if len(self) == 0 or len(other) == 0:
+            return empty, empty, empty
+
+        # contigs of this index on the other index's axis
+        contigMap = np.array([other._contigIndex(name) for name in self.table.contigs], dtype=np.int64)
+        contig = contigMap[self.table.contig[self.order]]
+        known = contig != -1
+        rows = self.order[known]
+        offset = contig[known] * _CONTIG_SPAN
+        start = offset + self.table.start[rows]
+        stop = offset + self.table.stop[rows]
+
+        # window of candidates of each call
+        low = np.searchsorted(other._left, start - other.maxLength + 1, 'left')
+        high = np.searchsorted(other._left, stop, 'right')
+        counts = high - low
+        firstRows = np.repeat(np.arange(len(rows)), counts)
+        # position of each candidate in the other index
+        candidates = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(low, counts)
+
+        overlap = (np.minimum(stop[firstRows], other._right[candidates])
+                   - np.maximum(start[firstRows], other._left[candidates]) + 1)
+        hits = overlap >= max(minOverlap, 1)
+        return rows[firstRows[hits]], other.order[candidates[hits]], overlap[hits]
+
+    def selfOverlaps(self, minOverlap: int = 1) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Finds every pair of overlapping calls of this index - each pair once
+        :param minOverlap: minimum shared bases of a pair
+        :return: (first rows, second rows, shared bases) - the first call of a pair starts first
+        """
+        first, second, overlap = self.join(self, minOverlap)
+        # order of each row by left end - keeps one of (a, b) / (b, a) and drops (a, a)
+        rank = np.empty(len(self.order), dtype=np.int64)
+        rank[self.order] = np.arange(len(self.order))
+        keep = rank[first] < rank[second]
+        return first[keep], second[keep], overlap[keep]
+
+    def features(self, rows: Iterable[int]) -> List[Gene.GeneFeature]:
+        """
+        :return: Genes of the table rows
+        """
+        if self._features is not None:
+            return [self._features[row] for row in rows]
+        return [self.table[int(row)] for row in rows]
+
+
+def conflictReport(genes: IntervalIndex, trnas: IntervalIndex = None,
+                   minGeneOverlap: int = DEFAULT_MIN_GENE_OVERLAP, minTrnaOverlap: int = 1) -> List[Conflict]:
+    """
+    Lists the conflicts between calls
+    * gene-trna - a gene overlapping a tRNA (by any amount with the default minTrnaOverlap)
+    * gene-gene - two genes overlapping by at least minGeneOverlap bases
+    :param genes: index of the genes to check (ex: the consensus genes)
+    :param trnas: index of the tRNAs - None to skip gene-trna conflicts
+    :param minGeneOverlap: minimum shared bases of two genes
+    :param minTrnaOverlap: minimum shared bases of a gene and a tRNA
+    :return: List[Conflict] - gene-trna conflicts first, each kind ordered by the first call's position
+    """
+    conflicts = []
+    if trnas is not None:
+        geneRows, trnaRows, overlap = genes.join(trnas, minTrnaOverlap)
+        conflicts.extend(Conflict(GENE_TRNA, gene, trna, int(shared)) for gene, trna, shared in
+                         zip(genes.features(geneRows), trnas.features(trnaRows), overlap))
+
+    firstRows, secondRows, overlap = genes.selfOverlaps(minGeneOverlap)
+    conflicts.extend(Conflict(GENE_GENE, first, second, int(shared)) for first, second, shared in
+                     zip(genes.features(firstRows), genes.features(secondRows), overlap))
+    return conflicts
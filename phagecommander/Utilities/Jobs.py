@@ -0,0 +1,240 @@
+"""
+Step protocol for tool queries
+A query written as a generator yields between its blocking steps (HTTP round-trips):
+    * yield                      - checkpoint, nothing to wait for
+    * yield Wait(seconds)        - wait before the next step (ex: polling a server)
+    * result = yield Process()   - run a subprocess, receives (returncode, stdout, stderr)
+The same generator can be driven synchronously (runJob) or by the asyncio QueryEngine, which
+waits and runs subprocesses on its event loop instead of blocking a thread.
+
+Cancellation is cooperative - a CancelToken is active in the thread running each step of a job,
+remote requests made through Transport abort when it is cancelled and waits / subprocesses are cut short.
+"""
+
+import functools
+import itertools
+import os
+import signal
+import threading
+from contextlib import contextmanager
+from subprocess import Popen, PIPE
+
+# run subprocesses in their own process group so the shell and its children can be killed together
+PROCESS_OPTIONS = {'start_new_session': True} if os.name == 'posix' else dict()
+
+
+class Cancelled(Exception):
+    """
+    Raised inside a job when its CancelToken is cancelled
+    """
+
+    def __init__(self, message='Query cancelled'):
+        super(Cancelled, self).__init__(message)
+
+
+class CancelToken:
+    """
+    Class for signalling cancellation to jobs running in other threads
+    Callbacks registered with the token are run once, when it is cancelled (ex: closing a socket)
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks = dict()
+        self._handles = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self):
+        """
+        Cancels the token and runs every registered callback - safe to call from any thread
+        """
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks.values())
+            self._callbacks.clear()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def check(self):
+        """
+        :raises Cancelled: if the token is cancelled
+        """
+        if self._event.is_set():
+            raise Cancelled()
+
+    def wait(self, seconds: float):
+        """
+        Sleeps for the given time, returning early if the token is cancelled
+        :raises Cancelled: if the token is cancelled
+        """
+        if self._event.wait(seconds):
+            raise Cancelled()
+
+    def register(self, callback) -> int:
+        """
+        Registers a callback to run on cancellation - runs immediately if already cancelled
+        :return: handle for unregister()
+        """
+        with self._lock:
+            if not self._event.is_set():
+                handle = next(self._handles)
+                self._callbacks[handle] = callback
+                return handle
+        callback()
+        return -1
+
+    def unregister(self, handle: int):
+        with self._lock:
+            self._callbacks.pop(handle, None)
+
+
+_local = threading.local()
+
+
+def currentToken() -> CancelToken:
+    """
+    :return: CancelToken active in the calling thread, None if there is none
+    """
+    return getattr(_local, 'token', None)
+
+
+def checkCancelled():
+    """
+    :raises Cancelled: if the CancelToken active in the calling thread is cancelled
+    """
+    token = currentToken()
+    if token is not None:
+        token.check()
+
+
+@contextmanager
+def activeToken(token: CancelToken):
+    """
+    Makes the token the active CancelToken of the calling thread for the duration of the block
+    * None runs the block without cancellation (ex: cleanup requests after a cancel)
+    """
+    previous = currentToken()
+    _local.token = token
+    try:
+        yield token
+    finally:
+        _local.token = previous
+
+
+class Wait:
+    """
+    Step requesting a delay before the job continues
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def __repr__(self):
+        return 'Wait({})'.format(self.seconds)
+
+
+class Process:
+    """
+    Step requesting a subprocess to be run
+    The job receives (returncode, stdout, stderr) as the result of the yield
+    """
+
+    def __init__(self, cmd: str, input: bytes = None):
+        """
+        :param cmd: shell command
+        :param input: data sent to the process' stdin
+        """
+        self.cmd = cmd
+        self.input = input
+
+    def __repr__(self):
+        return 'Process({})'.format(self.cmd)
+
+
+def runJob(job, cancelToken: CancelToken = None):
+    """
+    Drives a job generator to completion in the calling thread
+    :param job: generator following the step protocol
+    :param cancelToken: token to cancel the job with - defaults to the calling thread's active token
+    :return: return value of the job
+    """
+    if cancelToken is None:
+        cancelToken = currentToken()
+    if cancelToken is None:
+        cancelToken = CancelToken()
+
+    with activeToken(cancelToken):
+        value = None
+        while True:
+            try:
+                step = job.send(value)
+            except StopIteration as e:
+                return e.value
+
+            value = None
+            try:
+                if isinstance(step, Wait):
+                    cancelToken.wait(step.seconds)
+                elif isinstance(step, Process):
+                    value = runProcess(step, cancelToken)
+                else:
+                    cancelToken.check()
+            except Cancelled:
+                # let the job clean up (GeneratorExit) before propagating the cancellation
+                job.close()
+                raise
+
+
+def runProcess(step: Process, cancelToken: CancelToken):
+    """
+    Runs the subprocess of a Process step - the process is killed if the token is cancelled
+    :return: (returncode, stdout, stderr)
+    """
+    proc = Popen(step.cmd, stdout=PIPE, stderr=PIPE, stdin=PIPE, shell=True, **PROCESS_OPTIONS)
+    handle = cancelToken.register(lambda: killProcess(proc))
+    try:
+        stdout, stderr = proc.communicate(input=step.input)
+    finally:
+        cancelToken.unregister(handle)
+    cancelToken.check()
+    return proc.returncode, stdout, stderr
+
+
+def killProcess(proc):
+    """
+    Kills a subprocess started with PROCESS_OPTIONS along with any children of its shell
+    :param proc: subprocess.Popen or asyncio.subprocess.Process
+    """
+    if proc.returncode is not None:
+        return
+    try:
+        if os.name == 'posix':
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except (OSError, ProcessLookupError):
+        pass
+
+
+def job(generatorMethod):
+    """
+    Decorator for query methods written as job generators
+    * Calling the method runs the job synchronously
+    * The generator itself is available through <method>.job for asynchronous drivers
+    """
+
+    @functools.wraps(generatorMethod)
+    def run(*args, **kwargs):
+        return runJob(generatorMethod(*args, **kwargs))
+
+    run.job = generatorMethod
+    return run
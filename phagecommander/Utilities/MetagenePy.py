@@ -1,24 +1,31 @@
 import os
-import requests
 from bs4 import BeautifulSoup
 from phagecommander import Gene
-
-METAGENE_URL = 'http://metagene.nig.ac.jp/cgi-bin/mga.cgi'
+from phagecommander.Utilities import Fasta, Transport, Endpoints
 
 
 class Metagene:
 
-    def __init__(self, file: str, sequenceName: str = None):
+    def __init__(self, file: str, sequenceName: str = None, fileData: bytes = None):
+        """
+        :param file: fasta file path
+        :param sequenceName: name of the sequence
+        :param fileData: content of the fasta file if already loaded
+        """
         # check if file exists
-        if not os.path.exists(file):
+        if fileData is None and not os.path.exists(file):
             raise FileExistsError('\"{}\" does not exist.'.format(file))
 
         self.file = file
         self.sequenceName = sequenceName
+        self.fileData = fileData
 
     def query(self):
-        files = {'File': (self.sequenceName, open(self.file), 'application/octet-stream')}
-        postReq = requests.post(METAGENE_URL, files=files)
+        if self.fileData is None:
+            with Fasta.FastaFile(self.file) as fasta:
+                self.fileData = fasta.read()
+        files = {'File': (self.sequenceName, self.fileData, 'application/octet-stream')}
+        postReq = Transport.post(Endpoints.url(Endpoints.METAGENE), files=files)
         postReq.raise_for_status()
         return postReq.text
 
@@ -0,0 +1,329 @@
+"""
+Local stand-in for the remote prediction servers
+Serves every endpoint in Endpoints (under the same paths) with synthetic output in each tool's format:
+    * GeneMark / GLIMMER (DNA Master servers) - job_key submission and 202 polling
+    * GeneMark Hmm, GeneMarkS, GeneMark Heuristic, GeneMarkS-2 - HTML page linking a tmp output file
+    * MetaGeneAnnotator, Aragorn - HTML output
+    * RAST - login page and the YAML server API (submit / status / retrieve / delete)
+Latency, error rate and output size are tunable for load testing the query engine offline.
+
+Usage:
+    python -m phagecommander.Utilities.MockServer --port 8080 --latency 0.2 --error-rate 0.05
+    PHAGECOMMANDER_ENDPOINT_BASE=http://127.0.0.1:8080 phagecom
+"""
+
+import argparse
+import email.parser
+import email.policy
+import hashlib
+import itertools
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from ruamel import yaml
+from phagecommander.Utilities import Endpoints, Synthetic
+from phagecommander.Utilities.Tools import *
+
+# bases per synthetic gene when the output size follows the sequence length
+DEFAULT_BASES_PER_GENE = 1000
+# bases per synthetic tRNA
+_BASES_PER_TRNA = 20000
+_TMP_PATH = 'tmp/'
+
+
+class MockServer:
+    """
+    Class for running the stand-in server on a background thread
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0, latencyJitter: float = 0.0,
+                 errorRate: float = 0.0, genes: int = None, basesPerGene: int = DEFAULT_BASES_PER_GENE,
+                 polls: int = 1, rastPolls: int = 1, seed: int = None):
+        """
+        :param host: interface to listen on
+        :param port: port to listen on - 0 picks a free port
+        :param latency: seconds added to every response
+        :param latencyJitter: up to this many seconds are randomly added on top of latency
+        :param errorRate: fraction of requests answered with HTTP 500
+        :param genes: genes in every output - None to scale with the submitted sequence (see basesPerGene)
+        :param basesPerGene: sequence bases per gene when genes is None
+        :param polls: job_key polls answered with 202 before the output is ready (GeneMark / GLIMMER)
+        :param rastPolls: status checks of a RAST job before it is complete
+        :param seed: seed of injected errors / latency jitter - output only depends on the sequence
+        """
+        self.latency = latency
+        self.latencyJitter = latencyJitter
+        self.errorRate = errorRate
+        self.genes = genes
+        self.basesPerGene = basesPerGene
+        self.polls = polls
+        self.rastPolls = rastPolls
+
+        # request count per path and injected errors
+        self.requests = dict()
+        self.errors = 0
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        # key/ID: [remaining polls, output]
+        self._jobs = dict()
+        self._tmpFiles = dict()
+        self._thread = None
+
+        self._routes = {self._path(GENEMARK): self._jobKeyTool(GENEMARK, Synthetic.genemark),
+                        self._path(GLIMMER): self._jobKeyTool(GLIMMER, Synthetic.glimmer),
+                        self._path(HMM): self._tmpLinkTool(HMM, 'file', Synthetic.genemarkLst),
+                        self._path(GENEMARKS): self._tmpLinkTool(GENEMARKS, 'file', Synthetic.genemarkLst),
+                        self._path(HEURISTIC): self._tmpLinkTool(HEURISTIC, 'file', Synthetic.genemarkLst),
+                        self._path(GENEMARKS2): self._tmpLinkTool(GENEMARKS2, 'file', Synthetic.genemarkS2),
+                        self._path(METAGENE): self._metagene,
+                        self._path(ARAGORN): self._aragorn,
+                        self._path(RAST): self._rast,
+                        self._path(Endpoints.RAST_LOGIN): self._rastLogin}
+        self._tmpPrefix = self._path(Endpoints.GENEMARK_FILES) + _TMP_PATH
+
+        self.server = ThreadingHTTPServer((host, port), self._handlerClass())
+        self.server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        """
+        :return: base URL of the server - see Endpoints.configure(base=...)
+        """
+        host, port = self.server.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+    def start(self):
+        """
+        Starts serving on a background thread
+        """
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stops serving and closes the socket
+        """
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    # REQUEST HANDLING -----------------------------------------------------------------------------
+    @staticmethod
+    def _path(endpoint: str) -> str:
+        return urlsplit(Endpoints.DEFAULTS[endpoint]).path
+
+    def _handlerClass(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                server._handle(self, 'GET')
+
+            def do_POST(self):
+                server._handle(self, 'POST')
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _handle(self, request: BaseHTTPRequestHandler, method: str):
+        path = urlsplit(request.path).path
+        body = request.rfile.read(int(request.headers.get('Content-Length', 0)))
+
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+            delay = self.latency + self._random.uniform(0, self.latencyJitter)
+            failed = self._random.random() < self.errorRate
+        if delay > 0:
+            time.sleep(delay)
+
+        if failed:
+            with self._lock:
+                self.errors += 1
+            return self._respond(request, 500, 'Injected server error')
+
+        if method == 'GET' and path.startswith(self._tmpPrefix):
+            with self._lock:
+                output = self._tmpFiles.get(path[len(self._tmpPrefix):])
+            if output is None:
+                return self._respond(request, 404, 'Not Found')
+            return self._respond(request, 200, output)
+
+        route = self._routes.get(path)
+        if method != 'POST' or route is None:
+            return self._respond(request, 404, 'Not Found')
+
+        try:
+            status, content = route(_formData(request.headers.get('Content-Type', ''), body))
+        except (KeyError, ValueError) as e:
+            status, content = 400, 'Bad Request: {}'.format(e)
+        self._respond(request, status, content)
+
+    @staticmethod
+    def _respond(request: BaseHTTPRequestHandler, status: int, content: str):
+        data = content.encode('utf-8')
+        request.send_response(status)
+        request.send_header('Content-Type', 'text/html; charset=utf-8')
+        request.send_header('Content-Length', str(len(data)))
+        request.end_headers()
+        request.wfile.write(data)
+
+    def _newId(self) -> int:
+        with self._lock:
+            return next(self._ids)
+
+    def _calls(self, fastaData: bytes, trna: bool = False):
+        """
+        :return: synthetic calls for the sequence - equal sequences give equal calls
+        """
+        length = Synthetic.sequenceLength(fastaData)
+        seed = int.from_bytes(hashlib.sha256(fastaData).digest()[:8], 'big')
+        if trna:
+            count = self.genes if self.genes is not None else length // _BASES_PER_TRNA
+            return Synthetic.trnaCalls(max(count, 1), length, seed)
+        count = self.genes if self.genes is not None else length // self.basesPerGene
+        return Synthetic.geneCalls(max(count, 1), length, seed)
+
+    # TOOLS ----------------------------------------------------------------------------------------
+    def _jobKeyTool(self, tool: str, formatter):
+        """
+        GeneMark / GLIMMER on the DNA Master servers
+        POST sequence -> job_key=<key>, POST job_key -> 202 until the output is ready, then the output
+        """
+        def handle(form):
+            if 'job_key' in form:
+                key = form['job_key']
+                with self._lock:
+                    job = self._jobs.get(key)
+                    if job is None:
+                        return 404, 'Unknown job_key'
+                    if job[0] > 0:
+                        job[0] -= 1
+                        return 202, 'Processing'
+                    del self._jobs[key]
+                return 200, job[1]
+
+            key = '{}{}'.format(tool, self._newId())
+            with self._lock:
+                self._jobs[key] = [self.polls, formatter(self._calls(form['sequence']))]
+            return 200, 'job_key={}'.format(key)
+
+        return handle
+
+    def _tmpLinkTool(self, tool: str, field: str, formatter):
+        """
+        exon.gatech.edu GeneMark tools - the response page links the output in tmp/
+        """
+        def handle(form):
+            name = '{}_{}.lst'.format(tool, self._newId())
+            with self._lock:
+                self._tmpFiles[name] = formatter(self._calls(form[field]))
+            page = '<html><body><p>{} finished</p><a href="{}{}">Output</a></body></html>'
+            return 200, page.format(tool, _TMP_PATH, name)
+
+        return handle
+
+    def _metagene(self, form):
+        return 200, Synthetic.metagene(self._calls(form['File']))
+
+    def _aragorn(self, form):
+        return 200, Synthetic.aragorn(self._calls(form['upload'], trna=True))
+
+    def _rastLogin(self, form):
+        if not form.get('login') or not form.get('password'):
+            return 200, '<html><head><title>Login</title></head></html>'
+        return 200, '<html><head><title>Jobs Overview</title></head></html>'
+
+    def _rast(self, form):
+        function = form['function']
+        args = yaml.safe_load(form['args'])
+        if function == 'submit_RAST_job':
+            fastaData = args['-file'].encode('utf-8')
+            jobId = self._newId()
+            with self._lock:
+                self._jobs[jobId] = [self.rastPolls, Synthetic.rast(self._calls(fastaData))]
+            return 200, yaml.safe_dump({'status': 'ok', 'job_id': jobId})
+
+        jobId = args['-job'][0] if isinstance(args['-job'], list) else args['-job']
+        with self._lock:
+            job = self._jobs.get(jobId)
+            if job is None:
+                return 200, yaml.safe_dump({jobId: {'status': 'error', 'error_msg': 'Job not found'}})
+
+            if function == 'status_of_RAST_job':
+                if job[0] > 0:
+                    job[0] -= 1
+                    return 200, yaml.safe_dump({jobId: {'status': 'running'}})
+                return 200, yaml.safe_dump({jobId: {'status': 'complete'}})
+            if function == 'retrieve_RAST_job':
+                return 200, job[1]
+            if function == 'delete_RAST_job':
+                del self._jobs[jobId]
+                return 200, yaml.safe_dump({jobId: {'status': 'deleted'}})
+        raise ValueError('Unknown function {}'.format(function))
+
+
+def _formData(contentType: str, body: bytes) -> dict:
+    """
+    Decodes a urlencoded or multipart form
+    :return: {field: value} - file fields are bytes, urlencoded sequences are bytes, other fields are str
+    """
+    if contentType.startswith('multipart/form-data'):
+        message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+            'Content-Type: {}\r\n\r\n'.format(contentType).encode('latin-1') + body)
+        form = dict()
+        for part in message.iter_parts():
+            name = part.get_param('name', header='content-disposition')
+            content = part.get_payload(decode=True)
+            form[name] = content if part.get_filename() is not None else content.decode('utf-8')
+        return form
+
+    form = {key: values[0] for key, values in parse_qs(body.decode('latin-1'), keep_blank_values=True).items()}
+    if 'sequence' in form:
+        form['sequence'] = form['sequence'].encode('latin-1')
+    return form
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the PhageCommander prediction servers')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='maximum random seconds added to the latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests failing with HTTP 500')
+    parser.add_argument('--genes', type=int, default=None, help='genes per output (default: scales with sequence)')
+    parser.add_argument('--bases-per-gene', type=int, default=DEFAULT_BASES_PER_GENE)
+    parser.add_argument('--polls', type=int, default=1, help='GeneMark/GLIMMER polls before output is ready')
+    parser.add_argument('--rast-polls', type=int, default=1, help='RAST status checks before a job is complete')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    server = MockServer(args.host, args.port, args.latency, args.jitter, args.error_rate, args.genes,
+                        args.bases_per_gene, args.polls, args.rast_polls, args.seed)
+    print('Serving on {} - set {}={} to use it'.format(server.url, Endpoints.BASE_ENVIRONMENT_VARIABLE, server.url))
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server.server_close()
+
+
+if __name__ == '__main__':
+    main()
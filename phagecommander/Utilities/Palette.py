@@ -0,0 +1,103 @@
+"""
+Colors of the gene tables
+One cell color and one text color per call count, read from the color settings once and shared by every
+row of the tables and by the Excel export - settings are only read again when the colors change.
+Plain RGB tuples - no Qt objects, so exports can use the palette without a GUI.
+"""
+
+from typing import List, Sequence, Tuple
+
+RGB = Tuple[int, int, int]
+
+# default colors of each call count (see ColorTable)
+DEFAULT_CELL_COLORS = [
+    (255, 255, 255),
+    (218, 238, 243),
+    (183, 222, 232),
+    (146, 205, 220),
+    (49, 134, 155),
+    (33, 89, 103),
+    (21, 59, 68),
+    (2, 47, 58),
+    (1, 37, 56)
+]
+DEFAULT_MAJORITY_COLORS = [
+    (0, 0, 0),
+    (0, 0, 0),
+    (0, 0, 0),
+    (0, 0, 0),
+    (255, 255, 255),
+    (255, 255, 255),
+    (255, 255, 255),
+    (255, 255, 255),
+    (255, 255, 255)
+]
+DEFAULT_MINORITY_COLORS = [(255, 75, 75)] * 9
+
+
+def parseColor(value: str) -> RGB:
+    """
+    :param value: color setting - 'R G B'
+    :return: (R, G, B)
+    """
+    red, green, blue = (int(num) for num in value.split(' ')[:3])
+    return red, green, blue
+
+
+def hexColor(color: RGB) -> str:
+    """
+    :return: 'rrggbb' string of the color (Excel colors)
+    """
+    return ''.join('{:02x}'.format(num) for num in color)
+
+
+class TablePalette:
+    """
+    Class for the cell and text colors of genes by their amount of calls
+    * Colors are indexed by call count - count 1 is the first color
+    """
+
+    def __init__(self, cellColors: Sequence[RGB], textColors: Sequence[RGB]):
+        """
+        :param cellColors: cell color of each call count
+        :param textColors: text color of each call count
+        """
+        if len(cellColors) != len(textColors):
+            raise ValueError('{} cell colors for {} text colors'.format(len(cellColors), len(textColors)))
+        self.cellColors: List[RGB] = [tuple(color) for color in cellColors]
+        self.textColors: List[RGB] = [tuple(color) for color in textColors]
+        self.cellHex = [hexColor(color) for color in self.cellColors]
+        self.textHex = [hexColor(color) for color in self.textColors]
+
+    @classmethod
+    def fromSettings(cls, settings, cellSetting: str, textSetting: str, size: int) -> 'TablePalette':
+        """
+        :param settings: QSettings obj (any object with value(key))
+        :param cellSetting: cell color setting prefix - the call count index is appended
+        :param textSetting: text color setting prefix
+        :param size: amount of colors
+        """
+        return cls([parseColor(settings.value(cellSetting + str(i))) for i in range(size)],
+                   [parseColor(settings.value(textSetting + str(i))) for i in range(size)])
+
+    @classmethod
+    def default(cls) -> 'TablePalette':
+        """
+        :return: TablePalette of the default colors - as the tables look before any color is changed
+        """
+        return cls(DEFAULT_CELL_COLORS, DEFAULT_MAJORITY_COLORS)
+
+    def __len__(self):
+        return len(self.cellColors)
+
+    def cellColor(self, count: int) -> RGB:
+        """
+        :param count: amount of calls of a gene
+        """
+        return self.cellColors[count - 1]
+
+    def textColor(self, count: int) -> RGB:
+        """
+        :param count: amount of calls of a gene
+        """
+        return self.textColors[count - 1]
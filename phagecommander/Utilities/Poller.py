@@ -0,0 +1,207 @@
+"""
+Adaptive polling of remote tool jobs
+Tools which hand back a job key / job ID (GLIMMER, GeneMark, RAST) are polled until their result is ready:
+    * the first poll is scheduled from the completion times of past jobs of the same tool
+    * later polls back off exponentially, with jitter so concurrent jobs do not poll in lockstep
+    * polling gives up once the tool's deadline passes (PollTimeout)
+poll() is a job generator (see Jobs) and is used with "yield from" inside query methods.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict
+from phagecommander.Utilities import Jobs
+from phagecommander.Utilities.Tools import *
+
+
+class PollError(Exception):
+    """
+    Base Error Class for polling
+    """
+    pass
+
+
+class PollTimeout(PollError):
+    """
+    Raised when a job is not complete before its deadline
+    """
+    pass
+
+
+class PollCancelled(PollError):
+    """
+    Raised when polling is cancelled
+    """
+    pass
+
+
+class PollPolicy:
+    """
+    Class for representing the polling schedule of a tool
+    """
+
+    def __init__(self, initialDelay: float, maxDelay: float, deadline: float, factor: float = 2.0,
+                 jitter: float = 0.25, minDelay: float = None):
+        """
+        :param initialDelay: delay before the first poll when there is no completion history
+        :param maxDelay: longest delay between two polls
+        :param deadline: seconds after which polling gives up
+        :param factor: multiplier of the delay after each incomplete poll
+        :param jitter: maximum fraction the delay is randomly shortened / lengthened by
+        :param minDelay: shortest delay between two polls - defaults to initialDelay
+        """
+        self.initialDelay = initialDelay
+        self.maxDelay = maxDelay
+        self.deadline = deadline
+        self.factor = factor
+        self.jitter = jitter
+        self.minDelay = initialDelay if minDelay is None else minDelay
+
+    def delays(self, firstDelay: float = None):
+        """
+        :param firstDelay: learned delay before the first poll - polls after it back off from initialDelay
+        :return: infinite generator of delays between polls (without jitter)
+        """
+        delay = self.initialDelay
+        if firstDelay is not None:
+            yield max(firstDelay, self.minDelay)
+            delay = max(self.minDelay, self.initialDelay / self.factor)
+        delay = min(max(delay, self.minDelay), self.maxDelay)
+        while True:
+            yield delay
+            delay = min(delay * self.factor, self.maxDelay)
+
+    def withJitter(self, delay: float) -> float:
+        """
+        :return: delay randomly shortened or lengthened by up to jitter
+        """
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def __repr__(self):
+        return 'PollPolicy(initialDelay={}, maxDelay={}, deadline={})'.format(self.initialDelay, self.maxDelay,
+                                                                            self.deadline)
+
+
+# polling schedules of the job based tools
+DEFAULT_POLICIES = {GLIMMER: PollPolicy(initialDelay=2, maxDelay=30, deadline=30 * 60, minDelay=1),
+                    GENEMARK: PollPolicy(initialDelay=2, maxDelay=30, deadline=30 * 60, minDelay=1),
+                    RAST: PollPolicy(initialDelay=15, maxDelay=10 * 60, deadline=24 * 60 * 60, minDelay=10)}
+DEFAULT_POLICY = PollPolicy(initialDelay=2, maxDelay=60, deadline=60 * 60, minDelay=1)
+
+
+class CompletionHistory:
+    """
+    Class for learning how long jobs of each tool take to complete
+    Keeps an exponentially weighted moving average of completion times per tool
+    Safe to use from multiple threads at once
+    """
+
+    # weight of the newest completion time
+    SMOOTHING = 0.3
+    # fraction of the expected completion time before the first poll
+    FIRST_POLL_FRACTION = 0.8
+
+    def __init__(self):
+        self._averages = dict()
+        self._lock = threading.Lock()
+
+    def record(self, tool: str, seconds: float):
+        """
+        Records the completion time of a job
+        :param tool: tool name
+        :param seconds: time from submission to a complete result
+        """
+        with self._lock:
+            average = self._averages.get(tool)
+            if average is None:
+                self._averages[tool] = seconds
+            else:
+                self._averages[tool] = (1 - self.SMOOTHING) * average + self.SMOOTHING * seconds
+
+    def expected(self, tool: str) -> float:
+        """
+        :return: expected completion time of the tool's jobs, None if unknown
+        """
+        with self._lock:
+            return self._averages.get(tool)
+
+    def firstDelay(self, tool: str) -> float:
+        """
+        :return: learned delay before the first poll, None if there is no history for the tool
+        """
+        expected = self.expected(tool)
+        return None if expected is None else expected * self.FIRST_POLL_FRACTION
+
+    def load(self, path: str):
+        """
+        Loads completion times saved by save() - missing or invalid files are ignored
+        """
+        try:
+            with open(path, 'r') as historyFile:
+                averages = json.load(historyFile)
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            self._averages.update({tool: float(seconds) for tool, seconds in averages.items()
+                                   if isinstance(seconds, (int, float))})
+
+    def save(self, path: str):
+        """
+        Saves the completion times as JSON
+        """
+        with self._lock:
+            averages = dict(self._averages)
+        directory = os.path.dirname(path)
+        if directory != '':
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as historyFile:
+            json.dump(averages, historyFile)
+
+    def toDict(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._averages)
+
+
+# completion times shared by every query of this process
+history = CompletionHistory()
+
+
+def poll(tool: str, check: Callable[[], object], policy: PollPolicy = None, cancelled: Callable[[], bool] = None,
+         completionHistory: CompletionHistory = None):
+    """
+    Job generator polling until a remote job is complete
+    Usage (inside a job generator): result = yield from Poller.poll(GLIMMER, checkFunc)
+    :param tool: tool name - selects the default policy and completion history
+    :param check: called at each poll - returns the result once the job is complete, None / False otherwise
+    :param policy: PollPolicy - defaults to the tool's policy in DEFAULT_POLICIES
+    :param cancelled: called before each poll - polling stops with PollCancelled once it returns True
+    :param completionHistory: CompletionHistory to learn from / record to - defaults to the shared history
+    :return: result of check
+    """
+    if policy is None:
+        policy = DEFAULT_POLICIES.get(tool, DEFAULT_POLICY)
+    if completionHistory is None:
+        completionHistory = history
+
+    started = time.monotonic()
+    for delay in policy.delays(completionHistory.firstDelay(tool)):
+        # never sleep past the deadline
+        remaining = policy.deadline - (time.monotonic() - started)
+        if remaining <= 0:
+            break
+        yield Jobs.Wait(min(policy.withJitter(delay), remaining))
+
+        if cancelled is not None and cancelled():
+            raise PollCancelled('Polling cancelled')
+        Jobs.checkCancelled()
+
+        result = check()
+        if result is not None and result is not False:
+            completionHistory.record(tool, time.monotonic() - started)
+            return result
+
+    raise PollTimeout('Job did not complete within {:g} minutes - check server status'.format(
+        round(policy.deadline / 60, 1)))
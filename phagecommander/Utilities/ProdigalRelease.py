@@ -2,7 +2,7 @@ import platform
 import os
 from subprocess import Popen, PIPE
 import pathlib
-import requests
+from phagecommander.Utilities import Transport
 import bs4
 import re
 
@@ -51,7 +51,7 @@ class ProdigalRelease:
             raise ValueError('Prodigal does not support this system: {}'.format(system))
 
         # download file
-        with requests.get(self.releaseUrls[system]) as r:
+        with Transport.get(self.releaseUrls[system]) as r:
             r.raise_for_status()
             fileName = 'prodigal-{}-{}'.format(self.version, system)
             if system == _WINDOWS:
@@ -77,7 +77,7 @@ class ProdigalRelease:
             * version
             * download URLs for each supported system
         """
-        self._releaseRequest = requests.get(PRODIGAL_RELEASE_URL)
+        self._releaseRequest = Transport.get(PRODIGAL_RELEASE_URL)
         self._releaseSoup = bs4.BeautifulSoup(self._releaseRequest.text, 'html.parser')
         latestRelease = self._releaseSoup.find(attrs={'class': 'release-entry'})
 
@@ -0,0 +1,367 @@
+"""
+SQLite project database
+Holds many genomes in one file - their contigs, the runs of every tool (calls or error), the raw tool outputs and
+one row per call - so questions across genomes (ex: how often Glimmer and Prodigal agree) are single SQL queries
+instead of opening every session.
+* calls are indexed by (genome, strand, key coordinate) - key is the stop (+) / start (-) identifying a call's
+  gene (see GeneFeature.key) - and by tool; both indexes carry the other gene columns, so gene counts and tool
+  comparisons never read the calls table itself
+* sequences and raw outputs are stored zlib compressed; sequences of a genome loaded with lazy=True are read
+  when first used, while the store is still open
+* A ProjectStore (sqlite3 connection) is used from a single thread
+"""
+
+import json
+import sqlite3
+import time
+import zlib
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+from phagecommander import Gene
+from phagecommander.Utilities.Session import ToolError
+from phagecommander.Utilities.QueryData import Contig, QueryData
+from phagecommander.Utilities.Tools import *
+
+SCHEMA_VERSION = 1
+
+# run status values
+STATUS_CALLS = 'calls'
+STATUS_ERROR = 'error'
+STATUS_NONE = 'none'
+
+# strand column values (as GeneTable)
+_STRANDS = {'+': 1, '-': -1}
+_DIRECTIONS = {1: '+', -1: '-'}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS genomes (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    species TEXT NOT NULL DEFAULT '',
+    fileName TEXT NOT NULL DEFAULT '',
+    selected TEXT NOT NULL DEFAULT '{}',
+    rastUser TEXT,
+    rastJobID TEXT,
+    saved REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS contigs (
+    genome INTEGER NOT NULL REFERENCES genomes (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    length INTEGER NOT NULL,
+    sequence BLOB NOT NULL,
+    PRIMARY KEY (genome, position)
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    genome INTEGER NOT NULL REFERENCES genomes (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    tool TEXT NOT NULL,
+    version TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL,
+    calls INTEGER NOT NULL DEFAULT 0,
+    errorType TEXT,
+    errorMessage TEXT
+);
+CREATE TABLE IF NOT EXISTS outputs (
+    run INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    contig INTEGER NOT NULL,
+    output BLOB NOT NULL,
+    PRIMARY KEY (run, contig)
+);
+CREATE TABLE IF NOT EXISTS calls (
+    genome INTEGER NOT NULL REFERENCES genomes (id) ON DELETE CASCADE,
+    run INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    tool TEXT NOT NULL,
+    contig INTEGER NOT NULL,
+    strand INTEGER NOT NULL,
+    start INTEGER NOT NULL,
+    stop INTEGER NOT NULL,
+    key INTEGER NOT NULL,
+    partial INTEGER NOT NULL DEFAULT 0,
+    type TEXT
+);
+CREATE INDEX IF NOT EXISTS callsGene ON calls (genome, strand, key, contig, tool);
+CREATE INDEX IF NOT EXISTS callsTool ON calls (tool, genome, contig, strand, key);
+CREATE INDEX IF NOT EXISTS callsRun ON calls (run);
+CREATE INDEX IF NOT EXISTS runsGenome ON runs (genome);
+"""
+
+
+class ProjectStoreError(Exception):
+    pass
+
+
+def _rawBytes(raw) -> bytes:
+    """
+    :param raw: raw tool output - str, bytes or RawOutput
+    """
+    if isinstance(raw, str):
+        return raw.encode('utf-8')
+    if isinstance(raw, (bytes, bytearray)):
+        return bytes(raw)
+    return b''.join(raw.chunks())
+
+
+class ProjectStore:
+    """
+    Class for storing the genomes of a project in a SQLite database
+    """
+
+    def __init__(self, fileName: str = ':memory:'):
+        """
+        :param fileName: path of the database - created if it does not exist
+        :raises ProjectStoreError: if the database was created by a newer version
+        """
+        self.fileName = fileName
+        self.connection = sqlite3.connect(fileName)
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        if fileName != ':memory:':
+            self.connection.execute('PRAGMA journal_mode = WAL')
+
+        version = self.connection.execute('PRAGMA user_version').fetchone()[0]
+        if version > SCHEMA_VERSION:
+            self.connection.close()
+            raise ProjectStoreError('Project format {} is newer than supported ({})'.format(version,
+                                                                                          SCHEMA_VERSION))
+        with self.connection:
+            self.connection.executescript(_SCHEMA)
+            self.connection.execute('PRAGMA user_version = {}'.format(SCHEMA_VERSION))
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+    # GENOMES ----
+    def _genomeId(self, name: str) -> int:
+        row = self.connection.execute('SELECT id FROM genomes WHERE name = ?', (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return row[0]
+
+    def genomes(self) -> List[str]:
+        """
+        :return: genome names in order of their first save
+        """
+        return [name for name, in self.connection.execute('SELECT name FROM genomes ORDER BY id')]
+
+    def __contains__(self, name: str):
+        return self.connection.execute('SELECT 1 FROM genomes WHERE name = ?', (name,)).fetchone() is not None
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM genomes').fetchone()[0]
+
+    def summary(self) -> List[Tuple[str, str, int, int, int]]:
+        """
+        :return: (name, species, contigs, total length, calls) of every genome
+        """
+        return self.connection.execute(
+            'SELECT name, species, '
+            '(SELECT COUNT(*) FROM contigs WHERE genome = genomes.id), '
+            '(SELECT IFNULL(SUM(length), 0) FROM contigs WHERE genome = genomes.id), '
+            '(SELECT IFNULL(SUM(calls), 0) FROM runs WHERE genome = genomes.id) '
+            'FROM genomes ORDER BY id').fetchall()
+
+    def saveGenome(self, name: str, queryData: QueryData, outputs: Mapping[Tuple[str, str], object] = None) -> int:
+        """
+        Stores a genome - replacing a stored genome of the same name
+        :param name: genome name
+        :param queryData: contigs and tool data of the genome
+        :param outputs: {(tool, contig name): raw tool output} - str, bytes or RawOutput
+        :return: id of the genome
+        """
+        outputs = outputs or dict()
+        # read before the stored genome is replaced - the contigs may have been loaded lazily from it
+        sequences = [zlib.compress(contig.sequence.encode('utf-8')) for contig in queryData.contigs]
+        contigPositions = {contig.name: position for position, contig in enumerate(queryData.contigs)}
+        with self.connection:
+            self.connection.execute('DELETE FROM genomes WHERE name = ?', (name,))
+            genome = self.connection.execute(
+                'INSERT INTO genomes (name, species, fileName, selected, rastUser, rastJobID, saved) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (name, queryData.species, queryData.fileName, json.dumps(queryData.tools), queryData.rastUser,
+                 queryData.rastJobID, time.time())).lastrowid
+            self.connection.executemany(
+                'INSERT INTO contigs (genome, position, name, description, length, sequence) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                ((genome, position, contig.name, contig.description, contig.length, sequence)
+                 for position, (contig, sequence) in enumerate(zip(queryData.contigs, sequences))))
+
+            for position, (tool, data) in enumerate(queryData.toolData.items()):
+                if isinstance(data, list):
+                    status, error = STATUS_CALLS, (None, None)
+                elif isinstance(data, Exception):
+                    status, error = STATUS_ERROR, (getattr(data, 'kind', type(data).__name__), str(data))
+                else:
+                    status, error = STATUS_NONE, (None, None)
+                run = self.connection.execute(
+                    'INSERT INTO runs (genome, position, tool, version, status, calls, errorType, errorMessage) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (genome, position, tool, TOOL_VERSIONS.get(tool, ''), status,
+                     len(data) if status == STATUS_CALLS else 0) + error).lastrowid
+                if status == STATUS_CALLS:
+                    self.connection.executemany(
+                        'INSERT INTO calls (genome, run, tool, contig, strand, start, stop, key, partial, type) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                        ((genome, run, tool, contigPositions.setdefault(feature.contig, len(contigPositions)),
+                          _STRANDS[feature.direction], feature.start, feature.stop, feature.key[2],
+                          getattr(feature, 'partialStart', False) | getattr(feature, 'partialStop', False) << 1,
+                          getattr(feature, 'type', None)) for feature in data))
+                self.connection.executemany(
+                    'INSERT INTO outputs (run, contig, output) VALUES (?, ?, ?)',
+                    ((run, contigPositions.setdefault(contig, len(contigPositions)), zlib.compress(_rawBytes(raw)))
+                     for (outputTool, contig), raw in outputs.items() if outputTool == tool))
+        return genome
+
+    def loadGenome(self, name: str, lazy: bool = False) -> QueryData:
+        """
+        :param name: genome name
+        :param lazy: True to read each contig's sequence the first time it is used - only while the store is open,
+            reading a sequence after close() raises sqlite3.ProgrammingError
+        :return: QueryData of the genome
+        :raises KeyError: if no genome of the name is stored
+        """
+        genome = self._genomeId(name)
+        species, fileName, selected, rastUser, rastJobID = self.connection.execute(
+            'SELECT species, fileName, selected, rastUser, rastJobID FROM genomes WHERE id = ?', (genome,)).fetchone()
+        queryData = QueryData()
+        queryData.species = species
+        queryData.fileName = fileName
+        queryData.tools = json.loads(selected)
+        queryData.rastUser = rastUser
+        queryData.rastJobID = rastJobID
+
+        contigNames = []
+        for position, contigName, description, length in self.connection.execute(
+                'SELECT position, name, description, length FROM contigs WHERE genome = ? ORDER BY position',
+                (genome,)):
+            contigNames.append(contigName)
+            if lazy:
+                queryData.contigs.append(Contig(contigName, None, description, length=length,
+                                                loader=lambda position=position: self._sequence(genome, position)))
+            else:
+                queryData.contigs.append(Contig(contigName, self._sequence(genome, position), description))
+
+        for run, tool, status, errorType, errorMessage in self.connection.execute(
+                'SELECT id, tool, status, errorType, errorMessage FROM runs WHERE genome = ? ORDER BY position',
+                (genome,)).fetchall():
+            if status == STATUS_CALLS:
+                queryData.toolData[tool] = self._runCalls(run, tool, contigNames)
+            elif status == STATUS_ERROR:
+                queryData.toolData[tool] = ToolError(errorType, errorMessage)
+            else:
+                queryData.toolData[tool] = None
+        return queryData
+
+    def _sequence(self, genome: int, position: int) -> str:
+        sequence, = self.connection.execute('SELECT sequence FROM contigs WHERE genome = ? AND position = ?',
+                                            (genome, position)).fetchone()
+        return zlib.decompress(sequence).decode('utf-8')
+
+    def _runCalls(self, run: int, tool: str, contigNames: List[str]) -> List[Gene.GeneFeature]:
+        features = []
+        for contig, strand, start, stop, partial, trnaType in self.connection.execute(
+                'SELECT contig, strand, start, stop, partial, type FROM calls WHERE run = ? ORDER BY rowid', (run,)):
+            contigName = contigNames[contig] if contig < len(contigNames) else ''
+            if trnaType is not None:
+                features.append(Gene.TRNA(start, stop, _DIRECTIONS[strand], trnaType, identity=tool,
+                                          contig=contigName))
+            else:
+                features.append(Gene.Gene(start, stop, _DIRECTIONS[strand], tool, contigName, bool(partial & 1),
+                                          bool(partial & 2)))
+        return features
+
+    def deleteGenome(self, name: str):
+        """
+        :raises KeyError: if no genome of the name is stored
+        """
+        with self.connection:
+            if self.connection.execute('DELETE FROM genomes WHERE name = ?', (name,)).rowcount == 0:
+                raise KeyError(name)
+
+    def rawOutput(self, name: str, tool: str, contig: str = None) -> bytes:
+        """
+        :param name: genome name
+        :param tool: tool name
+        :param contig: contig name - the first contig if None
+        :return: raw output of the tool's last run on the contig - None if it was not stored
+        """
+        genome = self._genomeId(name)
+        row = self.connection.execute(
+            'SELECT outputs.output FROM outputs JOIN runs ON runs.id = outputs.run '
+            'JOIN contigs ON contigs.genome = runs.genome AND contigs.position = outputs.contig '
+            'WHERE runs.genome = ? AND runs.tool = ? AND (? IS NULL OR contigs.name = ?) '
+            'ORDER BY outputs.contig LIMIT 1', (genome, tool, contig, contig)).fetchone()
+        return None if row is None else zlib.decompress(row[0])
+
+    # QUERIES ----
+    def query(self, sql: str, parameters: Iterable = ()) -> list:
+        """
+        Runs a query of the project (see _SCHEMA for the tables)
+        :return: rows of the result
+        """
+        return self.connection.execute(sql, tuple(parameters)).fetchall()
+
+    def callCounts(self, tool: str) -> Dict[str, int]:
+        """
+        :return: {genome: amount of calls of the tool} of every genome the tool returned calls for
+        """
+        return dict(self.connection.execute(
+            'SELECT genomes.name, runs.calls FROM runs JOIN genomes ON genomes.id = runs.genome '
+            'WHERE runs.tool = ? AND runs.status = ? ORDER BY genomes.id', (tool, STATUS_CALLS)))
+
+    def geneCounts(self, tools: Iterable[str] = GENE_TOOLS) -> Dict[str, int]:
+        """
+        :param tools: tools to include
+        :return: {genome: amount of consensus genes (distinct genes called by any of the tools)} - genomes without
+            calls of the tools are 0
+        """
+        tools = list(tools)
+        counts = dict.fromkeys(self.genomes(), 0)
+        counts.update(self.connection.execute(
+            'SELECT genomes.name, COUNT(*) FROM '
+            '(SELECT DISTINCT genome, contig, strand, key FROM calls WHERE tool IN ({})) AS genes '
+            'JOIN genomes ON genomes.id = genes.genome GROUP BY genes.genome'.format(', '.join('?' * len(tools))),
+            tools))
+        return counts
+
+    def genomesWithFewerGenes(self, count: int, tools: Iterable[str] = GENE_TOOLS) -> List[str]:
+        """
+        :return: genomes with fewer than count consensus genes (see geneCounts)
+        """
+        return [name for name, genes in self.geneCounts(tools).items() if genes < count]
+
+    def agreement(self, first: str, second: str, sameStart: bool = False) -> Dict[str, Tuple[int, int, int]]:
+        """
+        Compares the genes called by two tools in every genome both returned calls for
+        :param first: tool name
+        :param second: tool name
+        :param sameStart: True to only count a gene as shared if both tools called the same start
+        :return: {genome: (shared genes, genes only called by first, genes only called by second)}
+        """
+        columns = 'contig, strand, key, start, stop' if sameStart else 'contig, strand, key'
+        startMatch = 'AND b.start = a.start AND b.stop = a.stop' if sameStart else ''
+        shared = dict(self.connection.execute(
+            'SELECT genome, COUNT(*) FROM (SELECT DISTINCT genome, {} FROM calls AS a WHERE tool = ? AND EXISTS '
+            '(SELECT 1 FROM calls AS b WHERE b.genome = a.genome AND b.strand = a.strand AND b.key = a.key '
+            'AND b.contig = a.contig AND b.tool = ? {})) GROUP BY genome'.format(columns, startMatch),
+            (first, second)))
+
+        def distinct(tool):
+            return dict(self.connection.execute(
+                'SELECT genome, COUNT(*) FROM (SELECT DISTINCT genome, {} FROM calls WHERE tool = ?) '
+                'GROUP BY genome'.format(columns), (tool,)))
+
+        firstCounts, secondCounts = distinct(first), distinct(second)
+        names = dict(self.connection.execute('SELECT id, name FROM genomes'))
+        result = dict()
+        for genome in sorted(set(firstCounts) & set(secondCounts)):
+            both = shared.get(genome, 0)
+            result[names[genome]] = (both, firstCounts[genome] - both, secondCounts[genome] - both)
+        return result
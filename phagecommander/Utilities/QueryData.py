@@ -1,3 +1,193 @@
+from typing import Callable, List, Optional
+from phagecommander.Utilities.Consensus import Consensus
+from phagecommander.Utilities.GeneIndex import GeneIndex
+from phagecommander.Utilities.IntervalIndex import IntervalIndex, Conflict, conflictReport, DEFAULT_MIN_GENE_OVERLAP
+from phagecommander.Utilities.Tools import *
 
 
+class Contig:
+    """
+    Class for representing a single record of the queried FASTA file
+    """
 
+    def __init__(self, name: str, sequence: Optional[str], description: str = '', length: int = None,
+                 loader: Callable[[], str] = None):
+        """
+        :param name: record name
+        :param sequence: DNA sequence - None if it is read by the loader the first time it is used
+        :param description: FASTA header line
+        :param length: sequence length - used until the sequence is loaded
+        :param loader: function returning the sequence (ex: reading it from a session)
+        """
+        self.name = name
+        self._sequence = sequence
+        self.description = description
+        self._length = len(sequence) if sequence is not None else (length or 0)
+        self._loader = loader
+
+    def __getstate__(self):
+        # same state as contigs pickled before sequences were loaded lazily
+        return {'name': self.name, 'sequence': self.sequence, 'description': self.description}
+
+    def __setstate__(self, state):
+        self.__init__(state['name'], state['sequence'], state.get('description', ''))
+
+    @property
+    def sequence(self) -> str:
+        if self._sequence is None:
+            self._sequence = self._loader() if self._loader is not None else ''
+            self._length = len(self._sequence)
+            self._loader = None
+        return self._sequence
+
+    @property
+    def loaded(self) -> bool:
+        """
+        :return: True if the sequence has been read
+        """
+        return self._sequence is not None
+
+    @property
+    def length(self):
+        return self._length
+
+    def __repr__(self):
+        return 'Contig(name={}, length={})'.format(self.name, self.length)
+
+
+class QueryData:
+    """
+    Class for representing tool/species selections
+    """
+
+    def __init__(self):
+        # tools to call
+        self.tools = {key: True for key in TOOL_NAMES}
+        # species of the DNA sequence
+        self.species = ''
+        # path of the DNA file
+        self.fileName = ''
+        # tool data
+        # Key - tool (from TOOL_NAMES)
+        # Value - List of Genes (from every contig)
+        self.toolData = dict()
+        # records of the DNA file - List[Contig] in file order
+        self.contigs = []
+        # RAST related information
+        self.rastUser = ''
+        self.rastPass = ''
+        self.rastJobID = None
+        # indexes built from the tool data (consensus, gene index, interval indexes) - see clearIndexes()
+        self.indexCache = dict()
+
+    def __setstate__(self, state):
+        """
+        Upgrades sessions pickled before multiple contigs were supported
+        * The single "sequence" (SeqRecord) becomes the only contig
+        """
+        if 'contigs' not in state:
+            sequence = state.pop('sequence', '')
+            if isinstance(sequence, str):
+                state['contigs'] = [Contig('', sequence)] if sequence != '' else []
+            else:
+                state['contigs'] = [Contig('', str(sequence.seq), sequence.description)]
+        # indexes are rebuilt on demand
+        state.pop('contigIndexes', None)
+        state['indexCache'] = dict()
+        self.__dict__.update(state)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['indexCache'] = dict()
+        return state
+
+    @property
+    def sequence(self) -> str:
+        """
+        :return: sequence of the first contig
+        """
+        return self.contigs[0].sequence if len(self.contigs) != 0 else ''
+
+    def contigNames(self) -> List[str]:
+        return [contig.name for contig in self.contigs]
+
+    def buildIndexes(self):
+        """
+        Rebuilds the consensus, gene index and interval indexes of the gene and tRNA tools from the tool data
+        * Tools which returned errors are skipped
+        """
+        self.clearIndexes()
+        self.consensus(GENE_TOOLS)
+        self.consensus(TRNA_TOOLS)
+        self.geneIndex()
+        self.intervalIndex(GENE_TOOLS)
+        self.intervalIndex(TRNA_TOOLS)
+        self.consensusIntervalIndex()
+
+    def clearIndexes(self):
+        """
+        Discards the indexes built from the previous tool data
+        """
+        self.indexCache = dict()
+
+    def _cached(self, key: tuple, build):
+        if key not in self.indexCache:
+            self.indexCache[key] = build()
+        return self.indexCache[key]
+
+    def usedTools(self, toolList: List[str]) -> List[str]:
+        """
+        :param toolList: tools to include
+        :return: tools of toolList which returned calls, in query order - failed / not queried tools are left out
+        """
+        return [tool for tool, data in self.toolData.items() if tool in toolList and isinstance(data, list)]
+
+    def consensus(self, toolList: List[str]) -> Consensus:
+        """
+        :param toolList: tools to include
+        :return: consensus of the given tools' genes - per contig (in file order), sorted by their stop (+) /
+            start (-)
+        """
+        tools = tuple(self.usedTools(toolList))
+        return self._cached(('consensus', tools),
+                            lambda: Consensus.fromToolData(self.toolData, tools, self.contigNames()))
+
+    def geneIndex(self) -> GeneIndex:
+        """
+        :return: calls of every tool by gene
+        """
+        return self._cached(('geneIndex',), lambda: GeneIndex.fromToolData(self.toolData))
+
+    def intervalIndex(self, toolList: List[str]) -> IntervalIndex:
+        """
+        :param toolList: tools to include
+        :return: index of the given tools' calls by region
+        """
+        tools = tuple(self.usedTools(toolList))
+        return self._cached(('intervalIndex', tools),
+                            lambda: IntervalIndex.fromToolData(self.toolData, tools, self.contigNames()))
+
+    def consensusIntervalIndex(self) -> IntervalIndex:
+        """
+        :return: index of the consensus genes (the most called start of each gene) by region
+        """
+        return self._cached(('consensusIntervalIndex',),
+                            lambda: IntervalIndex.fromGenes(self.consensus(GENE_TOOLS).representatives(),
+                                                            self.contigNames()))
+
+    def conflicts(self, minGeneOverlap: int = DEFAULT_MIN_GENE_OVERLAP) -> List[Conflict]:
+        """
+        Reports consensus genes overlapping a tRNA or another consensus gene
+        :param minGeneOverlap: minimum shared bases of two genes - shorter overlaps of neighbouring genes are
+            ordinary
+        :return: List[Conflict] (see IntervalIndex.conflictReport)
+        """
+        return conflictReport(self.consensusIntervalIndex(), self.intervalIndex(TRNA_TOOLS), minGeneOverlap)
+
+    def wipeUserCredentials(self):
+        """
+        Deletes any data relating to a RAST query
+        """
+        self.rastJobID = None
+        self.rastUser = None
+        self.rastPass = None
@@ -0,0 +1,336 @@
+"""
+asyncio query engine
+Every tool query of every contig runs as a coroutine on a single event loop:
+    * blocking steps (HTTP round-trips, parsing, cache access) run on a small shared thread pool
+    * waits between polls are asyncio sleeps and do not hold a thread
+    * local tools (Prodigal) run as asyncio subprocesses
+The engine has no GUI dependencies - QueryManager bridges it to Qt signals.
+
+Cancelling the engine cancels its Jobs.CancelToken - open requests are aborted, subprocesses are killed
+and each job generator is closed (running its cleanup) once its in-flight step returns.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+from phagecommander import Gene
+from phagecommander.Utilities import Jobs
+from phagecommander.Utilities.ResultCache import ResultCache
+from phagecommander.Utilities.Tools import *
+
+# mappings of tool names to appropriate methods
+# [queryMethod, parseMethod]
+TOOL_METHODS = {GENEMARK: [Gene.GeneFile.genemark_query,
+                           Gene.GeneParse.parse_genemark],
+                HMM: [Gene.GeneFile.genemarkhmm_query,
+                      Gene.GeneParse.parse_genemarkHmm],
+                HEURISTIC: [Gene.GeneFile.genemark_heuristic_query,
+                            Gene.GeneParse.parse_genemarkHeuristic],
+                GENEMARKS: [Gene.GeneFile.genemarks_query,
+                            Gene.GeneParse.parse_genemarkS],
+                GENEMARKS2: [Gene.GeneFile.genemarks2_query,
+                             Gene.GeneParse.parse_genemarkS2],
+                GLIMMER: [Gene.GeneFile.glimmer_query,
+                          Gene.GeneParse.parse_glimmer],
+                PRODIGAL: [Gene.GeneFile.prodigal_query,
+                           Gene.GeneParse.parse_prodigal],
+                RAST: [Gene.GeneFile.rastQuery,
+                       Gene.GeneParse.parse_rast],
+                METAGENE: [Gene.GeneFile.metageneQuery,
+                           Gene.GeneParse.parse_metagene],
+                ARAGORN: [Gene.GeneFile.aragornQuery,
+                          Gene.GeneParse.parse_aragorn]}
+
+DEFAULT_MAX_CONCURRENT = 8
+DEFAULT_MAX_WORKERS = 8
+
+
+class QueryJob:
+    """
+    Class for representing the query of one tool for one contig
+    """
+
+    def __init__(self, geneFile, tool: str, queryData, options: dict = None):
+        """
+        :param geneFile: GeneFile object of a contig of the DNA file
+        :param tool: tool to call (see TOOL_NAMES)
+        :param queryData: QueryData holding the species and RAST credentials
+        :param options: additional keyword arguments of the tool's query method
+        """
+        self.geneFile = geneFile
+        self.tool = tool
+        self.queryData = queryData
+        self.options = options if options is not None else dict()
+        # List of Genes if successful, Exception otherwise
+        self.result = None
+
+    def queryArgs(self) -> dict:
+        """
+        :return: keyword arguments of the tool's query method
+        """
+        args = dict()
+        if self.tool == RAST:
+            # a given jobID only refers to a single sequence
+            jobId = self.queryData.rastJobID if len(self.queryData.contigs) == 1 else None
+            args = {'username': self.queryData.rastUser,
+                    'password': self.queryData.rastPass,
+                    'jobId': jobId}
+        args.update(self.options)
+        return args
+
+    def cacheKey(self) -> str:
+        """
+        :return: ResultCache key of this query
+        """
+        # only GeneMark Hmm depends on the species
+        species = self.geneFile.species if self.tool == HMM else ''
+        parameters = dict()
+        if self.tool == PRODIGAL:
+            parameters['binary'] = self.geneFile.prodigalLocation
+        return ResultCache.key(self.geneFile.file_info['file'][1], self.tool, species, parameters,
+                               TOOL_VERSIONS[self.tool])
+
+    def __repr__(self):
+        return 'QueryJob(tool={}, contig={})'.format(self.tool, self.geneFile.record)
+
+
+class QueryEngine:
+    """
+    Class for running QueryJobs concurrently on one event loop
+    """
+
+    def __init__(self, maxConcurrent: int = DEFAULT_MAX_CONCURRENT, maxWorkers: int = DEFAULT_MAX_WORKERS,
+                 cache: ResultCache = None):
+        """
+        :param maxConcurrent: maximum amount of jobs in progress at once
+        :param maxWorkers: maximum amount of blocking steps (HTTP requests, parsing) running at once
+        :param cache: ResultCache checked before querying a tool - None to always query
+        """
+        self.maxConcurrent = maxConcurrent
+        self.maxWorkers = maxWorkers
+        self.cache = cache
+        self.cancelToken = Jobs.CancelToken()
+        self._executor = None
+        self._loop = None
+        self._task = None
+
+    def run(self, jobs: List[QueryJob], callback: Callable[[QueryJob], None] = None) -> List[QueryJob]:
+        """
+        Runs the jobs to completion on a new event loop in the calling thread
+        :param jobs: List[QueryJob]
+        :param callback: called with each job as it finishes
+        :return: the jobs, each with its result set
+        """
+        try:
+            asyncio.run(self.runAll(jobs, callback))
+        except asyncio.CancelledError:
+            pass
+        return jobs
+
+    async def runAll(self, jobs: List[QueryJob], callback: Callable[[QueryJob], None] = None) -> List[QueryJob]:
+        """
+        Runs the jobs concurrently
+        :param jobs: List[QueryJob]
+        :param callback: called with each job as it finishes
+        :return: the jobs, each with its result set
+        """
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.current_task()
+        # cancelled before the loop started
+        if self.cancelled:
+            return jobs
+        self._executor = ThreadPoolExecutor(max_workers=self.maxWorkers)
+        semaphore = asyncio.Semaphore(self.maxConcurrent)
+
+        async def limitedJob(job):
+            async with semaphore:
+                await self.runJob(job)
+            if callback is not None:
+                callback(job)
+
+        try:
+            await asyncio.gather(*[limitedJob(job) for job in jobs])
+        finally:
+            # in-flight requests of cancelled jobs are not waited on
+            self._executor.shutdown(wait=not self.cancelled)
+            self._task = None
+
+        return jobs
+
+    async def runJob(self, job: QueryJob) -> QueryJob:
+        """
+        Queries the tool, parses its output and stores the result in job.result
+        * Errors are stored as the result instead of being raised
+        """
+        try:
+            job.result = await self._query(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job.result = e
+        return job
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancelToken.cancelled
+
+    def cancel(self):
+        """
+        Cancels every job in progress - safe to call from any thread
+        * Open requests and subprocesses are aborted immediately
+        """
+        self.cancelToken.cancel()
+        loop, task = self._loop, self._task
+        if loop is not None and task is not None:
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                # loop already closed
+                pass
+
+    async def _query(self, job: QueryJob) -> List[Gene.GeneFeature]:
+        queryMethod, parseMethod = TOOL_METHODS[job.tool]
+        geneFile = job.geneFile
+
+        # use a cached result of an identical query if one exists
+        if self.cache is not None:
+            cacheKey = job.cacheKey()
+            cached = await self._call(self.cache.get, cacheKey)
+            if cached is not None:
+                geneFile.query_data[job.tool], genes = cached
+                self._labelContig(genes, geneFile)
+                return genes
+
+        # perform query
+        if hasattr(queryMethod, 'job'):
+            await self._drive(queryMethod.job(geneFile, **job.queryArgs()))
+        else:
+            await self._call(queryMethod, geneFile, **job.queryArgs())
+
+        # perform parsing of data
+        genes = await self._call(parseMethod, geneFile.query_data[job.tool], identity=job.tool)
+        self._labelContig(genes, geneFile)
+
+        if self.cache is not None:
+            try:
+                await self._call(self.cache.put, cacheKey, geneFile.query_data[job.tool], genes)
+            except OSError:
+                # caching failures never fail the query
+                pass
+
+        return genes
+
+    async def _call(self, func, *args, **kwargs):
+        """
+        Runs a blocking function on the engine's thread pool with the engine's CancelToken active
+        """
+        return await asyncio.wrap_future(self._submit(func, *args, **kwargs))
+
+    def _submit(self, func, *args, **kwargs):
+        """
+        :return: concurrent.futures.Future of the function running on the thread pool
+        """
+        def call():
+            with Jobs.activeToken(self.cancelToken):
+                return func(*args, **kwargs)
+
+        return self._executor.submit(call)
+
+    async def _drive(self, job):
+        """
+        Drives a job generator (see Jobs) - blocking steps run on the thread pool,
+        waits and subprocesses run on the event loop
+        :return: return value of the job
+        """
+        value = None
+        while True:
+            future = self._submit(_step, job, value)
+            try:
+                done, step = await asyncio.wrap_future(future)
+                if done:
+                    return step
+
+                value = None
+                if isinstance(step, Jobs.Wait):
+                    await asyncio.sleep(step.seconds)
+                elif isinstance(step, Jobs.Process):
+                    value = await self._runProcess(step)
+            except (asyncio.CancelledError, Jobs.Cancelled):
+                self._close(job, future)
+                raise
+
+    def _close(self, job, future):
+        """
+        Closes a cancelled job generator so its cleanup runs
+        * A generator cannot be closed while a step is executing - it is closed once the step returns
+        * Cleanup runs on the thread pool without a CancelToken, so cleanup requests are not aborted
+        """
+        def close():
+            try:
+                job.close()
+            except Exception:
+                pass
+
+        def submitClose(*args):
+            try:
+                self._executor.submit(close)
+            except RuntimeError:
+                # thread pool already shut down
+                close()
+
+        future.add_done_callback(submitClose)
+
+    async def _runProcess(self, step: Jobs.Process):
+        proc = await asyncio.create_subprocess_shell(step.cmd,
+                                                     stdin=asyncio.subprocess.PIPE,
+                                                     stdout=asyncio.subprocess.PIPE,
+                                                     stderr=asyncio.subprocess.PIPE,
+                                                     **Jobs.PROCESS_OPTIONS)
+        try:
+            stdout, stderr = await proc.communicate(input=step.input)
+        except asyncio.CancelledError:
+            # do not leave the process running
+            Jobs.killProcess(proc)
+            await proc.communicate()
+            raise
+        return proc.returncode, stdout, stderr
+
+    @staticmethod
+    def _labelContig(genes, geneFile):
+        """
+        Labels genes with the contig they were called on
+        """
+        for gene in genes:
+            gene.contig = geneFile.record
+
+
+def _step(job, value):
+    """
+    Advances a job generator by one step
+    * StopIteration cannot be passed through asyncio futures, so completion is returned instead
+    :return: (True, return value) if the job finished, else (False, yielded step)
+    """
+    try:
+        return False, job.send(value)
+    except StopIteration as e:
+        return True, e.value
+
+
+def collectResults(jobs: List[QueryJob]) -> Dict[str, object]:
+    """
+    Merges the per contig results of each tool
+    :param jobs: finished QueryJobs
+    :return: {tool: List[Gene]} - the tool's first Exception if any of its jobs failed
+    """
+    results = dict()
+    for job in jobs:
+        results.setdefault(job.tool, [])
+        if isinstance(job.result, Exception):
+            if not isinstance(results[job.tool], Exception):
+                results[job.tool] = job.result
+        elif not isinstance(results[job.tool], Exception):
+            if job.result is None:
+                results[job.tool] = RuntimeError('Query did not complete')
+            else:
+                results[job.tool].extend(job.result)
+    return results
@@ -1,10 +1,10 @@
 import os
 import time
-import requests
 from bs4 import BeautifulSoup
 from ruamel import yaml
+from phagecommander.Utilities import Fasta, Transport, Endpoints
 
-RAST_URL = 'https://pubseed.theseed.org/rast/server.cgi'
+# RAST website for users - server requests go through Endpoints
 RAST_USER_URL = 'https://rast.nmpdr.org/rast.cgi'
 
 
@@ -50,12 +50,11 @@ class Rast:
         Check to see if given credentials are valid
         :return: True/False
         """
-        _LOGIN_URL = 'https://rast.nmpdr.org/rast.cgi'
         args = {'page': 'Home',
                 'login': self.username,
                 'password': self.password,
                 'action': 'perform_login'}
-        checkReq = requests.post(_LOGIN_URL, data=args)
+        checkReq = Transport.post(Endpoints.url(Endpoints.RAST_LOGIN), data=args)
         checkReq.raise_for_status()
 
         # check for status of login - can be derived from <title> tag
@@ -66,22 +65,24 @@ class Rast:
         else:
             return False
 
-    def submit(self, filePath: str, sequenceName: str):
+    def submit(self, filePath: str, sequenceName: str, fastaContent: str = None):
         """
         Submits a file for annotation
         :param filePath: name of a fasta file
         :param sequenceName: name of the sequence
+        :param fastaContent: content of the fasta file if already loaded
         Raises RastException if not successful
         """
         _SUBMIT_FUNCTION = 'submit_RAST_job'
 
-        # check if file exists
-        if not os.path.exists(filePath):
-            raise FileNotFoundError('\"{}\" does not exist'.format(filePath))
+        if fastaContent is None:
+            # check if file exists
+            if not os.path.exists(filePath):
+                raise FileNotFoundError('\"{}\" does not exist'.format(filePath))
 
-        # attempt to submit file
-        with open(filePath) as file:
-            fastaContent = file.read()
+            # attempt to submit file
+            with Fasta.FastaFile(filePath) as fasta:
+                fastaContent = fasta.read().decode('utf-8')
 
         # submit args
         args = yaml.dump({'-determineFamily': 0,
@@ -105,7 +106,7 @@ class Rast:
                    'username': self.username,
                    'password': self.password}
 
-        submitReq = requests.post(RAST_URL, data=payload)
+        submitReq = Transport.post(Endpoints.url(Endpoints.RAST), data=payload)
         submitReq.raise_for_status()
 
         submitResponse = yaml.safe_load(submitReq.text)
@@ -138,7 +139,7 @@ class Rast:
                    'password': self.password,
                    'args': args}
 
-        statusReq = requests.post(RAST_URL, data=payload)
+        statusReq = Transport.post(Endpoints.url(Endpoints.RAST), data=payload)
         statusReq.raise_for_status()
         statusContent = yaml.safe_load(statusReq.text)
         jobStatus = statusContent[self.jobId][_SUCCESS_FIELD]
@@ -154,7 +155,7 @@ class Rast:
     def retrieveData(self):
         """
         Retrieves the gff3 data for the associated job
-        :return: gff3 content
+        :return: gff3 content (Spool.RawOutput - spooled to disk when large)
         """
         _RETRIEVE_FUNCTION = 'retrieve_RAST_job'
 
@@ -165,10 +166,7 @@ class Rast:
                    'password': self.password,
                    'args': args}
 
-        retrieveReq = requests.post(RAST_URL, data=payload)
-        retrieveReq.raise_for_status()
-
-        return retrieveReq.text
+        return Transport.download('POST', Endpoints.url(Endpoints.RAST), data=payload)
 
     def deleteJob(self):
         """
@@ -184,7 +182,7 @@ class Rast:
                    'password': self.password,
                    'args': '---\n-job:\n  - {}\n'.format(self.jobId)}
 
-        deleteReq = requests.post(RAST_URL, data=payload)
+        deleteReq = Transport.post(Endpoints.url(Endpoints.RAST), data=payload)
         deleteReq.raise_for_status()
 
         deleteContent = yaml.safe_load(deleteReq.text)
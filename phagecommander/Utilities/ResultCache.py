@@ -0,0 +1,148 @@
+"""
+Content-addressed on-disk cache for tool results
+Entries are keyed by a hash of (sequence, tool, species, tool parameters, tool version) and
+hold the raw tool output along with the parsed genes. The least recently used entries are
+evicted once the total size of the cache exceeds its limit.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+import zlib
+from typing import Any, List, Tuple
+
+_ENTRY_EXTENSION = '.entry'
+DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+
+
+class ResultCache:
+    """
+    Class for storing and retrieving tool results on disk
+    Safe to use from multiple threads at once
+    """
+
+    def __init__(self, directory: str, maxSize: int = DEFAULT_MAX_SIZE):
+        """
+        :param directory: folder to store entries in - created if it does not exist
+        :param maxSize: maximum total size of all entries in bytes
+        """
+        self.directory = str(directory)
+        self.maxSize = maxSize
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._size = sum(size for path, size, accessed in self._entries())
+
+    @staticmethod
+    def key(sequence: bytes, tool: str, species: str = '', parameters: dict = None, version: str = '') -> str:
+        """
+        Generates the cache key of a query
+        :param sequence: sequence data sent to the tool
+        :param tool: tool name
+        :param species: species of the sequence
+        :param parameters: any other tool parameters which change the result
+        :param version: version of the tool
+        :return: hex digest
+        """
+        digest = hashlib.sha256()
+        digest.update(sequence)
+        description = json.dumps([tool, species, parameters or dict(), version], sort_keys=True, default=str)
+        digest.update(description.encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Tuple[str, List[Any]]:
+        """
+        Retrieves an entry and marks it as most recently used
+        :param key: key from ResultCache.key()
+        :return: (raw tool output, parsed genes) or None if not cached
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as entryFile:
+                entry = pickle.loads(zlib.decompress(entryFile.read()))
+            os.utime(path)
+        except (OSError, pickle.UnpicklingError, zlib.error, EOFError, AttributeError, ImportError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return entry['raw'], entry['genes']
+
+    def put(self, key: str, rawData: str, genes: List[Any]):
+        """
+        Stores an entry, evicting least recently used entries if the cache is full
+        :param key: key from ResultCache.key()
+        :param rawData: raw tool output (GeneFile.query_data)
+        :param genes: parsed genes
+        """
+        content = zlib.compress(pickle.dumps({'raw': rawData, 'genes': genes}))
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # write to a temporary file first so readers never see a partial entry
+        fd, tmpPath = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as entryFile:
+            entryFile.write(content)
+
+        with self._lock:
+            if os.path.exists(path):
+                self._size -= os.path.getsize(path)
+            os.replace(tmpPath, path)
+            self._size += len(content)
+
+            if self._size > self.maxSize:
+                self._evict()
+
+    def clear(self):
+        """
+        Removes every entry
+        """
+        with self._lock:
+            for path, size, accessed in self._entries():
+                os.remove(path)
+            self._size = 0
+
+    def stats(self) -> dict:
+        """
+        :return: hit / miss counts of this instance and the current size of the cache
+        """
+        with self._lock:
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'entries': len(list(self._entries())),
+                    'size': self._size}
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + _ENTRY_EXTENSION)
+
+    def _entries(self):
+        """
+        :return: generator of (path, size, last access time) for every entry
+        """
+        for subDir in os.scandir(self.directory):
+            if subDir.is_dir():
+                for entry in os.scandir(subDir.path):
+                    if entry.name.endswith(_ENTRY_EXTENSION):
+                        stat = entry.stat()
+                        yield entry.path, stat.st_size, stat.st_mtime
+
+    def _evict(self):
+        """
+        Removes least recently used entries until the cache fits within maxSize
+        * Caller must hold self._lock
+        """
+        for path, size, accessed in sorted(self._entries(), key=lambda x: x[2]):
+            if self._size <= self.maxSize:
+                break
+            try:
+                os.remove(path)
+                self._size -= size
+            except OSError:
+                pass
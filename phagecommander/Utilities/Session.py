@@ -0,0 +1,267 @@
+"""
+Session files
+A session (.gq) is a zip archive instead of a pickled QueryData, so opening one never runs class code and old
+sessions keep opening when the Gene / QueryData classes change:
+* header.json - format name and version, the query settings, the status of every tool and an index of the contigs
+* calls.npz - calls of every tool as a GeneTable (typed coordinate columns, see GeneTable.save)
+* sequences/<n>.txt - sequence of each contig, read the first time it is used
+Pickled sessions of earlier versions are still opened by load(), and convert() rewrites them as sessions.
+
+Usage (convert pickled sessions in place - the originals are kept as <name>.bak):
+    python -m phagecommander.Utilities.Session old.gq [other.gq ...]
+"""
+
+import argparse
+import functools
+import io
+import json
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import zipfile
+from typing import List
+
+from phagecommander.Utilities.GeneTable import GeneTable
+from phagecommander.Utilities.QueryData import Contig, QueryData
+
+FORMAT_NAME = 'phagecommander-session'
+FORMAT_VERSION = 1
+
+HEADER_MEMBER = 'header.json'
+CALLS_MEMBER = 'calls.npz'
+SEQUENCE_MEMBER = 'sequences/{}.txt'
+
+# tool status values of the header
+STATUS_CALLS = 'calls'
+STATUS_ERROR = 'error'
+STATUS_NONE = 'none'
+
+_ZIP_MAGIC = b'PK\x03\x04'
+
+
+class SessionError(Exception):
+    """
+    Raised for files which are not sessions (or are of a newer format version)
+    """
+
+
+class ToolError(Exception):
+    """
+    Error of a tool restored from a session - the original exception class is not rebuilt
+    """
+
+    def __init__(self, kind: str, message: str):
+        """
+        :param kind: class name of the original exception
+        :param message: str() of the original exception
+        """
+        super().__init__(kind, message)
+        self.kind = kind
+        self.message = message
+
+    def __str__(self):
+        return self.message
+
+
+def isSession(fileName: str) -> bool:
+    """
+    :param fileName: path of a .gq file
+    :return: True if the file is a session archive, False if it is (presumably) a pickled QueryData
+    """
+    with open(fileName, 'rb') as file:
+        return file.read(len(_ZIP_MAGIC)) == _ZIP_MAGIC
+
+
+# SAVE ----
+def _header(queryData: QueryData) -> dict:
+    tools = []
+    for tool, data in queryData.toolData.items():
+        entry = {'name': tool}
+        if isinstance(data, list):
+            entry.update(status=STATUS_CALLS, calls=len(data))
+        elif isinstance(data, Exception):
+            entry.update(status=STATUS_ERROR, error={'type': getattr(data, 'kind', type(data).__name__),
+                                                     'message': str(data)})
+        else:
+            entry.update(status=STATUS_NONE)
+        tools.append(entry)
+
+    contigs = [{'name': contig.name, 'description': contig.description, 'length': contig.length,
+                'member': SEQUENCE_MEMBER.format(ind)} for ind, contig in enumerate(queryData.contigs)]
+    # RAST password is not stored - it is asked for again on the next RAST query
+    return {'format': FORMAT_NAME, 'version': FORMAT_VERSION,
+            'species': queryData.species, 'fileName': queryData.fileName, 'selected': queryData.tools,
+            'rastUser': queryData.rastUser, 'rastJobID': queryData.rastJobID,
+            'tools': tools, 'contigs': contigs}
+
+
+def save(queryData: QueryData, fileName: str):
+    """
+    Saves a session
+    * Written to a temporary file which then replaces fileName, so sequences not loaded yet can still be read
+      from the session being overwritten
+    :param queryData: QueryData to save
+    :param fileName: path of the session
+    """
+    header = _header(queryData)
+    calls = io.BytesIO()
+    GeneTable.fromToolData(queryData.toolData).save(calls)
+
+    directory = os.path.dirname(os.path.abspath(fileName))
+    handle, tempName = tempfile.mkstemp(suffix='.gq', dir=directory)
+    os.close(handle)
+    try:
+        with zipfile.ZipFile(tempName, 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr(HEADER_MEMBER, json.dumps(header, indent=1))
+            # already compressed
+            archive.writestr(CALLS_MEMBER, calls.getvalue(), zipfile.ZIP_STORED)
+            for contig, entry in zip(queryData.contigs, header['contigs']):
+                archive.writestr(entry['member'], contig.sequence)
+        # mkstemp files are private - keep the permissions of the file replaced
+        os.chmod(tempName, os.stat(fileName).st_mode if os.path.exists(fileName) else 0o644)
+        os.replace(tempName, fileName)
+    except BaseException:
+        os.remove(tempName)
+        raise
+
+
+# LOAD ----
+def readHeader(fileName: str) -> dict:
+    """
+    :param fileName: path of a session
+    :return: header of the session - settings, tool status and contig index (no calls or sequences are read)
+    :raises SessionError: if the file is not a session or its format is newer than supported
+    """
+    try:
+        with zipfile.ZipFile(fileName) as archive:
+            header = json.loads(archive.read(HEADER_MEMBER).decode('utf-8'))
+    except (zipfile.BadZipFile, KeyError, ValueError) as e:
+        raise SessionError('File: {} is not a session ({})'.format(fileName, e))
+    if header.get('format') != FORMAT_NAME:
+        raise SessionError('File: {} is not a session'.format(fileName))
+    if header['version'] > FORMAT_VERSION:
+        raise SessionError('Session format {} is newer than supported ({})'.format(header['version'],
+                                                                                  FORMAT_VERSION))
+    return header
+
+
+def _readSequence(fileName: str, member: str) -> str:
+    with zipfile.ZipFile(fileName) as archive:
+        return archive.read(member).decode('utf-8')
+
+
+def loadSession(fileName: str, lazy: bool = True) -> QueryData:
+    """
+    Opens a session
+    :param fileName: path of the session
+    :param lazy: True to read each contig's sequence the first time it is used, False to read them all now
+    :return: QueryData
+    :raises SessionError: if the file is not a session or its format is newer than supported
+    """
+    header = readHeader(fileName)
+    with zipfile.ZipFile(fileName) as archive:
+        table = GeneTable.load(io.BytesIO(archive.read(CALLS_MEMBER)))
+        sequences = {entry['member']: archive.read(entry['member']).decode('utf-8')
+                     for entry in header['contigs']} if not lazy else dict()
+
+    queryData = QueryData()
+    queryData.tools = header['selected']
+    queryData.species = header['species']
+    queryData.fileName = header['fileName']
+    queryData.rastUser = header['rastUser']
+    queryData.rastJobID = header['rastJobID']
+    for entry in header['tools']:
+        tool = entry['name']
+        if entry['status'] == STATUS_CALLS:
+            queryData.toolData[tool] = table.select(tools=[tool]).toGenes()
+        elif entry['status'] == STATUS_ERROR:
+            queryData.toolData[tool] = ToolError(entry['error']['type'], entry['error']['message'])
+        else:
+            queryData.toolData[tool] = None
+    for entry in header['contigs']:
+        if lazy:
+            queryData.contigs.append(Contig(entry['name'], None, entry['description'], length=entry['length'],
+                                            loader=functools.partial(_readSequence, fileName, entry['member'])))
+        else:
+            queryData.contigs.append(Contig(entry['name'], sequences[entry['member']], entry['description']))
+    return queryData
+
+
+def loadPickle(fileName: str) -> QueryData:
+    """
+    Opens a session pickled by earlier versions
+    * Unpickling runs code from the file - only open pickles from trusted sources
+    :param fileName: path of the pickled QueryData
+    :return: QueryData
+    :raises SessionError: if the file does not hold a QueryData
+    """
+    with open(fileName, 'rb') as file:
+        try:
+            queryData = pickle.load(file)
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError, IndexError) as e:
+            raise SessionError('File: {} was not .gq formatted file ({})'.format(fileName, e))
+    if not isinstance(queryData, QueryData):
+        raise SessionError('File: {} was not .gq formatted file'.format(fileName))
+    return queryData
+
+
+def load(fileName: str, lazy: bool = True) -> QueryData:
+    """
+    Opens a session or a pickled session of an earlier version
+    :param fileName: path of the .gq file
+    :param lazy: see loadSession
+    :return: QueryData
+    :raises SessionError: if the file is neither
+    """
+    if isSession(fileName):
+        return loadSession(fileName, lazy)
+    return loadPickle(fileName)
+
+
+# CONVERSION ----
+def convert(source: str, destination: str = None) -> bool:
+    """
+    Rewrites a pickled session as a session
+    :param source: path of the pickled session
+    :param destination: path of the new session - source if None
+    :return: True if the file was converted, False if it already was a session (it is copied to destination)
+    :raises SessionError: if the file is neither
+    """
+    destination = source if destination is None else destination
+    if isSession(source):
+        readHeader(source)
+        if os.path.abspath(source) != os.path.abspath(destination):
+            shutil.copyfile(source, destination)
+        return False
+    save(loadPickle(source), destination)
+    return True
+
+
+def main(args: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Convert pickled PhageCommander sessions (.gq) to the '
+                                                 'session format')
+    parser.add_argument('files', nargs='+', help='pickled sessions - converted in place')
+    parser.add_argument('--no-backup', action='store_true', help='do not keep the originals as <name>.bak')
+    args = parser.parse_args(args)
+
+    status = 0
+    for fileName in args.files:
+        try:
+            if isSession(fileName):
+                readHeader(fileName)
+                print('{}: already a session'.format(fileName))
+                continue
+            if not args.no_backup:
+                shutil.copyfile(fileName, fileName + '.bak')
+            convert(fileName)
+            print('{}: converted'.format(fileName))
+        except (OSError, SessionError) as e:
+            print('{}: {}'.format(fileName, e), file=sys.stderr)
+            status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
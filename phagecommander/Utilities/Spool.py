@@ -0,0 +1,140 @@
+"""
+Spooled raw tool output
+Large tool outputs (RAST GFF3, GeneMarkS-2 of host genomes) are written to a RawOutput as the response
+arrives instead of being held as one bytes object plus its decoded copies. Outputs stay in memory up to a
+threshold and are spooled to a temporary file beyond it. Parsers read them back line by line.
+"""
+
+import codecs
+import tempfile
+import threading
+from typing import Iterator, Union
+
+# outputs larger than this are spooled to disk
+DEFAULT_MAX_MEMORY = 8 * 1024 * 1024
+_CHUNK_SIZE = 64 * 1024
+
+_maxMemory = DEFAULT_MAX_MEMORY
+_directory = None
+_lock = threading.Lock()
+
+
+def configure(maxMemory: int = None, directory: str = None):
+    """
+    Changes where new RawOutputs are stored
+    :param maxMemory: bytes kept in memory before spooling to disk - 0 to always spool
+    :param directory: folder of spool files - None for the system temporary folder
+    """
+    global _maxMemory, _directory
+    with _lock:
+        if maxMemory is not None:
+            _maxMemory = maxMemory
+        _directory = directory
+
+
+class RawOutput:
+    """
+    Class for holding the raw output of a tool, spooled to disk once it is large
+    * Not safe to read from multiple threads at once
+    """
+
+    def __init__(self, data: bytes = None):
+        """
+        :param data: initial content
+        """
+        with _lock:
+            maxMemory, directory = _maxMemory, _directory
+        self._file = tempfile.SpooledTemporaryFile(max_size=maxMemory, dir=directory)
+        self.size = 0
+        if data:
+            self.write(data)
+
+    def write(self, chunk: bytes):
+        self._file.seek(0, 2)
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def chunks(self, chunkSize: int = _CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        :return: generator of the content in chunks
+        """
+        self._file.seek(0)
+        while True:
+            chunk = self._file.read(chunkSize)
+            if not chunk:
+                return
+            yield chunk
+
+    def lines(self, encoding: str = 'utf-8') -> Iterator[str]:
+        """
+        Decodes the content line by line - line endings are removed (as str.splitlines does)
+        :return: generator of lines
+        """
+        decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        pending = ''
+        for chunk in self.chunks():
+            lines = (pending + decoder.decode(chunk)).splitlines(True)
+            # the last line may continue in the next chunk (including the \n of a \r\n)
+            pending = lines.pop() if lines else ''
+            for line in lines:
+                yield line.splitlines()[0]
+        yield from (pending + decoder.decode(b'', final=True)).splitlines()
+
+    def read(self) -> bytes:
+        self._file.seek(0)
+        return self._file.read()
+
+    def text(self, encoding: str = 'utf-8') -> str:
+        """
+        :return: the full decoded content
+        """
+        return self.read().decode(encoding, errors='replace')
+
+    def close(self):
+        self._file.close()
+
+    def __len__(self):
+        return self.size
+
+    def __str__(self):
+        return self.text()
+
+    def __repr__(self):
+        return 'RawOutput(size={})'.format(self.size)
+
+    def __getstate__(self):
+        return {'data': self.read()}
+
+    def __setstate__(self, state):
+        self.__init__(state['data'])
+
+
+def iterLines(data: Union[str, bytes, RawOutput, Iterator]) -> Iterator[str]:
+    """
+    Iterates over the lines of tool output
+    :param data: str / bytes content, a RawOutput, a file object or any iterable of lines
+        (ex: requests.Response.iter_lines())
+    :return: generator of lines without line endings
+    """
+    if isinstance(data, RawOutput):
+        yield from data.lines()
+    elif isinstance(data, str):
+        yield from data.splitlines()
+    elif isinstance(data, (bytes, bytearray)):
+        yield from data.decode('utf-8', errors='replace').splitlines()
+    else:
+        for line in data:
+            if isinstance(line, (bytes, bytearray)):
+                line = line.decode('utf-8', errors='replace')
+            yield line.rstrip('\r\n')
+
+
+def text(data: Union[str, bytes, RawOutput]) -> str:
+    """
+    :return: tool output as str
+    """
+    if isinstance(data, RawOutput):
+        return data.text()
+    if isinstance(data, (bytes, bytearray)):
+        return data.decode('utf-8', errors='replace')
+    return data
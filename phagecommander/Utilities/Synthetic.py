@@ -0,0 +1,198 @@
+"""
+Synthetic tool output
+Generates gene calls and formats them the way each prediction tool does, so parsers, the query engine
+and exports can be exercised without the remote servers (see MockServer and benchmarks/).
+"""
+
+import random
+from typing import List, Tuple
+
+# (left, right, strand) - 1 based, inclusive
+GeneCall = Tuple[int, int, str]
+# (left, right, strand, amino acid, anticodon)
+TrnaCall = Tuple[int, int, str, str, str]
+
+_AMINO_ACIDS = ['Ala', 'Arg', 'Asn', 'Asp', 'Cys', 'Gln', 'Glu', 'Gly', 'His', 'Ile',
+                'Leu', 'Lys', 'Met', 'Phe', 'Pro', 'Ser', 'Thr', 'Trp', 'Tyr', 'Val']
+
+
+def sequence(length: int, seed: int = 0) -> str:
+    """
+    :return: random DNA sequence of the given length
+    """
+    rand = random.Random(seed)
+    return ''.join(rand.choice('ACGT') for _ in range(length))
+
+
+def fasta(name: str, dna: str, lineWidth: int = 70) -> str:
+    """
+    :return: FASTA record of the sequence
+    """
+    lines = ['>{}'.format(name)]
+    lines.extend(dna[i:i + lineWidth] for i in range(0, len(dna), lineWidth))
+    return '\n'.join(lines) + '\n'
+
+
+def sequenceLength(fastaData: bytes) -> int:
+    """
+    :return: amount of bases in FASTA data
+    """
+    return sum(len(line.strip()) for line in fastaData.splitlines() if not line.startswith(b'>'))
+
+
+def geneCalls(count: int, length: int, seed: int = 0) -> List[GeneCall]:
+    """
+    Generates non-overlapping gene calls spread over a sequence
+    :param count: amount of genes
+    :param length: sequence length - genes are packed more densely than real genes if it is too short
+    :param seed: random seed - equal seeds give equal calls
+    :return: List[(left, right, strand)] sorted by position
+    """
+    rand = random.Random(seed)
+    length = max(length, count * 3)
+    slot = length // max(count, 1)
+    calls = []
+    for index in range(count):
+        slotStart = index * slot + 1
+        # genes are a multiple of 3 long
+        geneLength = max(3, (rand.randint(slot // 2, slot) // 3) * 3)
+        left = slotStart + rand.randint(0, slot - geneLength)
+        calls.append((left, left + geneLength - 1, rand.choice('+-')))
+    return calls
+
+
+def trnaCalls(count: int, length: int, seed: int = 0) -> List[TrnaCall]:
+    """
+    :return: List[(left, right, strand, amino acid, anticodon)] sorted by position
+    """
+    rand = random.Random(seed)
+    calls = []
+    for left, right, strand in geneCalls(count, length, seed):
+        aminoAcid = rand.choice(_AMINO_ACIDS)
+        anticodon = ''.join(rand.choice('acgt') for _ in range(3))
+        # tRNAs are 70 - 95 bases long
+        calls.append((left, min(right, left + rand.randint(70, 95)), strand, aminoAcid, anticodon))
+    return calls
+
+
+def glimmer(calls: List[GeneCall], name: str = 'sequence') -> str:
+    """
+    :return: GLIMMER 3 predict output
+    """
+    lines = ['>{}'.format(name)]
+    for index, (left, right, strand) in enumerate(calls, 1):
+        start, stop = (left, right) if strand == '+' else (right, left)
+        lines.append('orf{:05d} {:>8} {:>8}  {}{}  {:>6.2f}'.format(index, start, stop, strand, left % 3 + 1,
+                                                                  5 + index % 7 * 0.71))
+    return '\n'.join(lines) + '\n'
+
+
+def genemark(calls: List[GeneCall], partialEnds: bool = False) -> str:
+    """
+    :param partialEnds: mark the first gene's start and the last gene's stop as partial ('<' / '>')
+    :return: GeneMark.hmm (DNA Master server) output
+    """
+    lines = ['GeneMark.hmm version 2.8',
+             'Sequence: sequence',
+             '',
+             'Predicted genes',
+             '   Gene    Strand    LeftEnd    RightEnd       Gene     Class',
+             '    #                                         Length']
+    lines.extend(_genemarkRows(calls, partialEnds))
+    lines.extend(['', 'Predicted proteins', ''])
+    return '\n'.join(lines) + '\n'
+
+
+def genemarkLst(calls: List[GeneCall], title: str = 'GeneMark.hmm PROKARYOTIC (Version 3.25)',
+                partialEnds: bool = False) -> str:
+    """
+    :param partialEnds: mark the first gene's start and the last gene's stop as partial ('<' / '>')
+    :return: GeneMark.hmm LST output (GeneMark Hmm, GeneMarkS, GeneMark Heuristic)
+    """
+    lines = [title,
+             'Sequence file name: sequence, RBS: false',
+             'Model name: synthetic',
+             '',
+             'Predicted genes',
+             '   Gene    Strand    LeftEnd    RightEnd       Gene     Class',
+             '    #                                         Length']
+    lines.extend(_genemarkRows(calls, partialEnds))
+    return '\n'.join(lines) + '\n'
+
+
+def _genemarkRows(calls: List[GeneCall], partialEnds: bool = False) -> List[str]:
+    rows = []
+    for index, (left, right, strand) in enumerate(calls, 1):
+        length = right - left + 1
+        if partialEnds and index == 1:
+            left = '<{}'.format(left)
+        if partialEnds and index == len(calls):
+            right = '>{}'.format(right)
+        rows.append('{:>5}        {}   {:>10}  {:>10}  {:>10}        1'.format(index, strand, left, right, length))
+    return rows
+
+
+def genemarkS2(calls: List[GeneCall]) -> str:
+    """
+    :return: GeneMarkS-2 LST output
+    """
+    lines = ['# GeneMark.hmm-2 LST format',
+             '# GeneMark.hmm-2 prokaryotic version: 1.14',
+             '',
+             'SequenceID: sequence']
+    for index, (left, right, strand) in enumerate(calls, 1):
+        lines.append('{:>6}   {}   {:>8}   {:>8}   {:>6}  nativebits  ATG  1'.format(index, strand, left, right,
+                                                                                  right - left + 1))
+    lines.extend(['', '# end'])
+    return '\n'.join(lines) + '\n'
+
+
+def prodigal(calls: List[GeneCall], length: int = 0, partialEnds: bool = False) -> str:
+    """
+    :param partialEnds: mark the first gene's start and the last gene's stop as partial ('<' / '>')
+    :return: Prodigal GenBank-like output
+    """
+    lines = ['DEFINITION  seqnum=1;seqlen={};seqhdr="sequence";version=Prodigal.v2.6.3'.format(length),
+             'FEATURES             Location/Qualifiers']
+    for index, (left, right, strand) in enumerate(calls, 1):
+        location = '{}{}..{}{}'.format('<' if partialEnds and index == 1 else '', left,
+                                       '>' if partialEnds and index == len(calls) else '', right)
+        if strand == '-':
+            location = 'complement({})'.format(location)
+        lines.append('     CDS             {}'.format(location))
+        lines.append('                     /note="ID=1_{};partial=00;start_type=ATG"'.format(index))
+    lines.append('//')
+    return '\n'.join(lines) + '\n'
+
+
+def rast(calls: List[GeneCall], name: str = 'sequence') -> str:
+    """
+    :return: RAST gff3 (stripped) output
+    """
+    lines = ['##gff-version 3']
+    for index, (left, right, strand) in enumerate(calls, 1):
+        lines.append('\t'.join([name, 'FIG', 'CDS', str(left), str(right), '.', strand, '0',
+                                'ID=fig|6666666.1.peg.{};Name=hypothetical protein'.format(index)]))
+    return '\n'.join(lines) + '\n'
+
+
+def metagene(calls: List[GeneCall]) -> str:
+    """
+    :return: MetaGeneAnnotator HTML output
+    """
+    rows = ['<tr><td>gene_{}</td><td>{}</td><td>{}</td><td>{}</td><td>0</td><td>11</td><td>s</td></tr>'.format(
+        index, left, right, strand) for index, (left, right, strand) in enumerate(calls, 1)]
+    return '<html><body><table>\n{}\n</table></body></html>\n'.format('\n'.join(rows))
+
+
+def aragorn(calls: List[TrnaCall], name: str = 'sequence') -> str:
+    """
+    :return: Aragorn HTML output (tab-delimited format)
+    """
+    lines = ['ARAGORN v1.2.38', name, '{} genes found'.format(len(calls))]
+    for index, (left, right, strand, aminoAcid, anticodon) in enumerate(calls, 1):
+        location = '[{},{}]'.format(left, right)
+        if strand == '-':
+            location = 'c' + location
+        lines.append('{} tRNA-{} {}\t{}\t({})'.format(index, aminoAcid, location, 40 + index % 20, anticodon))
+    return '<html><body><pre>{}\n</pre></body></html>\n'.format('\n'.join(lines))
@@ -0,0 +1,103 @@
+"""
+Columns of the gene and conflict tables
+Shared by the GUI table model and the exporters, so a table looks the same on screen and in a file.
+"""
+
+from typing import Dict, List, Sequence
+
+from phagecommander import Gene
+
+
+class TableLayout:
+    """
+    Class for the columns of a gene table - one row per gene
+    Columns: TOTAL CALLS, ALL, ONE, CONTIG (multi-record files only), then 4 columns per tool
+    (direction, start, stop, length) separated by an empty column
+    """
+
+    TOTAL_CALLS_COLUMN = 0
+    ALL_COLUMN = 1
+    ONE_COLUMN = 2
+    CONTIG_COLUMN = 3
+    TOOL_COLUMNS = 4
+
+    def __init__(self, tools: Sequence[str] = (), multiContig: bool = False):
+        """
+        :param tools: tools shown in the table
+        :param multiContig: whether the contig column is shown
+        """
+        self.tools = list(tools)
+        self.multiContig = multiContig
+
+        # generate headers
+        # {tool: first column of the tool}
+        self.headerIndexes: Dict[str, int] = dict()
+        currIndex = 3
+        self.headers = ['TOTAL CALLS', 'ALL', 'ONE']
+        if multiContig:
+            self.headers.append('CONTIG')
+            currIndex += 1
+        for ind, tool in enumerate(self.tools):
+            self.headerIndexes[tool] = currIndex
+            self.headers.extend([tool.upper()] * self.TOOL_COLUMNS)
+            currIndex += self.TOOL_COLUMNS
+            if ind != len(self.tools) - 1:
+                self.headers.append('')
+                currIndex += 1
+
+    def __len__(self):
+        return len(self.headers)
+
+    def rowCells(self, geneSet: Sequence[Gene.GeneFeature], count: int) -> List[str]:
+        """
+        :param geneSet: calls of the gene
+        :param count: amount of calls of the gene
+        :return: text of each cell of the gene's row
+        """
+        cells = [''] * len(self.headers)
+        if self.multiContig:
+            cells[self.CONTIG_COLUMN] = geneSet[0].contig
+        # later calls of a tool replace earlier ones
+        for gene in geneSet:
+            geneIndex = self.headerIndexes[gene.identity]
+            cells[geneIndex:geneIndex + self.TOOL_COLUMNS] = [gene.direction, str(gene.start), str(gene.stop),
+                                                              str(gene.length)]
+        cells[self.TOTAL_CALLS_COLUMN] = str(count)
+        if count == len(self.tools):
+            cells[self.ALL_COLUMN] = 'X'
+        elif count == 1:
+            cells[self.ONE_COLUMN] = 'X'
+        return cells
+
+
+class ConflictLayout:
+    """
+    Class for the columns of a conflict table - one row per pair of overlapping calls (see IntervalIndex.Conflict)
+    Columns: KIND, CONTIG (multi-record files only), then direction, start and stop of each call, OVERLAP
+    """
+
+    def __init__(self, multiContig: bool = False):
+        """
+        :param multiContig: whether the contig column is shown
+        """
+        self.multiContig = multiContig
+        self.headers = ['KIND']
+        if multiContig:
+            self.headers.append('CONTIG')
+        self.headers.extend(['FIRST'] * 3 + ['SECOND'] * 3 + ['OVERLAP'])
+
+    def __len__(self):
+        return len(self.headers)
+
+    def rowCells(self, conflict) -> List[str]:
+        """
+        :param conflict: Conflict
+        :return: text of each cell of the conflict's row
+        """
+        cells = [conflict.kind]
+        if self.multiContig:
+            cells.append(conflict.first.contig)
+        for feature in (conflict.first, conflict.second):
+            cells.extend([feature.direction, str(feature.start), str(feature.stop)])
+        cells.append(str(conflict.overlap))
+        return cells
@@ -10,4 +10,16 @@ GLIMMER = 'glimmer'
 PRODIGAL = 'prodigal'
 TOOL_NAMES = [GENEMARK, HMM, HEURISTIC, GENEMARKS, GENEMARKS2, GLIMMER, PRODIGAL, RAST, METAGENE, ARAGORN]
 GENE_TOOLS = [GENEMARK, HMM, HEURISTIC, GENEMARKS, GENEMARKS2, GLIMMER, PRODIGAL, RAST, METAGENE]
-TRNA_TOOLS = [ARAGORN]
\ No newline at end of file
+TRNA_TOOLS = [ARAGORN]
+# versions of each tool - part of the result cache key
+# change a tool's version to invalidate its cached results
+TOOL_VERSIONS = {GENEMARK: 'GeneMark.hmm-dnamaster',
+                 HMM: 'GeneMark.hmm-prokaryotic',
+                 HEURISTIC: 'GeneMark.hmm-heuristic-1999',
+                 GENEMARKS: 'GeneMarkS-phage',
+                 GENEMARKS2: 'GeneMarkS-2-auto',
+                 GLIMMER: 'GLIMMER-3.02',
+                 PRODIGAL: 'Prodigal-meta',
+                 RAST: 'RAST-gff3_stripped',
+                 METAGENE: 'MetaGeneAnnotator',
+                 ARAGORN: 'Aragorn-tRNA'}
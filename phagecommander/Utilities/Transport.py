@@ -0,0 +1,206 @@
+"""
+Shared HTTP transport for all remote tool clients
+Keeps one requests.Session per host so connections are reused (keep-alive) across
+POSTs, status polls and result downloads instead of opening a new TCP/TLS connection each time.
+Requests made while a Jobs.CancelToken is active abort as soon as the token is cancelled -
+the socket of the in-flight request is shut down, ending any blocked send / receive.
+"""
+
+import socket
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from phagecommander.Utilities import Jobs, Spool
+
+# maximum connections kept open per host
+DEFAULT_POOL_SIZE = 10
+# (connect, read) timeout in seconds
+# read timeout is generous as some tools compute their result before responding
+DEFAULT_TIMEOUT = (15, 600)
+
+_poolSize = DEFAULT_POOL_SIZE
+_timeout = DEFAULT_TIMEOUT
+_sessions = dict()
+_lock = threading.Lock()
+# cancellation handles registered by connections of the request in progress in each thread
+_local = threading.local()
+
+
+class _CancellableConnectionMixin:
+    """
+    Registers the connection with the thread's active CancelToken while a request is sent on it
+    """
+
+    def request(self, *args, **kwargs):
+        token = Jobs.currentToken()
+        if token is not None:
+            token.check()
+            handles = getattr(_local, 'handles', None)
+            if handles is not None:
+                handles.append(token.register(self._abort))
+        return super().request(*args, **kwargs)
+
+    def _abort(self):
+        sock = self.sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class _CancellableHTTPConnection(_CancellableConnectionMixin, HTTPConnection):
+    pass
+
+
+class _CancellableHTTPSConnection(_CancellableConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _CancellableHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CancellableHTTPConnection
+
+
+class _CancellableHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CancellableHTTPSConnection
+
+
+class _CancellableAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose connections can be aborted through a CancelToken
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super(_CancellableAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': _CancellableHTTPConnectionPool,
+                                                   'https': _CancellableHTTPSConnectionPool}
+
+
+def configure(poolSize: int = None, timeout=None):
+    """
+    Changes the transport configuration - existing connections are closed
+    :param poolSize: maximum connections kept open per host
+    :param timeout: default timeout for requests - seconds or (connect, read) tuple
+    """
+    global _poolSize, _timeout
+    if poolSize is not None:
+        _poolSize = poolSize
+    if timeout is not None:
+        _timeout = timeout
+    close()
+
+
+def session(url: str) -> requests.Session:
+    """
+    :param url: URL of the request
+    :return: the pooled session for the host of the URL
+    """
+    parts = urlsplit(url)
+    host = '{}://{}'.format(parts.scheme, parts.netloc)
+    with _lock:
+        hostSession = _sessions.get(host)
+        if hostSession is None:
+            hostSession = requests.Session()
+            adapter = _CancellableAdapter(pool_connections=1, pool_maxsize=_poolSize)
+            hostSession.mount(host, adapter)
+            # requests are independent of each other - do not carry cookies between them
+            hostSession.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            _sessions[host] = hostSession
+    return hostSession
+
+
+def request(method: str, url: str, timeout=None, **kwargs) -> requests.Response:
+    """
+    Performs a request through the pooled session of the URL's host
+    The request is aborted with Jobs.Cancelled if the calling thread's CancelToken is cancelled
+    :param method: HTTP method
+    :param url: URL
+    :param timeout: timeout of this request - defaults to the configured timeout
+    :param kwargs: arguments passed to requests
+    :return: requests.Response
+    """
+    if timeout is None:
+        timeout = _timeout
+
+    token = Jobs.currentToken()
+    if token is None:
+        return session(url).request(method, url, timeout=timeout, **kwargs)
+
+    token.check()
+    _local.handles = []
+    try:
+        # the response body is read before returning unless stream=True is given
+        response = session(url).request(method, url, timeout=timeout, **kwargs)
+    except requests.RequestException:
+        # errors caused by the socket being shut down
+        token.check()
+        raise
+    finally:
+        for handle in _local.handles:
+            token.unregister(handle)
+        _local.handles = None
+    token.check()
+    return response
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """
+    GET request through the pooled session
+    """
+    return request('GET', url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    """
+    POST request through the pooled session
+    """
+    return request('POST', url, **kwargs)
+
+
+def download(method: str, url: str, chunkSize: int = 64 * 1024, **kwargs) -> Spool.RawOutput:
+    """
+    Performs a request and streams the response body into a RawOutput as it arrives
+    * The body is never held in memory as a whole once it is larger than the spool threshold
+    :param method: HTTP method
+    :param url: URL
+    :param chunkSize: bytes read at a time
+    :param kwargs: arguments passed to request()
+    :return: RawOutput of the response body
+    :raises requests.HTTPError: for error status codes
+    """
+    response = request(method, url, stream=True, **kwargs)
+    token = Jobs.currentToken()
+    # closing the response aborts a body read in progress
+    handle = token.register(response.close) if token is not None else None
+    try:
+        response.raise_for_status()
+        output = Spool.RawOutput()
+        for chunk in response.iter_content(chunkSize):
+            output.write(chunk)
+    except (requests.RequestException, AttributeError, ValueError):
+        # errors caused by the response being closed
+        if token is not None:
+            token.check()
+        raise
+    finally:
+        if handle is not None:
+            token.unregister(handle)
+        response.close()
+
+    if token is not None:
+        token.check()
+    return output
+
+
+def close():
+    """
+    Closes every pooled connection
+    """
+    with _lock:
+        for hostSession in _sessions.values():
+            hostSession.close()
+        _sessions.clear()
@@ -0,0 +1,430 @@
+"""
+Headless batch queries
+Runs the GUI's queries (TOOL_METHODS through the QueryEngine) on many FASTA files without a display server and
+writes the results of each genome as sessions, GenBank, Excel, TSV or conflict files and / or into a project
+database.
+* Each input file is one genome (its records are the contigs) - --split-records makes every record a genome
+* Genomes run in parallel (--jobs), each with its own QueryEngine (--max-concurrent queries in flight)
+
+Usage:
+    phagecom-batch genomes/ -o results/ --species Mycobacterium_smegmatis --format session genbank tsv
+    phagecom-batch phages.fasta --split-records --project phages.db --jobs 4
+"""
+
+import argparse
+import concurrent.futures
+import os
+import re
+import sys
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from phagecommander import Gene
+from phagecommander.Utilities import Endpoints, Fasta, Session, Transport
+from phagecommander.Utilities.ExcelExport import ExcelExporter, CONFLICT_SHEET_LABEL, GENE_SHEET_LABEL, \
+    TRNA_SHEET_LABEL
+from phagecommander.Utilities.IntervalIndex import DEFAULT_MIN_GENE_OVERLAP
+from phagecommander.Utilities.Palette import TablePalette
+from phagecommander.Utilities.ProjectStore import ProjectStore
+from phagecommander.Utilities.QueryData import Contig, QueryData
+from phagecommander.Utilities.QueryEngine import DEFAULT_MAX_CONCURRENT, QueryEngine, QueryJob, collectResults
+from phagecommander.Utilities.ResultCache import ResultCache
+from phagecommander.Utilities.TableLayout import ConflictLayout, TableLayout
+from phagecommander.Utilities.Tools import *
+
+# output formats
+SESSION = 'session'
+GENBANK = 'genbank'
+EXCEL = 'excel'
+TSV = 'tsv'
+CONFLICTS = 'conflicts'
+FORMATS = [SESSION, GENBANK, EXCEL, TSV, CONFLICTS]
+_EXTENSIONS = {SESSION: '.gq', GENBANK: '.gb', EXCEL: '.xlsx'}
+
+# files picked up from input directories - optionally gzip compressed
+FASTA_EXTENSIONS = ('.fasta', '.fa', '.fna', '.fas', '.fsa')
+
+
+class BatchGenome(NamedTuple):
+    """
+    A genome of the batch - a FASTA file, or a single record of one
+    """
+    name: str
+    fileName: str
+    # record of the file - None for every record
+    record: Optional[str]
+
+
+class BatchOptions(NamedTuple):
+    tools: List[str]
+    species: str
+    outputDirectory: str
+    formats: List[str]
+    maxConcurrent: int = DEFAULT_MAX_CONCURRENT
+    prodigalLocation: str = None
+    rastUser: str = ''
+    rastPass: str = ''
+    cache: ResultCache = None
+    # minimum shared bases of two genes listed as a conflict
+    minGeneOverlap: int = DEFAULT_MIN_GENE_OVERLAP
+
+
+class GenomeCancelled(Exception):
+    """
+    Raised by a genome whose queries were cancelled (ex: Ctrl-C) - none of its files are written
+    """
+
+
+class GenomeResult(NamedTuple):
+    genome: BatchGenome
+    queryData: QueryData
+    # {(tool, contig): raw tool output}
+    outputs: Dict[Tuple[str, str], object]
+    # files written
+    files: List[str]
+
+
+def _genomeName(name: str) -> str:
+    """
+    :return: name usable as a file name - characters other than letters, digits, '.', '-' and '_' become '_'
+    """
+    return re.sub(r'[^\w.-]', '_', name) or 'genome'
+
+
+def _stripExtensions(fileName: str) -> str:
+    name = os.path.basename(fileName)
+    if name.lower().endswith('.gz'):
+        name = name[:-3]
+    return os.path.splitext(name)[0]
+
+
+def isFastaFile(fileName: str) -> bool:
+    name = fileName.lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+    return name.endswith(FASTA_EXTENSIONS)
+
+
+def findGenomes(inputs: Sequence[str], splitRecords: bool = False) -> List[BatchGenome]:
+    """
+    :param inputs: FASTA files and directories of FASTA files (not searched recursively)
+    :param splitRecords: True to make each record of a file its own genome
+    :return: genomes in input order - names (the file name without extensions, or the record name) are made
+        unique by appending _2, _3, ...
+    :raises FileNotFoundError: if an input does not exist
+    """
+    fileNames = []
+    for path in inputs:
+        if os.path.isdir(path):
+            fileNames.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                             if isFastaFile(name) and os.path.isfile(os.path.join(path, name)))
+        elif os.path.isfile(path):
+            fileNames.append(path)
+        else:
+            raise FileNotFoundError('Input: {} does not exist'.format(path))
+
+    genomes = []
+    usedNames = set()
+    for fileName in fileNames:
+        if splitRecords:
+            with Fasta.FastaFile(fileName) as fasta:
+                records = [(name, name) for name in fasta.names]
+        else:
+            records = [(_stripExtensions(fileName), None)]
+        for name, record in records:
+            name = _genomeName(name)
+            uniqueName, ind = name, 1
+            while uniqueName in usedNames:
+                ind += 1
+                uniqueName = '{}_{}'.format(name, ind)
+            usedNames.add(uniqueName)
+            genomes.append(BatchGenome(uniqueName, fileName, record))
+    return genomes
+
+
+# QUERIES ----
+def newEngine(options: BatchOptions) -> QueryEngine:
+    """
+    :return: QueryEngine of a genome - cancel() it to abort the genome's queries from another thread
+    """
+    return QueryEngine(options.maxConcurrent, maxWorkers=options.maxConcurrent, cache=options.cache)
+
+
+def queryGenome(genome: BatchGenome, options: BatchOptions,
+                engine: QueryEngine = None) -> Tuple[QueryData, Dict[Tuple[str, str], object]]:
+    """
+    Queries every tool for every contig of a genome (as QueryManager)
+    :param engine: QueryEngine running the queries - a new one if None (see newEngine)
+    :return: (QueryData of the genome, {(tool, contig): raw tool output})
+    :raises GenomeCancelled: if the engine was cancelled
+    """
+    queryData = QueryData()
+    queryData.fileName = genome.fileName
+    queryData.species = options.species
+    queryData.tools = {tool: tool in options.tools for tool in TOOL_NAMES}
+    queryData.rastUser = options.rastUser
+    queryData.rastPass = options.rastPass
+    with Fasta.FastaFile(genome.fileName) as fasta:
+        names = fasta.names if genome.record is None else [genome.record]
+        queryData.contigs = [Contig(name, fasta.sequence(name), fasta.description(name)) for name in names]
+        geneFiles = [Gene.GeneFile(genome.fileName, options.species, options.prodigalLocation, record=name,
+                                   fasta=fasta)
+                     for name in names]
+    jobs = [QueryJob(geneFile, tool, queryData, {'deleteOnCancel': True} if tool == RAST else None)
+            for tool in options.tools for geneFile in geneFiles]
+
+    engine = newEngine(options) if engine is None else engine
+    engine.run(jobs)
+    if engine.cancelled:
+        raise GenomeCancelled(genome.name)
+    queryData.toolData.update(collectResults(jobs))
+    if RAST in queryData.toolData:
+        queryData.wipeUserCredentials()
+
+    outputs = {(job.tool, job.geneFile.record): job.geneFile.query_data[job.tool] for job in jobs
+               if not isinstance(job.result, Exception) and job.geneFile.query_data.get(job.tool)}
+    return queryData, outputs
+
+
+# OUTPUT ----
+def writeTsv(fileName: str, consensus, tools: Sequence[str], multiContig: bool = False):
+    """
+    Writes a gene table as tab separated values - the columns of the GUI tables (see TableLayout)
+    :param fileName: path of the .tsv file
+    :param consensus: Consensus of the table's genes
+    :param tools: tools shown in the table
+    :param multiContig: whether the contig column is shown
+    """
+    layout = TableLayout(tools, multiContig)
+    with open(fileName, 'w') as handle:
+        handle.write('\t'.join(layout.headers) + '\n')
+        for row in range(len(consensus)):
+            count = consensus.count(row)
+            handle.write('\t'.join(layout.rowCells(consensus.groupFeatures(row), count)) + '\n')
+
+
+def writeConflictsTsv(fileName: str, conflicts, multiContig: bool = False):
+    """
+    Writes a conflict table as tab separated values - the columns of the GUI conflict table (see ConflictLayout)
+    :param fileName: path of the .tsv file
+    :param conflicts: List[Conflict] (see QueryData.conflicts)
+    :param multiContig: whether the contig column is shown
+    """
+    layout = ConflictLayout(multiContig)
+    with open(fileName, 'w') as handle:
+        handle.write('\t'.join(layout.headers) + '\n')
+        for conflict in conflicts:
+            handle.write('\t'.join(layout.rowCells(conflict)) + '\n')
+
+
+def writeOutputs(name: str, queryData: QueryData, formats: Sequence[str], outputDirectory: str,
+                 minGeneOverlap: int = DEFAULT_MIN_GENE_OVERLAP) -> List[str]:
+    """
+    Writes the results of a genome
+    :param name: genome name - file names are <name>.gq / .gb / .xlsx, <name>_genes.tsv / <name>_trna.tsv and
+        <name>_conflicts.tsv
+    :param queryData: QueryData of the genome
+    :param formats: formats to write (see FORMATS)
+    :param outputDirectory: folder of the files
+    :param minGeneOverlap: minimum shared bases of two genes listed as a conflict (Excel / conflicts files)
+    :return: paths of the files written
+    """
+    files = []
+    base = os.path.join(outputDirectory, name)
+    if SESSION in formats:
+        fastaFileName = queryData.fileName
+        # as GeneMain.saveAs - a session saves back to itself
+        queryData.fileName = os.path.abspath(base + _EXTENSIONS[SESSION])
+        try:
+            Session.save(queryData, base + _EXTENSIONS[SESSION])
+        finally:
+            queryData.fileName = fastaFileName
+        files.append(base + _EXTENSIONS[SESSION])
+
+    if GENBANK in formats:
+        # every gene of every tool - the most frequent call of each (as the GenBank export dialog)
+        consensus = queryData.consensus(list(queryData.toolData.keys()))
+        records = ((contig.name, contig.sequence, consensus.representatives(consensus.contigGroups(contig.name)))
+                   for contig in queryData.contigs)
+        if len(queryData.contigs) == 1:
+            _, sequence, genes = next(records)
+            Gene.GeneUtils.genbankToFile(sequence, genes, base + _EXTENSIONS[GENBANK])
+        else:
+            Gene.GeneUtils.genbankContigsToFile(records, base + _EXTENSIONS[GENBANK])
+        files.append(base + _EXTENSIONS[GENBANK])
+
+    if EXCEL in formats:
+        exporter = ExcelExporter(TablePalette.default())
+        exporter.addQueryData(queryData, minGeneOverlap=minGeneOverlap)
+        exporter.save(base + _EXTENSIONS[EXCEL])
+        files.append(base + _EXTENSIONS[EXCEL])
+
+    if TSV in formats:
+        multiContig = len(queryData.contigs) > 1
+        for toolList, label in ((GENE_TOOLS, GENE_SHEET_LABEL), (TRNA_TOOLS, TRNA_SHEET_LABEL)):
+            tools = queryData.usedTools(toolList)
+            if tools:
+                fileName = '{}_{}.tsv'.format(base, label.lower())
+                writeTsv(fileName, queryData.consensus(tools), tools, multiContig)
+                files.append(fileName)
+
+    if CONFLICTS in formats and queryData.usedTools(GENE_TOOLS):
+        fileName = '{}_{}.tsv'.format(base, CONFLICT_SHEET_LABEL.lower())
+        writeConflictsTsv(fileName, queryData.conflicts(minGeneOverlap), len(queryData.contigs) > 1)
+        files.append(fileName)
+    return files
+
+
+def runGenome(genome: BatchGenome, options: BatchOptions, engine: QueryEngine = None) -> GenomeResult:
+    """
+    Queries a genome and writes its files
+    :param engine: see queryGenome
+    """
+    queryData, outputs = queryGenome(genome, options, engine)
+    files = writeOutputs(genome.name, queryData, options.formats, options.outputDirectory, options.minGeneOverlap)
+    return GenomeResult(genome, queryData, outputs, files)
+
+
+def runBatch(genomes: Sequence[BatchGenome], options: BatchOptions, jobs: int = 1, store: ProjectStore = None,
+             workbook: ExcelExporter = None) -> int:
+    """
+    Runs every genome - genomes failing (ex: unreadable FASTA) are reported and skipped
+    * The project store and workbook are only written from the calling thread
+    * On KeyboardInterrupt every genome is cancelled - the queries of genomes in progress are aborted (remote
+      jobs are deleted where the tool allows it) and none of their files are written
+    :param genomes: genomes to run
+    :param options: query and output options
+    :param jobs: genomes run at once
+    :param store: project database each genome is saved to - None to skip
+    :param workbook: Excel workbook each genome's tables are added to (sheets prefixed by the genome name)
+    :return: amount of genomes which failed
+    """
+    failures = 0
+    # engine of each genome - cancelled from this thread on KeyboardInterrupt
+    engines = [newEngine(options) for _ in genomes]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+        futures = {executor.submit(runGenome, genome, options, engine): genome
+                   for genome, engine in zip(genomes, engines)}
+        try:
+            for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+                genome = futures[future]
+                progress = '[{}/{}]'.format(done, len(genomes))
+                try:
+                    result = future.result()
+                except Exception as e:
+                    failures += 1
+                    print('{} {}: failed - {}'.format(progress, genome.name, e), file=sys.stderr)
+                    continue
+                _collect(progress, result, store, workbook, options.minGeneOverlap)
+        except KeyboardInterrupt:
+            for future in futures:
+                future.cancel()
+            # running genomes return as soon as their engine stops - the executor waits for them on exit
+            for engine in engines:
+                engine.cancel()
+            raise
+    return failures
+
+
+def _collect(progress: str, result: GenomeResult, store: ProjectStore, workbook: ExcelExporter,
+             minGeneOverlap: int = DEFAULT_MIN_GENE_OVERLAP):
+    """
+    Saves a finished genome to the project / workbook and reports it
+    """
+    if store is not None:
+        store.saveGenome(result.genome.name, result.queryData, result.outputs)
+    if workbook is not None:
+        workbook.addQueryData(result.queryData, prefix=result.genome.name, minGeneOverlap=minGeneOverlap)
+
+    errors = ['{}: {}'.format(tool.upper(), data) for tool, data in result.queryData.toolData.items()
+              if isinstance(data, Exception)]
+    print('{} {}: {} contig(s), {} tool(s) returned calls{}'.format(
+        progress, result.genome.name, len(result.queryData.contigs), len(result.queryData.toolData) - len(errors),
+        ''.join('\n    ' + error for error in errors)))
+
+
+def parseArgs(args: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='phagecom-batch',
+                                     description='Run gene prediction tools on FASTA files without the GUI')
+    parser.add_argument('inputs', nargs='+', help='FASTA files (optionally gzip compressed) or directories of them')
+    parser.add_argument('-o', '--output', default='.', help='folder of the output files (default: .)')
+    parser.add_argument('-f', '--format', nargs='+', choices=FORMATS, default=[SESSION],
+                        help='files written per genome (default: session)')
+    parser.add_argument('-t', '--tools', nargs='+', choices=TOOL_NAMES,
+                        help='tools to run (default: every tool except RAST - and Prodigal without --prodigal)')
+    parser.add_argument('-s', '--species', default=None,
+                        help='species of the genomes (GeneMark Hmm) - see species.txt (default: first species)')
+    parser.add_argument('--split-records', action='store_true', help='treat every FASTA record as its own genome')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='genomes queried at once (default: 1)')
+    parser.add_argument('--max-concurrent', type=int, default=DEFAULT_MAX_CONCURRENT,
+                        help='queries in flight per genome (default: {})'.format(DEFAULT_MAX_CONCURRENT))
+    parser.add_argument('--min-overlap', type=int, default=DEFAULT_MIN_GENE_OVERLAP,
+                        help='minimum shared bases of two genes listed as a conflict - genes overlapping a tRNA '
+                             'are always listed (default: {})'.format(DEFAULT_MIN_GENE_OVERLAP))
+    parser.add_argument('--project', help='project database each genome is saved to (created if missing)')
+    parser.add_argument('--workbook', help='Excel workbook of every genome\'s tables')
+    parser.add_argument('--prodigal', help='path of the Prodigal binary')
+    parser.add_argument('--rast-user', default='', help='RAST user name')
+    parser.add_argument('--rast-password', default=os.environ.get('RAST_PASSWORD', ''),
+                        help='RAST password (default: the RAST_PASSWORD environment variable)')
+    parser.add_argument('--cache', help='result cache folder - identical queries are not repeated')
+    parser.add_argument('--endpoint-base', help='base URL of every remote tool (ex: a MockServer)')
+    parser.add_argument('--timeout', type=float, default=Transport.DEFAULT_TIMEOUT[1],
+                        help='read timeout of requests in seconds (default: {})'.format(Transport.DEFAULT_TIMEOUT[1]))
+    parser.add_argument('--pool-size', type=int, default=Transport.DEFAULT_POOL_SIZE,
+                        help='connections kept open per host (default: {})'.format(Transport.DEFAULT_POOL_SIZE))
+    return parser.parse_args(args)
+
+
+def main(args: List[str] = None) -> int:
+    args = parseArgs(args)
+
+    tools = args.tools
+    if tools is None:
+        tools = [tool for tool in TOOL_NAMES if tool != RAST and (tool != PRODIGAL or args.prodigal)]
+    if RAST in tools and not args.rast_user:
+        print('RAST requires --rast-user', file=sys.stderr)
+        return 2
+    if PRODIGAL in tools and not args.prodigal:
+        print('Prodigal requires --prodigal', file=sys.stderr)
+        return 2
+    species = args.species if args.species is not None else Gene.SPECIES[0]
+    if species not in Gene.SPECIES:
+        print('{} is not a compatible species type - see species.txt'.format(species), file=sys.stderr)
+        return 2
+
+    try:
+        genomes = findGenomes(args.inputs, args.split_records)
+    except (OSError, Fasta.FastaError) as e:
+        print(e, file=sys.stderr)
+        return 2
+    if len(genomes) == 0:
+        print('No FASTA files found', file=sys.stderr)
+        return 2
+
+    os.makedirs(args.output, exist_ok=True)
+    Transport.configure(poolSize=args.pool_size, timeout=(Transport.DEFAULT_TIMEOUT[0], args.timeout))
+    if args.endpoint_base:
+        Endpoints.configure(base=args.endpoint_base)
+    options = BatchOptions(tools, species, args.output, args.format, args.max_concurrent, args.prodigal,
+                           args.rast_user, args.rast_password, ResultCache(args.cache) if args.cache else None,
+                           args.min_overlap)
+
+    store = ProjectStore(args.project) if args.project else None
+    workbook = ExcelExporter(TablePalette.default()) if args.workbook else None
+    try:
+        failures = runBatch(genomes, options, args.jobs, store, workbook)
+    except KeyboardInterrupt:
+        print('Interrupted', file=sys.stderr)
+        return 130
+    finally:
+        if store is not None:
+            store.close()
+    if workbook is not None:
+        workbook.save(args.workbook)
+
+    print('{} of {} genome(s) completed'.format(len(genomes) - failures, len(genomes)))
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,77 +1,32 @@
 import os
-import pickle
 import pathlib
+import sqlite3
 from typing import List
 from PyQt5.QtWidgets import *
 from PyQt5.QtGui import *
 from PyQt5.QtCore import *
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill
-from Bio import SeqIO
 from phagecommander import Gene
 import phagecommander.GuiWidgets
-from phagecommander.Utilities import ThreadData, ProdigalRelease, Aragorn
+from phagecommander.Utilities import ThreadData, ProdigalRelease, Aragorn, Fasta, Transport, Poller, Endpoints, Spool, \
+    Session
 from phagecommander.Utilities.Tools import *
+from phagecommander.Utilities.QueryData import QueryData, Contig
+from phagecommander.Utilities.Consensus import IncrementalConsensus
+from phagecommander.Utilities import Palette
+from phagecommander.Utilities.Palette import TablePalette
+from phagecommander.Utilities.ExcelExport import ExcelExporter
+from phagecommander.Utilities.ProjectStore import ProjectStore, ProjectStoreError
+from phagecommander.Utilities.ResultCache import ResultCache
+from phagecommander.Utilities.TableLayout import ConflictLayout
+from phagecommander.Utilities.IntervalIndex import DEFAULT_MIN_GENE_OVERLAP
+from phagecommander.Utilities.QueryEngine import QueryEngine, QueryJob, collectResults
 
 APP_NAME = 'Phage Commander'
 
-# mappings of tool names to appropriate methods
-# [queryMethod, parseMethod]
-TOOL_METHODS = {GENEMARK: [Gene.GeneFile.genemark_query,
-                           Gene.GeneParse.parse_genemark],
-                HMM: [Gene.GeneFile.genemarkhmm_query,
-                      Gene.GeneParse.parse_genemarkHmm],
-                HEURISTIC: [Gene.GeneFile.genemark_heuristic_query,
-                            Gene.GeneParse.parse_genemarkHeuristic],
-                GENEMARKS: [Gene.GeneFile.genemarks_query,
-                            Gene.GeneParse.parse_genemarkS],
-                GENEMARKS2: [Gene.GeneFile.genemarks2_query,
-                             Gene.GeneParse.parse_genemarkS2],
-                GLIMMER: [Gene.GeneFile.glimmer_query,
-                          Gene.GeneParse.parse_glimmer],
-                PRODIGAL: [Gene.GeneFile.prodigal_query,
-                           Gene.GeneParse.parse_prodigal],
-                RAST: [Gene.GeneFile.rastQuery,
-                       Gene.GeneParse.parse_rast],
-                METAGENE: [Gene.GeneFile.metageneQuery,
-                           Gene.GeneParse.parse_metagene],
-                ARAGORN: [Gene.GeneFile.aragornQuery,
-                          Gene.GeneParse.parse_aragorn]}
-
-
-class QueryData:
-    """
-    Class for representing tool/species selections
-    """
-
-    def __init__(self):
-        # tools to call
-        self.tools = {key: True for key in TOOL_NAMES}
-        # species of the DNA sequence
-        self.species = ''
-        # path of the DNA file
-        self.fileName = ''
-        # tool data
-        # Key - tool (from TOOL_NAMES)
-        # Value - List of Genes
-        self.toolData = dict()
-        # sequence
-        self.sequence = ''
-        # RAST related information
-        self.rastUser = ''
-        self.rastPass = ''
-        self.rastJobID = None
-
-    def wipeUserCredentials(self):
-        """
-        Deletes any data relating to a RAST query
-        """
-        self.rastJobID = None
-        self.rastUser = None
-        self.rastPass = None
-
-
 class ColorTable(QWidget):
+    # signal emitted each time a color setting changes
+    colorsChanged = pyqtSignal()
+
     CELL_COLOR_SETTING = 'TABLE/cell_color/'
     MAJORITY_TEXT_SETTING = 'TABLE/majority_text_color/'
     MINORITY_TEXT_SETTING = 'TABLE/minority_text_color/'
@@ -80,39 +35,10 @@ class ColorTable(QWidget):
     _CELL_COLOR_COLUMN = 0
     _MAJORITY_TEXT_COLUMN = 1
     _MINORITY_TEXT_COLUMN = 2
-    _DEFAULT_CELL_COLORS = [
-        (255, 255, 255),
-        (218, 238, 243),
-        (183, 222, 232),
-        (146, 205, 220),
-        (49, 134, 155),
-        (33, 89, 103),
-        (21, 59, 68),
-        (2, 47, 58),
-        (1, 37, 56)
-    ]
-    _DEFAULT_MAJORITY_COLORS = [
-        (0, 0, 0),
-        (0, 0, 0),
-        (0, 0, 0),
-        (0, 0, 0),
-        (255, 255, 255),
-        (255, 255, 255),
-        (255, 255, 255),
-        (255, 255, 255),
-        (255, 255, 255)
-    ]
-    _DEFAULT_MINORITY_COLORS = [
-        (255, 75, 75),
-        (255, 75, 75),
-        (255, 75, 75),
-        (255, 75, 75),
-        (255, 75, 75),
-        (255, 75, 75),
-        (255, 75, 75),
-        (255, 75, 75),
-        (255, 75, 75),
-    ]
+    # defaults live in Palette so exports without a GUI share them
+    _DEFAULT_CELL_COLORS = Palette.DEFAULT_CELL_COLORS
+    _DEFAULT_MAJORITY_COLORS = Palette.DEFAULT_MAJORITY_COLORS
+    _DEFAULT_MINORITY_COLORS = Palette.DEFAULT_MINORITY_COLORS
 
     def __init__(self, settings, parent=None):
         super(ColorTable, self).__init__(parent)
@@ -232,6 +158,7 @@ class ColorTable(QWidget):
                 self.settings.setValue(self.MAJORITY_TEXT_SETTING + str(row), colorStr)
             if column == self._MINORITY_TEXT_COLUMN:
                 self.settings.setValue(self.MINORITY_TEXT_SETTING + str(row), colorStr)
+            self.colorsChanged.emit()
 
     def changeCellColor(self, row, column):
         """
@@ -251,6 +178,7 @@ class ColorTable(QWidget):
             minorityItem.setBackground(color)
             colorStr = ' '.join([str(x) for x in color.getRgb()[:3]])
             self.settings.setValue(self.CELL_COLOR_SETTING + str(row), colorStr)
+            self.colorsChanged.emit()
 
     def resetToDefaultAll(self):
         """
@@ -286,6 +214,7 @@ class ColorTable(QWidget):
                 minorityItem.setBackground(cellColor)
                 cellColorStr = ' '.join([str(x) for x in cellColor.getRgb()[:3]])
                 self.settings.setValue(self.CELL_COLOR_SETTING + str(row), cellColorStr)
+            self.colorsChanged.emit()
 
     @staticmethod
     def checkDefaultSettings(settings):
@@ -549,6 +478,15 @@ class NewFileDialog(QDialog):
                                 'Selected DNA file does not exist.')
             return
 
+        # check if file is FASTA - indexing it also builds the .fai used by the query
+        try:
+            with Fasta.FastaFile(self.fileEdit.text()):
+                pass
+        except (Fasta.FastaError, OSError) as e:
+            QMessageBox.warning(self, 'Invalid DNA File',
+                                'Selected DNA file could not be read as FASTA: {}'.format(e))
+            return
+
         # if RAST was selected, prompt credential window
         if self.toolCheckBoxes['rast'].isChecked():
             credDialog = phagecommander.GuiWidgets.RastJobDialog(self.queryData)
@@ -612,74 +550,30 @@ class NewFileDialog(QDialog):
         settings.setValue(NewFileDialog._LAST_FASTA_FILE_LOCATION_SETTING, '')
 
 
-class QueryThread(QThread):
-    """
-    Thread for making performing the call to a gene prediction tool and parsing the data
-    Returns the list of Genes via reference
-    """
-
-    def __init__(self, geneFile, tool, queryData, settings):
-        """
-        Constructor
-        :param geneFile: GeneFile object of DNA file
-        :param tool: tool to call
-        :param settings: QSettings
-            * See TOOL_NAMES global
-        """
-        super(QueryThread, self).__init__()
-
-        self.tool = tool
-        self.queryData = queryData
-        self.geneFile = geneFile
-        self.settings = settings
-
-    def run(self):
-        """
-        Performs the query of the gene prediction tool and parses the output data
-        :return: a list of Genes is returned through self.geneData
-        """
-        queryMethod = TOOL_METHODS[self.tool][0]
-        parseMethod = TOOL_METHODS[self.tool][1]
-
-        # perform query
-        # if query is unsuccessful, return the error instead
-        try:
-            if self.tool == RAST:
-                username = self.queryData.rastUser
-                password = self.queryData.rastPass
-                jobID = self.queryData.rastJobID
-                queryMethod(self.geneFile, username, password, jobId=jobID)
-            else:
-                queryMethod(self.geneFile)
-        except Exception as e:
-            self.queryData.toolData[self.tool] = e
-            return
-
-        # perform parsing of data
-        try:
-            genes = parseMethod(self.geneFile.query_data[self.tool], identity=self.tool)
-        except Exception as e:
-            self.queryData.toolData[self.tool] = e
-            return
-
-        # update query object with genes
-        self.queryData.toolData[self.tool] = genes
-
-        # wipe RAST user creds
-        if self.tool == RAST:
-            self.queryData.wipeUserCredentials()
-
-
 class QueryManager(QThread):
     """
     Thread for managing gene prediction tool calls
+    Each selected tool is called once per contig - all calls run on the QueryEngine's event loop
+    inside this thread, with a bounded amount of concurrent calls
     """
-    # signal emitted each time a querying thread returns
+    # signal emitted each time a query returns
     progressSig = pyqtSignal()
+    # signal emitted with each returned QueryJob - its calls are shown before the remaining queries finish
+    resultSig = pyqtSignal(object)
+
+    _MAX_CONCURRENT_QUERIES_SETTING = 'QUERY/max_concurrent_queries'
+    _DEFAULT_MAX_CONCURRENT_QUERIES = 8
+    _CACHE_ENABLED_SETTING = 'CACHE/enabled'
+    _CACHE_DIRECTORY_SETTING = 'CACHE/directory'
+    _CACHE_MAX_SIZE_SETTING = 'CACHE/max_size_mb'
+    _DEFAULT_CACHE_MAX_SIZE = 512
+    _POLL_HISTORY_SETTING = 'QUERY/poll_history_file'
+    _DELETE_RAST_ON_CANCEL_SETTING = 'QUERY/delete_rast_job_on_cancel'
+    _SPOOL_MEMORY_SETTING = 'QUERY/spool_memory_mb'
 
     def __init__(self, queryData, settings):
         """
-        Initializes and starts threads for each tool to be called
+        Initializes the query jobs for each tool and contig
         :param queryData: QueryData object
         """
         super(QueryManager, self).__init__()
@@ -687,43 +581,108 @@ class QueryManager(QThread):
         # VARIABLES --------------------------------------------------------------------------------
         self.queryData = queryData
         self.settings = settings
-
-        # create GeneFile
-        self.geneFile = Gene.GeneFile(self.queryData.fileName, self.queryData.species,
-                                      self.settings.value(GeneMain._PRODIGAL_BINARY_LOCATION_SETTING))
-
-        # load sequence
-        # with open(self.queryData.fileName) as seqFile:
-        #     self.queryData.sequence = seqFile.read().split('\n')[1].lower()
-        for seq_rec in SeqIO.parse(self.queryData.fileName, 'fasta'):
-            self.queryData.sequence = seq_rec
-
-        # THREAD ALLOCATIONS -----------------------------------------------------------------------
-        self.threads = []
+        prodigalLocation = self.settings.value(GeneMain._PRODIGAL_BINARY_LOCATION_SETTING)
+        maxConcurrent = int(self.settings.value(self._MAX_CONCURRENT_QUERIES_SETTING,
+                                                self._DEFAULT_MAX_CONCURRENT_QUERIES))
+        self.cache = self.openCache(self.settings)
+        self.engine = QueryEngine(maxConcurrent, maxWorkers=maxConcurrent, cache=self.cache)
+        # larger tool outputs are spooled to disk while they download
+        Spool.configure(maxMemory=int(float(self.settings.value(self._SPOOL_MEMORY_SETTING,
+                                                                Spool.DEFAULT_MAX_MEMORY // (1024 * 1024)))
+                                      * 1024 * 1024))
+        # completion times of past remote jobs - schedules the first poll of each job
+        self.pollHistoryFile = self.settings.value(self._POLL_HISTORY_SETTING)
+        if self.pollHistoryFile:
+            Poller.history.load(self.pollHistoryFile)
+
+        # load contigs and create a GeneFile for each contig - the file is opened / indexed once
+        with Fasta.FastaFile(self.queryData.fileName) as fasta:
+            self.queryData.contigs = [Contig(name, fasta.sequence(name), fasta.description(name))
+                                      for name in fasta.names]
+            geneFiles = [Gene.GeneFile(self.queryData.fileName, self.queryData.species, prodigalLocation,
+                                       record=name, fasta=fasta)
+                         for name in fasta.names]
+        self.queryData.clearIndexes()
+
+        # JOB ALLOCATIONS --------------------------------------------------------------------------
+        deleteRastJob = str(self.settings.value(self._DELETE_RAST_ON_CANCEL_SETTING, 'true')).lower() == 'true'
+        self.jobs = []
         for tool in self.queryData.tools:
             if self.queryData.tools[tool] is True:
-                self.threads.append(QueryThread(self.geneFile, tool, self.queryData, self.settings))
+                self.queryData.toolData[tool] = None
+                options = {'deleteOnCancel': deleteRastJob} if tool == RAST else None
+                for geneFile in geneFiles:
+                    self.jobs.append(QueryJob(geneFile, tool, self.queryData, options))
+        self.jobCount = len(self.jobs)
 
-        for thread in self.threads:
-            thread.finished.connect(self.queryReturn)
+    def run(self):
+        """
+        Runs every query job and stores the merged results in the QueryData
+        """
+        self.engine.run(self.jobs, callback=self.queryReturn)
+        if self.engine.cancelled:
+            return
 
-        for thread in self.threads:
-            thread.start()
+        self.queryData.toolData.update(collectResults(self.jobs))
+        self.queryData.buildIndexes()
+        if self.pollHistoryFile:
+            try:
+                Poller.history.save(self.pollHistoryFile)
+            except OSError:
+                pass
+        # wipe RAST user creds
+        if RAST in self.queryData.toolData:
+            self.queryData.wipeUserCredentials()
 
-    @pyqtSlot()
-    def queryReturn(self):
+    def queryReturn(self, job):
         # emit progressSig to update progressBar
         self.progressSig.emit()
+        self.resultSig.emit(job)
 
-        # keep waiting until all calls have returned
-        for tool in self.queryData.toolData:
-            if self.queryData.toolData[tool] is None:
-                return
+    def abort(self):
+        """
+        Cancels every query in progress - open requests are aborted and Prodigal is killed
+        """
+        self.engine.cancel()
 
-        self.exit()
+    @staticmethod
+    def openCache(settings):
+        """
+        Opens the result cache configured in the settings
+        :param settings: QSettings obj
+        :return: ResultCache or None if caching is disabled / unavailable
+        """
+        if str(settings.value(QueryManager._CACHE_ENABLED_SETTING, 'true')).lower() != 'true':
+            return None
+        try:
+            maxSize = int(settings.value(QueryManager._CACHE_MAX_SIZE_SETTING, QueryManager._DEFAULT_CACHE_MAX_SIZE))
+            return ResultCache(settings.value(QueryManager._CACHE_DIRECTORY_SETTING), maxSize * 1024 * 1024)
+        except (OSError, TypeError, ValueError):
+            return None
 
-    def abort(self):
-        self.exit()
+    @staticmethod
+    def checkDefaultSettings(settings):
+        """
+        Checks if required settings exist - if not, populates them
+        :param settings: QSettings obj
+        """
+        if settings.value(QueryManager._MAX_CONCURRENT_QUERIES_SETTING) is None:
+            settings.setValue(QueryManager._MAX_CONCURRENT_QUERIES_SETTING,
+                              QueryManager._DEFAULT_MAX_CONCURRENT_QUERIES)
+        if settings.value(QueryManager._CACHE_ENABLED_SETTING) is None:
+            settings.setValue(QueryManager._CACHE_ENABLED_SETTING, 'true')
+        if settings.value(QueryManager._CACHE_DIRECTORY_SETTING) is None:
+            cacheLocation = QStandardPaths.writableLocation(QStandardPaths.CacheLocation)
+            settings.setValue(QueryManager._CACHE_DIRECTORY_SETTING, os.path.join(cacheLocation, 'results'))
+        if settings.value(QueryManager._CACHE_MAX_SIZE_SETTING) is None:
+            settings.setValue(QueryManager._CACHE_MAX_SIZE_SETTING, QueryManager._DEFAULT_CACHE_MAX_SIZE)
+        if settings.value(QueryManager._DELETE_RAST_ON_CANCEL_SETTING) is None:
+            settings.setValue(QueryManager._DELETE_RAST_ON_CANCEL_SETTING, 'true')
+        if settings.value(QueryManager._SPOOL_MEMORY_SETTING) is None:
+            settings.setValue(QueryManager._SPOOL_MEMORY_SETTING, Spool.DEFAULT_MAX_MEMORY // (1024 * 1024))
+        if settings.value(QueryManager._POLL_HISTORY_SETTING) is None:
+            dataLocation = QStandardPaths.writableLocation(QStandardPaths.AppDataLocation)
+            settings.setValue(QueryManager._POLL_HISTORY_SETTING, os.path.join(dataLocation, 'poll_history.json'))
 
 
 class QueryDialog(QDialog):
@@ -744,8 +703,8 @@ class QueryDialog(QDialog):
         self.thread.progressSig.connect(self.updateProgress)
 
         self.progressBar = QProgressBar()
-        # set progress max to the amount of tools to be queried
-        self.progressBar.setMaximum(list(self.queryData.tools.values()).count(True))
+        # set progress max to the amount of tool calls (tools * contigs)
+        self.progressBar.setMaximum(self.thread.jobCount)
 
         self.cancelButton = QPushButton('Cancel')
         self.cancelButton.clicked.connect(self.thread.abort)
@@ -786,8 +745,15 @@ class QueryDialog(QDialog):
             if len(errors) != 0:
                 # print out all tools and their errors
                 errorStr = ['{}: {}'.format(tool.upper(), error) for tool, error in errors.items()]
+                # keep the calls of the tools which succeeded - the failed tools are left out of the tables
+                partial = len(self.queryData.usedTools(list(self.queryData.toolData))) != 0
+                if partial:
+                    errorStr.append('\nCalls of the other tools are shown.')
                 QMessageBox.information(self, 'Errors while Querying', '\n'.join(errorStr))
-                QDialog.reject(self)
+                if partial:
+                    QDialog.accept(self)
+                else:
+                    QDialog.reject(self)
             else:
                 # success
                 QMessageBox.information(self, 'Done', 'Done! Query Successful')
@@ -823,23 +789,24 @@ class exportGenbankDialog(phagecommander.GuiWidgets.exportDialog):
         Called when user presses export
         """
 
-        # put all Genes in one list
-        filteredGenes = []
-        for geneSet in self.queryData.toolData.values():
-            filteredGenes.extend(geneSet)
-
+        # genes of every tool
+        consensus = self.queryData.consensus(list(self.queryData.toolData.keys()))
         # filter based on user selection
-        filteredGenes = Gene.GeneUtils.filterGenes(filteredGenes, self.getFilterFunction())
-        # filtered genes is now List[List[Gene]]
+        selectedGenes = consensus.select(self.getFilterFunction())
 
-        genesToExport = []
-        # find the most frequent Gene in each set of Genes
-        for geneSet in filteredGenes:
-            genesToExport.append(Gene.GeneUtils.findMostGeneOccurrences(geneSet))
+        # records are built as they are written - the writer lower cases the sequence as it streams it
+        contigsToExport = ((contig.name, contig.sequence,
+                            # the most frequent Gene of each selected gene on the contig
+                            consensus.representatives(consensus.contigGroups(contig.name, selectedGenes)))
+                           for contig in self.queryData.contigs)
 
         # output to file
         try:
-            Gene.GeneUtils.genbankToFile(str(self.queryData.sequence.seq).lower(), genesToExport, self.saveFileName)
+            if len(self.queryData.contigs) == 1:
+                _, sequence, genesToExport = next(contigsToExport)
+                Gene.GeneUtils.genbankToFile(sequence, genesToExport, self.saveFileName)
+            else:
+                Gene.GeneUtils.genbankContigsToFile(contigsToExport, self.saveFileName)
         except PermissionError as e:
             QMessageBox.warning(self,
                                 'Permission Denied',
@@ -887,8 +854,14 @@ class GeneMain(QMainWindow):
     _LAST_OPEN_FILE_LOCATION_SETTING = 'GENE_MAIN/last_open_file_location'
     _PRODIGAL_BINARY_LOCATION_SETTING = 'GENE_MAIN/prodigal_location'
     _LAST_EXCEL_SAVE_LOCATION_SETTING = 'GENE_MAIN/last_excel_location'
+    _LAST_PROJECT_LOCATION_SETTING = 'GENE_MAIN/last_project_location'
+    _CONNECTION_POOL_SIZE_SETTING = 'NETWORK/pool_size'
+    _REQUEST_TIMEOUT_SETTING = 'NETWORK/timeout'
+    _ENDPOINT_BASE_SETTING = 'NETWORK/endpoint_base'
+    _MIN_GENE_OVERLAP_SETTING = 'CONFLICTS/min_gene_overlap'
     _GENE_TAB_LABEL = 'Genes'
     _TRNA_TAB_LABEL = 'TRNA'
+    _CONFLICT_TAB_LABEL = 'Conflicts'
 
     def __init__(self, parent=None):
         super(GeneMain, self).__init__(parent)
@@ -897,9 +870,17 @@ class GeneMain(QMainWindow):
         # central tab widget
         self.tab = QTabWidget()
 
-        # tables
-        self.geneTable = QTableWidget()
-        self.trnaTable = QTableWidget()
+        # tables - cells are drawn from the models for the visible rows only
+        self.geneModel = phagecommander.GuiWidgets.GeneTableModel(self)
+        self.trnaModel = phagecommander.GuiWidgets.GeneTableModel(self)
+        self.geneTable = QTableView()
+        self.trnaTable = QTableView()
+        for table, model in ((self.geneTable, self.geneModel), (self.trnaTable, self.trnaModel)):
+            table.setModel(model)
+            table.setSelectionMode(QTableView.NoSelection)
+        # consensus genes overlapping a tRNA / another gene - few rows, so a plain item table
+        self.conflictTable = QTableWidget()
+        self.conflictTable.setEditTriggers(QTableWidget.NoEditTriggers)
 
         # status bar
         self.status = self.statusBar()
@@ -925,6 +906,12 @@ class GeneMain(QMainWindow):
         self.saveAction = self.createAction('&Save', self.save, QKeySequence.Save,
                                             tip='Save gene data')
 
+        self.openProjectAction = self.createAction('Open from project...', self.openFromProject, None,
+                                                   tip='Open a genome of a project database')
+
+        self.saveProjectAction = self.createAction('Save to project...', self.saveToProject, None,
+                                                   tip='Save gene data to a project database')
+
         self.settingsAction = self.createAction('Settings', self.settings, None, )
 
         self.exportExcelAction = self.createAction('Excel', self.exportExcel, None)
@@ -938,6 +925,8 @@ class GeneMain(QMainWindow):
                                 self.saveAction, self.saveAsAction)
         self.fileMenu.addActions(self.fileMenuActions)
         self.fileMenu.addSeparator()
+        self.fileMenu.addActions([self.openProjectAction, self.saveProjectAction])
+        self.fileMenu.addSeparator()
 
         # export submenu
         exportSubMenu = self.fileMenu.addMenu('Export as...')
@@ -955,12 +944,28 @@ class GeneMain(QMainWindow):
         # if saving is enabled
         self.saveEnabled = False
 
-        self.genes = []
+        # running QueryDialog - None if no query is running
+        self.queryDialog = None
+        # GeneTableModels filled while querying
+        self.liveTables = []
+        # table colors - read from the settings on first use, cleared when a color setting changes
+        self._palette = None
+        self._brushes = None
 
         # Get Settings, populate defaults if they do not exist
         self.settings = QSettings(QSettings.IniFormat, QSettings.UserScope, APP_NAME, APP_NAME)
         self.checkDefaultSettings()
 
+        # connection pool shared by all remote tools
+        # timeout setting is the read timeout - connect timeout stays at its default
+        Transport.configure(poolSize=int(self.settings.value(self._CONNECTION_POOL_SIZE_SETTING)),
+                            timeout=(Transport.DEFAULT_TIMEOUT[0],
+                                     float(self.settings.value(self._REQUEST_TIMEOUT_SETTING))))
+        # redirect remote tools to a local stand-in server (see MockServer) - empty for the live servers
+        endpointBase = self.settings.value(self._ENDPOINT_BASE_SETTING)
+        if endpointBase:
+            Endpoints.configure(base=endpointBase)
+
         self.enableActions()
         # SETTINGS ---------------------------------------------------------------------------------
         self.setWindowTitle(APP_NAME)
@@ -984,30 +989,73 @@ class GeneMain(QMainWindow):
         dialog = NewFileDialog(tmpQueryData, self.settings, self.settings.value(self._PRODIGAL_BINARY_LOCATION_SETTING))
         # if user initiates a query
         if dialog.exec_():
-            # query tools
-            self.queryData = tmpQueryData
-            queryDialog = QueryDialog(self.queryData, self.settings)
-
-            # query to tools is successful
-            if queryDialog.exec_():
-                # update open variable
-                self.fileOpened = True
-                self.dirty = True
-                self.saveEnabled = False
-                # enable / disable actions
-                self.enableActions()
-                # update window title with temporary file name
-                self.setWindowTitle('{} - {}'.format(APP_NAME, 'untitled*'))
-                # display gene data
-                self.updateTable()
-            # query was canceled by user - back to main window
-            else:
-                pass
+            # query tools - the dialog is not modal, calls are shown in the tables as each query returns
+            try:
+                self.queryDialog = QueryDialog(tmpQueryData, self.settings, self)
+            # file changed / removed since the dialog checked it
+            except (Fasta.FastaError, OSError) as e:
+                QMessageBox.warning(self, 'Invalid DNA File', str(e))
+                return
+            self.queryDialog.thread.resultSig.connect(self.addQueryResult)
+            self.queryDialog.finished.connect(self.queryFinished)
+            self.startLiveTables(tmpQueryData)
+            self.enableActions()
+            self.queryDialog.show()
 
         # user does not initiate query - back to main window
         else:
             pass
 
+    @pyqtSlot(object)
+    def addQueryResult(self, job):
+        """
+        Merges the calls of a returned query into the live tables - only the rows of genes the calls
+        belong to are inserted / redrawn
+        :param job: QueryJob
+        """
+        # failed queries are reported once every query returns
+        if not isinstance(job.result, list):
+            return
+        for model in self.liveTables:
+            if job.tool in model.tools:
+                model.merge(job.result)
+
+    @pyqtSlot(int)
+    def queryFinished(self, queryAccepted):
+        """
+        Called when the query dialog closes - whether by finishing or user pressing cancel
+        :param queryAccepted: QDialog result
+        """
+        queryDialog = self.queryDialog
+        self.queryDialog = None
+        self.liveTables = []
+        if queryDialog.thread.cache is not None:
+            cacheStats = queryDialog.thread.cache.stats()
+            self.status.showMessage('Result cache: {} hits, {} misses'.format(cacheStats['hits'],
+                                                                             cacheStats['misses']), 5000)
+        # query to tools is successful (for at least one tool) - the live tables already hold every call
+        if queryAccepted:
+            self.queryData = queryDialog.queryData
+            # update open variable
+            self.fileOpened = True
+            self.dirty = True
+            self.saveEnabled = False
+            # update window title with temporary file name
+            self.setWindowTitle('{} - {}'.format(APP_NAME, 'untitled*'))
+            # live tables have a column for every tool queried - redraw without the failed ones
+            if len(self.queryData.usedTools(list(self.queryData.toolData))) != len(self.queryData.toolData):
+                self.tab.clear()
+                self.updateTable()
+            else:
+                self.updateConflictTable()
+        # query was canceled by user / every tool failed - show the previous data again
+        else:
+            self.tab.clear()
+            if self.fileOpened:
+                self.updateTable()
+        # enable / disable actions
+        self.enableActions()
+
     def openFile(self):
         """
         Open a query data file
@@ -1029,35 +1077,111 @@ class GeneMain(QMainWindow):
         if openFileName[0] != '':
             # try to open file
             try:
-                with open(openFileName[0], 'rb') as openFile:
-                    tempQueryData = pickle.load(openFile)
-                    # check if file is QueryData object
-                    if not isinstance(tempQueryData, QueryData):
-                        # show error message
-                        QMessageBox.Warning(self, "Invalid File",
-                                            "File: {} was not .gq formatted file".format(
-                                                openFileName[0]))
-                        return
-                    # assign new data
-                    self.queryData = tempQueryData
-                    self.fileOpened = True
-                    self.saveEnabled = True
-                    self.enableActions()
-                    # save location
-                    self.settings.setValue(self._LAST_OPEN_FILE_LOCATION_SETTING, os.path.split(openFileName[0])[0])
-                    # change window titles
-                    self.setWindowTitle('{} - {}'.format(APP_NAME, openFileName[0]))
-                    # update table
-                    self.updateTable()
+                # sessions and sessions pickled by earlier versions - sequences are read when first used
+                tempQueryData = Session.load(openFileName[0])
+                # assign new data
+                self.queryData = tempQueryData
+                self.fileOpened = True
+                self.saveEnabled = True
+                self.enableActions()
+                # save location
+                self.settings.setValue(self._LAST_OPEN_FILE_LOCATION_SETTING, os.path.split(openFileName[0])[0])
+                # change window titles
+                self.setWindowTitle('{} - {}'.format(APP_NAME, openFileName[0]))
+                # update table
+                self.updateTable()
 
             # opening file was unsuccessful
             except FileNotFoundError:
                 QMessageBox.warning(self, 'File Does not Exist',
                                     'File: {} does not exist.'.format(openFileName[0]))
+            except Session.SessionError as e:
+                QMessageBox.warning(self, 'Invalid File', str(e))
             except Exception as e:
                 QMessageBox.warning(self, 'Error Opening File',
                                     str(e))
 
+    @pyqtSlot()
+    def openFromProject(self):
+        """
+        Opens a genome of a project database
+        """
+        # check for unsaved progressed
+        if not self.okToContinue():
+            return
+
+        fileExtensions = ['Project Files (*.db)', 'All Files (*.*)']
+        projectFileName = QFileDialog.getOpenFileName(self,
+                                                      'Open Project...',
+                                                      self.settings.value(self._LAST_PROJECT_LOCATION_SETTING),
+                                                      ';;'.join(fileExtensions))
+        if projectFileName[0] == '':
+            return
+
+        try:
+            with ProjectStore(projectFileName[0]) as store:
+                genomes = store.genomes()
+                if len(genomes) == 0:
+                    QMessageBox.warning(self, 'Empty Project',
+                                        'Project: {} has no genomes.'.format(projectFileName[0]))
+                    return
+                genome, accepted = QInputDialog.getItem(self, 'Open from project', 'Genome:', genomes, 0, False)
+                if not accepted:
+                    return
+                # the store is closed afterwards - sequences are read now
+                tempQueryData = store.loadGenome(genome, lazy=False)
+        except (ProjectStoreError, sqlite3.Error) as e:
+            QMessageBox.warning(self, 'Error Opening Project', str(e))
+            return
+
+        self.queryData = tempQueryData
+        self.fileOpened = True
+        # the genome has no session file yet
+        self.saveEnabled = False
+        self.dirty = False
+        self.enableActions()
+        self.settings.setValue(self._LAST_PROJECT_LOCATION_SETTING, os.path.split(projectFileName[0])[0])
+        self.setWindowTitle('{} - {} ({})'.format(APP_NAME, genome, os.path.split(projectFileName[0])[1]))
+        self.updateTable()
+
+    @pyqtSlot()
+    def saveToProject(self):
+        """
+        Saves the gene data as a genome of a project database - the database is created if it does not exist
+        :return True/False if save was successful
+        """
+        fileExtensions = ['Project Files (*.db)', 'All Files (*.*)']
+        projectFileName = QFileDialog.getSaveFileName(self,
+                                                      'Save to project...',
+                                                      self.settings.value(self._LAST_PROJECT_LOCATION_SETTING),
+                                                      ';;'.join(fileExtensions),
+                                                      options=QFileDialog.DontConfirmOverwrite)
+        if projectFileName[0] == '':
+            return False
+
+        defaultName = os.path.splitext(os.path.split(self.queryData.fileName)[1])[0]
+        genome, accepted = QInputDialog.getText(self, 'Save to project', 'Genome name:', text=defaultName)
+        if not accepted or genome == '':
+            return False
+
+        try:
+            with ProjectStore(projectFileName[0]) as store:
+                if genome in store:
+                    userReply = QMessageBox.question(self, 'Replace Genome',
+                                                     'Genome {} already exists in the project. Replace it?'.format(
+                                                         genome),
+                                                     QMessageBox.Yes | QMessageBox.No)
+                    if userReply != QMessageBox.Yes:
+                        return False
+                store.saveGenome(genome, self.queryData)
+        except (ProjectStoreError, sqlite3.Error) as e:
+            QMessageBox.warning(self, 'Error Saving to Project', str(e))
+            return False
+
+        self.settings.setValue(self._LAST_PROJECT_LOCATION_SETTING, os.path.split(projectFileName[0])[0])
+        self.status.showMessage('Genome {} saved to: {}'.format(genome, projectFileName[0]), 5000)
+        return True
+
     @pyqtSlot()
     def save(self):
         """
@@ -1066,8 +1190,7 @@ class GeneMain(QMainWindow):
         :return True/False if save was successful
         """
         # save file
-        with open(self.queryData.fileName, 'wb') as saveFile:
-            pickle.dump(self.queryData, saveFile)
+        Session.save(self.queryData, self.queryData.fileName)
         # update status bar
         self.status.showMessage('Changes saved to: {}'.format(self.queryData.fileName, 5000))
         return True
@@ -1088,9 +1211,8 @@ class GeneMain(QMainWindow):
 
         # check if user didn't provide file
         if saveFileName[0] != '':
-            with open(saveFileName[0], 'wb') as saveFile:
-                self.queryData.fileName = saveFileName[0]
-                pickle.dump(self.queryData, saveFile)
+            self.queryData.fileName = saveFileName[0]
+            Session.save(self.queryData, saveFileName[0])
             self.status.showMessage('File saved to: {}'.format(saveFileName[0]), 5000)
             # update file name
             # update window title
@@ -1108,8 +1230,9 @@ class GeneMain(QMainWindow):
     @pyqtSlot()
     def settings(self):
         preferencesDialog = SettingsDialog()
+        # color changes are applied to the tables as they are made
+        preferencesDialog.tableTab.colorsChanged.connect(self.restyleTables)
         preferencesDialog.exec_()
-        self.updateTable()
 
     @pyqtSlot()
     def exportExcel(self):
@@ -1129,22 +1252,10 @@ class GeneMain(QMainWindow):
 
         # if file name was provided, write to file
         if excelFileName[0] != '':
-
-            GENES_USED = False
-            TRNA_USED = False
-            for key in self.queryData.toolData.keys():
-                if key in GENE_TOOLS:
-                    GENES_USED = True
-                elif key in TRNA_TOOLS:
-                    TRNA_USED = True
-
-            wb = Workbook()
-            if GENES_USED:
-                self._exportTableToExcel(self.geneTable, 'Genes', wb)
-            if TRNA_USED:
-                self._exportTableToExcel(self.trnaTable, 'TRNA', wb)
-
-            wb.save(filename=excelFileName[0])
+            # rows are written from the gene data - the tables are not read back
+            exporter = ExcelExporter(self.tablePalette())
+            exporter.addQueryData(self.queryData, minGeneOverlap=self.minGeneOverlap())
+            exporter.save(excelFileName[0])
 
             print(excelFileName[0])
             excelLocation = str(pathlib.Path(excelFileName[0]).parent)
@@ -1152,49 +1263,6 @@ class GeneMain(QMainWindow):
 
             self.status.showMessage('Exported Excel file to: {}'.format(excelFileName[0]), 5000)
 
-    def _exportTableToExcel(self, table: QTableWidget, label: str, wb: Workbook):
-        """
-        Adds the given table to the Excel Workbook as a new sheet
-        :param table: QTableWidget
-        :param label: Name of the new sheet
-        :param wb: Excel Workbook
-        """
-
-        # check if adding to existing workbook
-        # if not, rename first sheet
-        if wb.sheetnames[0] == 'Sheet':
-            ws = wb['Sheet']
-            ws.title = label
-        else:
-            ws = wb.create_sheet(label)
-
-        # add content to spreadsheet
-        # add headers
-        currentRow = 1
-        for column in range(table.columnCount()):
-            headerValue = table.horizontalHeaderItem(column).text()
-            cell = ws.cell(row=currentRow, column=column + 1, value=headerValue)
-            cell.alignment = Alignment(horizontal='center')
-            cell.font = Font(bold=True)
-
-        # add content
-        for row in range(table.rowCount()):
-            for column in range(table.columnCount()):
-                currCell = table.item(row, column)
-                cellValue = currCell.text() if currCell is not None else ''
-                if currCell is not None:
-                    cellColor = currCell.background().color().getRgb()
-                    cellRgbString = ''.join(['{:02x}'.format(num) for num in cellColor[:3]])
-                    fontColor = currCell.foreground().color().getRgb()
-                    fontRgbString = ''.join(['{:02x}'.format(num) for num in fontColor[:3]])
-
-                # convert an integer string to an integer for spreadsheet functionality
-                cellValue = int(cellValue) if cellValue.isdecimal() else cellValue
-                cell = ws.cell(row=row + 2, column=column + 1, value=cellValue)
-                cell.alignment = Alignment(horizontal='center')
-                cell.fill = PatternFill(fgColor=cellRgbString, fill_type='solid')
-                cell.font = Font(color=fontRgbString)
-
     @pyqtSlot()
     def exportGenbank(self):
 
@@ -1208,8 +1276,10 @@ class GeneMain(QMainWindow):
 
     def closeEvent(self, event):
         if self.okToContinue():
-            # exit
-            pass
+            # exit - stop any running query
+            if self.queryDialog is not None:
+                self.queryDialog.thread.abort()
+                self.queryDialog.thread.wait()
         else:
             event.ignore()
 
@@ -1250,229 +1320,116 @@ class GeneMain(QMainWindow):
         Displays Gene data to Table
         :return:
         """
-        # render tables if data exists
-        GENES_COMPLETE = False
-        TRNA_COMPLETE = False
-        for key in self.queryData.toolData.keys():
-            if key in GENE_TOOLS and not GENES_COMPLETE:
-                self._update_table(self.geneTable, GENE_TOOLS, 0, self._GENE_TAB_LABEL)
-                GENES_COMPLETE = True
-            elif key in TRNA_TOOLS and not TRNA_COMPLETE:
-                self._update_table(self.trnaTable, TRNA_TOOLS, 1, self._TRNA_TAB_LABEL)
-                TRNA_COMPLETE = True
+        # conflicts tab follows the gene / tRNA tabs
+        self.tab.removeTab(self.tab.indexOf(self.conflictTable))
 
-    def _update_table(self, table: QTableWidget, toolList: List[str], index: int, label: str):
+        # render tables if data exists - tools whose query failed get no column
+        if self.queryData.usedTools(GENE_TOOLS):
+            self._update_table(self.geneTable, GENE_TOOLS, 0, self._GENE_TAB_LABEL)
+        if self.queryData.usedTools(TRNA_TOOLS):
+            self._update_table(self.trnaTable, TRNA_TOOLS, 1, self._TRNA_TAB_LABEL)
+        self.updateConflictTable()
+
+    def _update_table(self, table: QTableView, toolList: List[str], index: int, label: str):
 
         self.tab.removeTab(index)
 
-        # remove any existing cells
-        table.setRowCount(0)
-        table.setColumnCount(0)
-
-        # table options
-        table.setSelectionMode(QTableWidget.NoSelection)
-
-        # sort genes
-        genes = []
-        usedGeneTools = []
-        for tool in self.queryData.toolData:
-            if tool in toolList:
-                usedGeneTools.append(tool)
-                genes += self.queryData.toolData[tool]
-
-        # calculate columns for tools
-        toolNumber = len(usedGeneTools)
-        toolColumns = toolNumber * 4 + toolNumber - 1
-        # add 3 columns for statistics
-        totalColumns = toolColumns + 3
-        table.setColumnCount(totalColumns)
-
-        # generate headers
-        headerIndexes = dict()
-        TOTAL_CALLS_COLUMN = 0
-        ALL_COLUMN = 1
-        ONE_COLUMN = 2
-        currIndex = 3
-        headers = ['TOTAL CALLS', 'ALL', 'ONE']
-        for ind, tool in enumerate(usedGeneTools):
-            headerIndexes[tool] = currIndex
-            for i in range(4):
-                currIndex += 1
-                headers.append(tool.upper())
-            if ind != toolNumber - 1:
-                headers.append('')
-                currIndex += 1
-
-        # set headers
-        table.setHorizontalHeaderLabels(headers)
-
-        # nothing to display - exit
-        if len(genes) == 0:
-            # create an empty table
-            self.tab.insertTab(index, table, label)
-            return
+        usedGeneTools = self.queryData.usedTools(toolList)
 
-        genes = Gene.GeneUtils.sortGenes(genes)
-
-        # reset genes
-        self.genes = []
-
-        # populate table
-        # insert first gene
-        currentRow = 0
-        table.insertRow(currentRow)
-        previousGene = genes[0]
-        currentGeneCount = 1
-        currentGeneSet = [genes[0]]
-        currentGenes = dict()
-        geneIndex = headerIndexes[previousGene.identity]
-        # direction
-        directionItem = QTableWidgetItem(previousGene.direction)
-        directionItem.setTextAlignment(Qt.AlignCenter)
-        table.setItem(currentRow, geneIndex, directionItem)
-        # start
-        startItem = QTableWidgetItem(str(previousGene.start))
-        startItem.setTextAlignment(Qt.AlignCenter)
-        table.setItem(currentRow, geneIndex + 1, startItem)
-        # stop
-        stopItem = QTableWidgetItem(str(previousGene.stop))
-        stopItem.setTextAlignment(Qt.AlignCenter)
-        table.setItem(currentRow, geneIndex + 2, stopItem)
-        # length
-        lengthItem = QTableWidgetItem(str(previousGene.length))
-        lengthItem.setTextAlignment(Qt.AlignCenter)
-        table.setItem(currentRow, geneIndex + 3, lengthItem)
-
-        if previousGene.direction == '+':
-            comparingNum = previousGene.start
-        else:
-            comparingNum = previousGene.stop
-        # insert comparing num into dict
-        if comparingNum not in currentGenes.keys():
-            currentGenes[comparingNum] = 1
-        else:
-            currentGenes[comparingNum] += 1
+        # contig column is only shown for multi-record files
+        multiContig = len(self.queryData.contigs) > 1
 
-        # insert rest of genes
-        for gene in genes[1:]:
-            geneIndex = headerIndexes[gene.identity]
+        # genes of each contig sorted by their stop/start - contigs in file order
+        consensus = self.queryData.consensus(usedGeneTools)
 
-            # same gene - add to current row
-            if gene == previousGene:
-                currentGeneCount += 1
-                currentGeneSet.append(gene)
-            # different gene - create new row
-            else:
-                # record TOTAL_CALLS, ALL and ONE for previous gene
-                totalItem = QTableWidgetItem(str(currentGeneCount))
-                totalItem.setTextAlignment(Qt.AlignCenter)
-                table.setItem(currentRow, TOTAL_CALLS_COLUMN, totalItem)
-                if currentGeneCount == toolNumber:
-                    allItem = QTableWidgetItem(str('X'))
-                    allItem.setTextAlignment(Qt.AlignCenter)
-                    table.setItem(currentRow, ALL_COLUMN, allItem)
-                elif currentGeneCount == 1:
-                    oneItem = QTableWidgetItem(str('X'))
-                    oneItem.setTextAlignment(Qt.AlignCenter)
-                    table.setItem(currentRow, ONE_COLUMN, oneItem)
-
-                # color row
-                colorSetting = self.settings.value(ColorTable.CELL_COLOR_SETTING + str(currentGeneCount - 1))
-                colorNums = [int(num) for num in colorSetting.split(' ')]
-                color = QColor(*colorNums)
-                # color text
-                textColorSetting = self.settings.value(ColorTable.MAJORITY_TEXT_SETTING + str(currentGeneCount - 1))
-                textNums = [int(num) for num in textColorSetting.split(' ')]
-                textColor = QColor(*textNums)
-                # TODO: Figure out minority rule
-                for column in range(totalColumns):
-                    item = table.item(currentRow, column)
-                    # insert blank item if none is present
-                    if item is None:
-                        item = QTableWidgetItem('')
-                        table.setItem(currentRow, column, item)
-                    item.setBackground(color)
-                    item.setForeground(textColor)
-
-                # record new gene
-                currentGeneCount = 1
-                currentGenes = dict()
-                currentRow += 1
-                table.insertRow(currentRow)
-
-                # add full set to genes
-                self.genes.append(currentGeneSet)
-                currentGeneSet = [gene]
-
-            # add gene to table
-            # direction
-            directionItem = QTableWidgetItem(gene.direction)
-            directionItem.setTextAlignment(Qt.AlignCenter)
-            table.setItem(currentRow, geneIndex, directionItem)
-            # start
-            startItem = QTableWidgetItem(str(gene.start))
-            startItem.setTextAlignment(Qt.AlignCenter)
-            table.setItem(currentRow, geneIndex + 1, startItem)
-            # stop
-            stopItem = QTableWidgetItem(str(gene.stop))
-            stopItem.setTextAlignment(Qt.AlignCenter)
-            table.setItem(currentRow, geneIndex + 2, stopItem)
-            # length
-            lengthItem = QTableWidgetItem(str(gene.length))
-            lengthItem.setTextAlignment(Qt.AlignCenter)
-            table.setItem(currentRow, geneIndex + 3, lengthItem)
-
-            if gene.direction == '+':
-                comparingNum = gene.start
-            else:
-                comparingNum = gene.stop
-                # insert comparing num into dict
-            if comparingNum not in currentGenes.keys():
-                currentGenes[comparingNum] = 1
-            else:
-                currentGenes[comparingNum] += 1
-
-            # set gene to compare next against
-            previousGene = gene
-
-        # record TOTAL_CALLS, ALL and ONE for last gene
-        totalItem = QTableWidgetItem(str(currentGeneCount))
-        totalItem.setTextAlignment(Qt.AlignCenter)
-        table.setItem(currentRow, TOTAL_CALLS_COLUMN, totalItem)
-        if currentGeneCount == toolNumber:
-            allItem = QTableWidgetItem(str('X'))
-            allItem.setTextAlignment(Qt.AlignCenter)
-            table.setItem(currentRow, ALL_COLUMN, allItem)
-        elif currentGeneCount == 1:
-            oneItem = QTableWidgetItem(str('X'))
-            oneItem.setTextAlignment(Qt.AlignCenter)
-            table.setItem(currentRow, ONE_COLUMN, oneItem)
-
-        # append last set of genes
-        self.genes.append(currentGeneSet)
-
-        # color last row
-        colorSetting = self.settings.value(ColorTable.CELL_COLOR_SETTING + str(currentGeneCount - 1))
-        colorNums = [int(num) for num in colorSetting.split(' ')]
-        color = QColor(*colorNums)
-        # color text
-        textColorSetting = self.settings.value(ColorTable.MAJORITY_TEXT_SETTING + str(currentGeneCount - 1))
-        textNums = [int(num) for num in textColorSetting.split(' ')]
-        textColor = QColor(*textNums)
-        # TODO: Figure out minority rule
-        for column in range(totalColumns):
-            item = table.item(currentRow, column)
-            # insert blank item if blank cell
-            if item is None:
-                item = QTableWidgetItem('')
-                table.setItem(currentRow, column, item)
-            item.setBackground(color)
-            item.setForeground(textColor)
+        # one row per gene - cells are built as the view draws them
+        table.model().reset(usedGeneTools, multiContig, consensus, self.tableBrushes())
 
         # show tab
         # self.tab.addTab(table, self._GENE_TAB_LABEL)
         self.tab.insertTab(index, table, label)
 
+    def updateConflictTable(self):
+        """
+        Shows the consensus genes overlapping a tRNA or another consensus gene (see QueryData.conflicts) in the
+        last tab - no tab without gene calls
+        """
+        self.tab.removeTab(self.tab.indexOf(self.conflictTable))
+        if not self.queryData.usedTools(GENE_TOOLS):
+            return
+
+        conflicts = self.queryData.conflicts(self.minGeneOverlap())
+        layout = ConflictLayout(len(self.queryData.contigs) > 1)
+        self.conflictTable.clear()
+        self.conflictTable.setRowCount(len(conflicts))
+        self.conflictTable.setColumnCount(len(layout))
+        self.conflictTable.setHorizontalHeaderLabels(layout.headers)
+        for row, conflict in enumerate(conflicts):
+            for column, text in enumerate(layout.rowCells(conflict)):
+                self.conflictTable.setItem(row, column, QTableWidgetItem(text))
+        self.conflictTable.resizeColumnsToContents()
+        self.tab.addTab(self.conflictTable, '{} ({})'.format(self._CONFLICT_TAB_LABEL, len(conflicts)))
+
+    def minGeneOverlap(self) -> int:
+        """
+        :return: minimum shared bases of two genes listed as a conflict - CONFLICTS/min_gene_overlap setting
+        """
+        return int(self.settings.value(self._MIN_GENE_OVERLAP_SETTING, DEFAULT_MIN_GENE_OVERLAP))
+
+    def startLiveTables(self, queryData: QueryData):
+        """
+        Shows empty tables for the tools being queried - filled by addQueryResult as each query returns
+        :param queryData: QueryData of the query
+        """
+        self.tab.clear()
+        self.liveTables = []
+        multiContig = len(queryData.contigs) > 1
+        brushes = self.tableBrushes()
+        for table, toolList, index, label in ((self.geneTable, GENE_TOOLS, 0, self._GENE_TAB_LABEL),
+                                              (self.trnaTable, TRNA_TOOLS, 1, self._TRNA_TAB_LABEL)):
+            tools = [tool for tool in queryData.toolData if tool in toolList]
+            if len(tools) == 0:
+                continue
+            table.model().reset(tools, multiContig, IncrementalConsensus(queryData.contigNames(), tools), brushes)
+            self.tab.insertTab(index, table, label)
+            self.liveTables.append(table.model())
+
+    def tablePalette(self) -> TablePalette:
+        """
+        :return: TablePalette of the ColorTable settings - read once until a color changes
+        """
+        if self._palette is None:
+            # TODO: Figure out minority rule
+            self._palette = TablePalette.fromSettings(self.settings, ColorTable.CELL_COLOR_SETTING,
+                                                      ColorTable.MAJORITY_TEXT_SETTING, len(GENE_TOOLS))
+        return self._palette
+
+    def tableBrushes(self) -> list:
+        """
+        :return: (cell brush, text brush) of each call count - shared by every row of the tables
+        """
+        if self._brushes is None:
+            self._brushes = phagecommander.GuiWidgets.paletteBrushes(self.tablePalette())
+        return self._brushes
+
+    @pyqtSlot()
+    def clearPalette(self):
+        """
+        Drops the cached table colors - read from the settings again on next use
+        """
+        self._palette = None
+        self._brushes = None
+
+    @pyqtSlot()
+    def restyleTables(self):
+        """
+        Applies the color settings to the displayed tables without rebuilding them
+        """
+        self.clearPalette()
+        brushes = self.tableBrushes()
+        for model in (self.geneModel, self.trnaModel):
+            model.setBrushes(brushes)
+
     def enableActions(self):
         """
         Enables / Disables GUI actions
@@ -1481,10 +1438,12 @@ class GeneMain(QMainWindow):
         # file open actions
         if self.fileOpened:
             self.saveAsAction.setEnabled(True)
+            self.saveProjectAction.setEnabled(True)
             self.exportExcelAction.setEnabled(True)
             self.exportGenbankAction.setEnabled(True)
         else:
             self.saveAsAction.setEnabled(False)
+            self.saveProjectAction.setEnabled(False)
             self.exportExcelAction.setEnabled(False)
             self.exportGenbankAction.setEnabled(False)
 
@@ -1493,6 +1452,17 @@ class GeneMain(QMainWindow):
         else:
             self.saveAction.setEnabled(False)
 
+        # file actions wait for a running query
+        if self.queryDialog is not None:
+            for action in (self.newFileAction, self.openFileAction, self.saveAction, self.saveAsAction,
+                           self.openProjectAction, self.saveProjectAction, self.exportExcelAction,
+                           self.exportGenbankAction):
+                action.setEnabled(False)
+        else:
+            self.newFileAction.setEnabled(True)
+            self.openFileAction.setEnabled(True)
+            self.openProjectAction.setEnabled(True)
+
     def checkProdigal(self):
 
         prodigalPath = self.settings.value(self._PRODIGAL_BINARY_LOCATION_SETTING)
@@ -1545,6 +1515,8 @@ class GeneMain(QMainWindow):
         NewFileDialog.checkDefaultSettings(self.settings)
         # EXPORT GENBANK SETTINGS
         exportGenbankDialog.checkDefaultSettings(self.settings)
+        # QUERY SETTINGS
+        QueryManager.checkDefaultSettings(self.settings)
         # COLOR SETTINGS
         ColorTable.checkDefaultSettings(self.settings)
 
@@ -1556,6 +1528,18 @@ class GeneMain(QMainWindow):
         if self.settings.value(self._LAST_EXCEL_SAVE_LOCATION_SETTING) is None:
             self.settings.setValue(self._LAST_EXCEL_SAVE_LOCATION_SETTING, '')
 
+        # NETWORK
+        if self.settings.value(self._CONNECTION_POOL_SIZE_SETTING) is None:
+            self.settings.setValue(self._CONNECTION_POOL_SIZE_SETTING, Transport.DEFAULT_POOL_SIZE)
+        if self.settings.value(self._REQUEST_TIMEOUT_SETTING) is None:
+            self.settings.setValue(self._REQUEST_TIMEOUT_SETTING, Transport.DEFAULT_TIMEOUT[1])
+        if self.settings.value(self._ENDPOINT_BASE_SETTING) is None:
+            self.settings.setValue(self._ENDPOINT_BASE_SETTING, '')
+
+        # CONFLICTS
+        if self.settings.value(self._MIN_GENE_OVERLAP_SETTING) is None:
+            self.settings.setValue(self._MIN_GENE_OVERLAP_SETTING, DEFAULT_MIN_GENE_OVERLAP)
+
 
 # MAIN FUNCTION
 def main():
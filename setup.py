@@ -21,8 +21,10 @@ setuptools.setup(
                       'openpyxl',
                       'pyqt5>=5.10, <= 5.13.2',
                       'biopython',
-                      'ruamel.yaml'],
-    entry_points={'gui_scripts': 'phagecom = phagecommander.phagecom:main'},
+                      'ruamel.yaml',
+                      'numpy'],
+    entry_points={'gui_scripts': 'phagecom = phagecommander.phagecom:main',
+                  'console_scripts': 'phagecom-batch = phagecommander.batch:main'},
     classifiers=["Programming Language :: Python :: 3",
                  "License :: OSI Approved :: GNU General Public License v3 (GPLv3)",
                  "Operating System :: Microsoft :: Windows",